@@ -4,6 +4,9 @@ Panel de filtros para comparación
 import tkinter as tk
 from tkinter import ttk
 
+from app.data.expressions import build_filter_expression
+from app.utils.widgets import set_widgets_state
+
 
 class ComparisonPanel:
     def __init__(self, parent, grupos_disponibles, turnos_unicos):
@@ -44,9 +47,9 @@ class ComparisonPanel:
 
         # Turno para comparación
         ttk.Label(self.frame, text="Turno:").grid(row=2, column=0, sticky=tk.W)
-        turno_comp_combo = ttk.Combobox(self.frame, textvariable=self.turno_comp_var,
-                                       values=self.turnos_unicos, width=15)
-        turno_comp_combo.grid(row=2, column=1, padx=(5, 0), sticky=tk.W)
+        self.turno_comp_combo = ttk.Combobox(self.frame, textvariable=self.turno_comp_var,
+                                             values=self.turnos_unicos, width=15)
+        self.turno_comp_combo.grid(row=2, column=1, padx=(5, 0), sticky=tk.W)
 
         # % extremo superior para comparación
         ttk.Label(self.frame, text="% extremo sup:").grid(row=2, column=2, sticky=tk.W, padx=(20, 0))
@@ -66,6 +69,11 @@ class ComparisonPanel:
         """Obtener lista de grupos seleccionados para comparación"""
         return [grupo for grupo, var in self.grupos_comp_vars.items() if var.get()]
 
+    def get_filter_expression(self, tipificacion_filtrada):
+        """Expresión de filtrado del grupo de comparación (usa la tipificación del grupo principal)"""
+        return build_filter_expression(self.get_selected_grupos_comp(), tipificacion_filtrada,
+                                       self.turno_comp_var.get())
+
     def select_all_grupos_comp(self):
         """Seleccionar todos los grupos de comparación"""
         for var in self.grupos_comp_vars.values():
@@ -74,4 +82,15 @@ class ComparisonPanel:
     def clear_all_grupos_comp(self):
         """Deseleccionar todos los grupos de comparación"""
         for var in self.grupos_comp_vars.values():
-            var.set(False)
\ No newline at end of file
+            var.set(False)
+
+    def update_turnos(self, turnos_unicos):
+        """Actualizar las opciones de turno tras cargar datos"""
+        self.turnos_unicos = turnos_unicos
+        self.turno_comp_combo.configure(values=turnos_unicos)
+        if turnos_unicos and self.turno_comp_var.get() not in turnos_unicos:
+            self.turno_comp_var.set(turnos_unicos[0])
+
+    def set_enabled(self, enabled):
+        """Habilitar/deshabilitar todos los controles del panel"""
+        set_widgets_state(self.frame, enabled)
@@ -4,6 +4,11 @@ Panel de filtros principal
 import tkinter as tk
 from tkinter import ttk
 
+from app.data.expressions import Between, build_filter_expression
+from app.data.kde import KDE_BANDWIDTHS
+from app.utils.validators import parse_date_range, validate_date_range
+from app.utils.widgets import set_widgets_state
+
 
 class FiltersPanel:
     def __init__(self, parent, grupos_disponibles, tipificaciones_unicas, turnos_unicos):
@@ -19,6 +24,9 @@ class FiltersPanel:
         self.size_bin_var = tk.StringVar(value="1.0")
         self.quitar_extremo_var = tk.StringVar(value="0.02")
         self.mostrar_kde = tk.BooleanVar()
+        self.kde_bandwidth_var = tk.StringVar(value=next(iter(KDE_BANDWIDTHS)))
+        self.fecha_desde_var = tk.StringVar(value="")
+        self.fecha_hasta_var = tk.StringVar(value="")
 
         # Crear el frame principal
         self.frame = ttk.LabelFrame(parent, text="Filtros Principales", padding="10")
@@ -47,15 +55,15 @@ class FiltersPanel:
 
         # Tipificación
         ttk.Label(self.frame, text="Tipificación:").grid(row=2, column=0, sticky=tk.W)
-        tipificacion_combo = ttk.Combobox(self.frame, textvariable=self.tipificacion_var,
-                                        values=self.tipificaciones_unicas, width=25)
-        tipificacion_combo.grid(row=2, column=1, padx=(5, 0), sticky=tk.W)
+        self.tipificacion_combo = ttk.Combobox(self.frame, textvariable=self.tipificacion_var,
+                                             values=self.tipificaciones_unicas, width=25)
+        self.tipificacion_combo.grid(row=2, column=1, padx=(5, 0), sticky=tk.W)
 
         # Turno
         ttk.Label(self.frame, text="Turno:").grid(row=2, column=2, sticky=tk.W, padx=(20, 0))
-        turno_combo = ttk.Combobox(self.frame, textvariable=self.turno_var,
-                                 values=self.turnos_unicos, width=15)
-        turno_combo.grid(row=2, column=3, padx=(5, 0), sticky=tk.W)
+        self.turno_combo = ttk.Combobox(self.frame, textvariable=self.turno_var,
+                                        values=self.turnos_unicos, width=15)
+        self.turno_combo.grid(row=2, column=3, padx=(5, 0), sticky=tk.W)
 
         # Controles numéricos
         ttk.Label(self.frame, text="Ancho intervalo:").grid(row=3, column=0, sticky=tk.W)
@@ -71,10 +79,50 @@ class FiltersPanel:
                                    variable=self.mostrar_kde)
         kde_check.grid(row=3, column=4, padx=(20, 0), sticky=tk.W)
 
+        # Ancho de banda de la KDE: una regla o un valor en segundos escrito a mano
+        ttk.Label(self.frame, text="Ancho de banda:").grid(row=3, column=5, sticky=tk.W, padx=(10, 0))
+        self.kde_bandwidth_combo = ttk.Combobox(self.frame, textvariable=self.kde_bandwidth_var,
+                                                values=list(KDE_BANDWIDTHS), width=10)
+        self.kde_bandwidth_combo.grid(row=3, column=6, padx=(5, 0), sticky=tk.W)
+
+        # Rango de fechas (vacío = sin límite)
+        ttk.Label(self.frame, text="Desde:").grid(row=4, column=0, sticky=tk.W)
+        fecha_desde_entry = ttk.Entry(self.frame, textvariable=self.fecha_desde_var, width=15)
+        fecha_desde_entry.grid(row=4, column=1, padx=(5, 0), sticky=tk.W)
+
+        ttk.Label(self.frame, text="Hasta:").grid(row=4, column=2, sticky=tk.W, padx=(20, 0))
+        fecha_hasta_entry = ttk.Entry(self.frame, textvariable=self.fecha_hasta_var, width=15)
+        fecha_hasta_entry.grid(row=4, column=3, padx=(5, 0), sticky=tk.W)
+
+        ttk.Label(self.frame, text="(AAAA-MM-DD, vacío = sin límite)").grid(row=4, column=4, padx=(20, 0),
+                                                                          sticky=tk.W)
+
     def get_selected_grupos(self):
         """Obtener lista de grupos seleccionados"""
         return [grupo for grupo, var in self.grupos_vars.items() if var.get()]
 
+    def get_date_range(self):
+        """Rango de fechas ingresado (desde, hasta), o None si es inválido (muestra el error)"""
+        return validate_date_range(self.fecha_desde_var.get(), self.fecha_hasta_var.get())
+
+    def get_date_filter(self):
+        """Predicado del rango de fechas, o None si no hay límites"""
+        desde, hasta = parse_date_range(self.fecha_desde_var.get(), self.fecha_hasta_var.get())
+        if desde is None and hasta is None:
+            return None
+        return Between('Inicio', desde, hasta)
+
+    def apply_date_filter(self, expr):
+        """Agregar el rango de fechas a una expresión de filtrado"""
+        date_filter = self.get_date_filter()
+        return expr if date_filter is None else date_filter & expr
+
+    def get_filter_expression(self):
+        """Expresión de filtrado con los grupos, la tipificación, el turno y el rango de fechas"""
+        return self.apply_date_filter(build_filter_expression(self.get_selected_grupos(),
+                                                              self.tipificacion_var.get(),
+                                                              self.turno_var.get()))
+
     def select_all_grupos(self):
         """Seleccionar todos los grupos"""
         for var in self.grupos_vars.values():
@@ -83,4 +131,21 @@ class FiltersPanel:
     def clear_all_grupos(self):
         """Deseleccionar todos los grupos"""
         for var in self.grupos_vars.values():
-            var.set(False)
\ No newline at end of file
+            var.set(False)
+
+    def update_options(self, tipificaciones_unicas, turnos_unicos):
+        """Actualizar las opciones de tipificación y turno tras cargar datos"""
+        self.tipificaciones_unicas = tipificaciones_unicas
+        self.turnos_unicos = turnos_unicos
+        self.tipificacion_combo.configure(values=tipificaciones_unicas)
+        self.turno_combo.configure(values=turnos_unicos)
+
+        # Conservar la selección actual si sigue existiendo en los datos
+        if tipificaciones_unicas and self.tipificacion_var.get() not in tipificaciones_unicas:
+            self.tipificacion_var.set(tipificaciones_unicas[0])
+        if turnos_unicos and self.turno_var.get() not in turnos_unicos:
+            self.turno_var.set(turnos_unicos[0])
+
+    def set_enabled(self, enabled):
+        """Habilitar/deshabilitar todos los controles del panel"""
+        set_widgets_state(self.frame, enabled)
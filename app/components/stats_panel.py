@@ -5,6 +5,16 @@ import tkinter as tk
 from tkinter import ttk
 import pandas as pd
 
+from app.data.bootstrap import BOOTSTRAP_STATISTICS, BootstrapRunner
+
+# Intervalo (ms) con el que se revisan los intervalos bootstrap terminados
+BOOTSTRAP_POLL_MS = 200
+
+# Nombres de los intervalos del panel
+CI_PRINCIPAL = '🔵 Principal'
+CI_COMPARACION = '🔴 Comparación'
+CI_DIFERENCIA = '📊 Comparación - Principal'
+
 
 class StatsPanel:
     def __init__(self, parent):
@@ -22,6 +32,10 @@ class StatsPanel:
         self.agents_sort_reverse = False
         self.current_agents_data = []
 
+        # Intervalos de confianza bootstrap (se calculan en otros procesos)
+        self.bootstrap = BootstrapRunner()
+        self._bootstrap_after_id = None
+
     def create_widgets(self):
         """Crear los widgets del panel de estadísticas"""
         # Frame para estadísticas básicas (lado izquierdo)
@@ -32,11 +46,19 @@ class StatsPanel:
         self.stats_text = tk.Text(basic_stats_frame, height=8, width=35)
         self.stats_text.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
 
+        self.ci_label = ttk.Label(basic_stats_frame, text="Intervalos de confianza (bootstrap):",
+                                  font=('TkDefaultFont', 9, 'bold'))
+        self.ci_label.pack(anchor=tk.W, pady=(5, 0))
+        self.ci_text = tk.Text(basic_stats_frame, height=8, width=35)
+        self.ci_text.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
         # Frame para outliers (centro)
         outliers_frame = ttk.Frame(self.frame)
         outliers_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=1, padx=(0, 10))
 
         ttk.Label(outliers_frame, text="Outliers (Valores Extremos):", font=('TkDefaultFont', 9, 'bold')).pack(anchor=tk.W)
+        ttk.Label(outliers_frame, text="(Límites por grupo, turno y tipificación en todo el dataset)",
+                  font=('TkDefaultFont', 8)).pack(anchor=tk.W)
 
         # Treeview para mostrar outliers en formato tabla
         columns = ('TalkingTime', 'Nombre Agente', 'Tipificación', 'Turno', 'Sentido', 'Inicio')
@@ -70,21 +92,24 @@ class StatsPanel:
         agents_analysis_frame.pack(side=tk.RIGHT, fill=tk.Y)
 
         ttk.Label(agents_analysis_frame, text="Análisis de Agentes:", font=('TkDefaultFont', 9, 'bold')).pack(anchor=tk.W)
-        ttk.Label(agents_analysis_frame, text="(Outliers por agente)", font=('TkDefaultFont', 8)).pack(anchor=tk.W)
+        ttk.Label(agents_analysis_frame, text="(Outliers por agente; tasa en todo el dataset)",
+                  font=('TkDefaultFont', 8)).pack(anchor=tk.W)
 
         # Treeview para mostrar el conteo de agentes
-        agents_columns = ('Agente', 'Cantidad', 'Porcentaje')
+        agents_columns = ('Agente', 'Cantidad', 'Porcentaje', 'Tasa')
         self.agents_tree = ttk.Treeview(agents_analysis_frame, columns=agents_columns, show='headings', height=8)
 
         # Configurar columnas del análisis de agentes con ordenamiento
         self.agents_tree.heading('Agente', text='Agente', command=lambda: self.sort_agents_table('Agente'))
         self.agents_tree.heading('Cantidad', text='Outliers ▼', command=lambda: self.sort_agents_table('Cantidad'))
         self.agents_tree.heading('Porcentaje', text='%', command=lambda: self.sort_agents_table('Porcentaje'))
+        self.agents_tree.heading('Tasa', text='Tasa', command=lambda: self.sort_agents_table('Tasa'))
 
         # Configurar ancho de columnas del análisis de agentes
         self.agents_tree.column('Agente', width=120, anchor=tk.W)
         self.agents_tree.column('Cantidad', width=60, anchor=tk.CENTER)
         self.agents_tree.column('Porcentaje', width=60, anchor=tk.CENTER)
+        self.agents_tree.column('Tasa', width=60, anchor=tk.CENTER)
 
         self.agents_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
 
@@ -93,14 +118,18 @@ class StatsPanel:
         agents_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.agents_tree.configure(yscrollcommand=agents_scroll.set)
 
-    def update_stats(self, df_filtrado, df_comp_filtrado=None):
-        """Actualizar el panel de estadísticas y outliers"""
+    def update_stats(self, df_filtrado, df_comp_filtrado=None, agent_rates=None):
+        """Actualizar el panel de estadísticas y outliers
+
+        agent_rates es la tabla de tasas de outliers por agente del dataset
+        completo (build_outlier_flags), si está disponible.
+        """
         import sys
         import os
         sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
         from app.utils.outliers import detect_outliers, analyze_outliers_by_agent
-        from app.data.processor import get_descriptive_stats, calculate_comparison_stats
+        from app.data.processor import get_summary, get_group_summaries, calculate_comparison_stats
 
         # Actualizar estadísticas básicas
         self.stats_text.delete(1.0, tk.END)
@@ -110,25 +139,26 @@ class StatsPanel:
 
         stats_text = ""
         all_outliers = pd.DataFrame()
+        stats = None
 
         # Estadísticas del grupo principal
         if len(df_filtrado) > 0:
-            stats = get_descriptive_stats(df_filtrado)
+            stats = get_summary(df_filtrado)
             outliers = detect_outliers(df_filtrado)
             outliers['Grupo'] = 'Principal'  # Marcar outliers del grupo principal
 
             stats_text += "🔵 GRUPO PRINCIPAL:\n"
             stats_text += f"Registros: {len(df_filtrado)}\n"
-            stats_text += f"Media: {stats['mean']:.2f} seg\n"
-            stats_text += f"Mediana: {stats['50%']:.2f} seg\n"
-            stats_text += f"Desv. estándar: {stats['std']:.2f} seg\n"
+            stats_text += f"Media: {stats.mean:.2f} seg\n"
+            stats_text += f"Mediana: {stats.median():.2f} seg\n"
+            stats_text += f"Desv. estándar: {stats.std():.2f} seg\n"
             stats_text += f"Outliers: {len(outliers)}\n"
 
             all_outliers = pd.concat([all_outliers, outliers], ignore_index=True)
 
         # Estadísticas del grupo de comparación
         if len(df_comp_filtrado) > 0:
-            stats_comp = get_descriptive_stats(df_comp_filtrado)
+            stats_comp = get_summary(df_comp_filtrado)
             outliers_comp = detect_outliers(df_comp_filtrado)
             outliers_comp['Grupo'] = 'Comparación'
 
@@ -136,17 +166,16 @@ class StatsPanel:
                 stats_text += "\n"
             stats_text += "🔴 GRUPO COMPARACIÓN:\n"
             stats_text += f"Registros: {len(df_comp_filtrado)}\n"
-            stats_text += f"Media: {stats_comp['mean']:.2f} seg\n"
-            stats_text += f"Mediana: {stats_comp['50%']:.2f} seg\n"
-            stats_text += f"Desv. estándar: {stats_comp['std']:.2f} seg\n"
+            stats_text += f"Media: {stats_comp.mean:.2f} seg\n"
+            stats_text += f"Mediana: {stats_comp.median():.2f} seg\n"
+            stats_text += f"Desv. estándar: {stats_comp.std():.2f} seg\n"
             stats_text += f"Outliers: {len(outliers_comp)}\n"
 
             all_outliers = pd.concat([all_outliers, outliers_comp], ignore_index=True)
 
             # Agregar comparación directa si ambos grupos tienen datos
-            if len(df_filtrado) > 0:
-                stats_principal = get_descriptive_stats(df_filtrado)
-                comparison = calculate_comparison_stats(stats_principal, stats_comp)
+            if stats is not None:
+                comparison = calculate_comparison_stats(stats, stats_comp)
                 if comparison:
                     stats_text += "\n📊 COMPARACIÓN:\n"
                     stats_text += f"Dif. Media: {comparison['media_diff']:+.2f} seg\n"
@@ -158,11 +187,71 @@ class StatsPanel:
 
         self.stats_text.insert(1.0, stats_text)
 
+        # Intervalos bootstrap: grupo principal, cada grupo que lo forma,
+        # comparación y diferencia entre ambos
+        summaries = {}
+        differences = []
+        if stats is not None:
+            summaries[CI_PRINCIPAL] = stats
+            grupos = get_group_summaries(df_filtrado)
+            if len(grupos) > 1:
+                summaries.update({f"   • {grupo}": summary for grupo, summary in grupos.items()})
+        if len(df_comp_filtrado) > 0:
+            summaries[CI_COMPARACION] = stats_comp
+            if stats is not None:
+                differences.append((CI_DIFERENCIA, CI_PRINCIPAL, CI_COMPARACION))
+        self.start_bootstrap(summaries, differences)
+
         # Actualizar tabla de outliers (combinando ambos grupos)
         self.update_outliers_table(all_outliers)
 
         # Actualizar análisis de agentes (combinando ambos grupos)
-        self.update_agents_analysis(all_outliers)
+        self.update_agents_analysis(all_outliers, agent_rates)
+
+    def start_bootstrap(self, summaries, differences=()):
+        """Lanzar el cálculo de los intervalos bootstrap y mostrarlos a medida que terminan"""
+        if self._bootstrap_after_id is not None:
+            self.frame.after_cancel(self._bootstrap_after_id)
+            self._bootstrap_after_id = None
+
+        self.ci_text.delete(1.0, tk.END)
+        if not summaries:
+            self.bootstrap.cancel()
+            self.ci_label.configure(text="Intervalos de confianza (bootstrap):")
+            return
+
+        self.ci_label.configure(text=f"Intervalos de confianza {self.bootstrap.confidence:.0%} "
+                                     f"(bootstrap, {self.bootstrap.n_resamples} remuestreos) ⏳")
+        self.bootstrap.start(summaries, differences)
+        self._bootstrap_after_id = self.frame.after(BOOTSTRAP_POLL_MS, self._poll_bootstrap)
+
+    def _poll_bootstrap(self):
+        """Agregar al panel los intervalos terminados (corre en el hilo de Tk)"""
+        self._bootstrap_after_id = None
+        try:
+            finished = self.bootstrap.poll()
+        except Exception as e:
+            self.bootstrap.cancel()
+            self.ci_text.insert(tk.END, f"❌ Error en el bootstrap: {e}\n")
+            return
+
+        for name, estimates, interval in finished:
+            self.ci_text.insert(tk.END, f"{name}:\n")
+            for column, statistic in enumerate(BOOTSTRAP_STATISTICS):
+                self.ci_text.insert(tk.END, f"  {statistic}: {estimates[column]:.1f} "
+                                            f"[{interval[0, column]:.1f}, {interval[1, column]:.1f}]\n")
+
+        if self.bootstrap.running():
+            self._bootstrap_after_id = self.frame.after(BOOTSTRAP_POLL_MS, self._poll_bootstrap)
+        else:
+            self.ci_label.configure(text=self.ci_label.cget('text').replace(' ⏳', ''))
+
+    def close(self):
+        """Cancelar los cálculos pendientes y cerrar el pool de procesos"""
+        if self._bootstrap_after_id is not None:
+            self.frame.after_cancel(self._bootstrap_after_id)
+            self._bootstrap_after_id = None
+        self.bootstrap.shutdown()
 
     def update_outliers_table(self, outliers_df):
         """Actualizar la tabla de outliers"""
@@ -208,7 +297,7 @@ class StatsPanel:
             )
             self.outliers_tree.insert('', tk.END, values=values)
 
-    def update_agents_analysis(self, outliers_df):
+    def update_agents_analysis(self, outliers_df, agent_rates=None):
         """Actualizar el análisis de agentes con value_counts"""
         import sys
         import os
@@ -220,10 +309,10 @@ class StatsPanel:
         for item in self.agents_tree.get_children():
             self.agents_tree.delete(item)
 
-        agents_data = analyze_outliers_by_agent(outliers_df)
+        agents_data = analyze_outliers_by_agent(outliers_df, agent_rates)
 
         if not agents_data:
-            self.agents_tree.insert('', tk.END, values=('Sin datos', '0', '0%'))
+            self.agents_tree.insert('', tk.END, values=('Sin datos', '0', '0%', ''))
             self.current_agents_data = []
             return
 
@@ -313,6 +402,8 @@ class StatsPanel:
             sorted_data = sorted(self.current_agents_data, key=lambda x: int(x[1]), reverse=self.agents_sort_reverse)
         elif column == 'Porcentaje':
             sorted_data = sorted(self.current_agents_data, key=lambda x: float(x[2].replace('%', '')), reverse=self.agents_sort_reverse)
+        elif column == 'Tasa':
+            sorted_data = sorted(self.current_agents_data, key=lambda x: float(x[3].replace('%', '') or 0), reverse=self.agents_sort_reverse)
 
         # Actualizar los encabezados
         self.update_agents_column_headers()
@@ -329,7 +420,8 @@ class StatsPanel:
         headers = {
             'Agente': 'Agente',
             'Cantidad': 'Outliers',
-            'Porcentaje': '%'
+            'Porcentaje': '%',
+            'Tasa': 'Tasa'
         }
 
         for col, base_text in headers.items():
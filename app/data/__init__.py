@@ -0,0 +1,3 @@
+"""
+Carga, caché y procesamiento de datos
+"""
@@ -0,0 +1,188 @@
+"""
+Benchmarks de las etapas de datos
+
+Uso:
+    python -m app.data.benchmark turno_grupo [--rows N] [--rowwise-rows N]
+    python -m app.data.benchmark backends [--rows N [N ...]] [--queries N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.data.config import GRUPOS_AGENTES
+from app.data.filter_index import build_filter_index
+from app.data.pipeline import AGENTE_A_GRUPO, assign_grupo, assign_turno
+from app.data.expressions import build_filter_expression
+from app.data.processor import _filter_by_expression
+from app.data.sqlite_backend import SQLiteStore
+
+
+def _asignar_turno_fila(fecha):
+    """Versión fila a fila del notebook (referencia para el benchmark)"""
+    hora = fecha.time()
+    if pd.to_datetime('09:50:00').time() <= hora <= pd.to_datetime('15:30:00').time():
+        return 'TM'
+    elif pd.to_datetime('15:30:00').time() < hora <= pd.to_datetime('21:10:00').time():
+        return 'TT'
+    else:
+        return 'fuera de turno'
+
+
+def _asignar_grupo_fila(nombre):
+    """Versión fila a fila del notebook (referencia para el benchmark)"""
+    for grupo, lista in GRUPOS_AGENTES.items():
+        if nombre in lista:
+            return grupo
+    return 'sin grupo'
+
+
+def make_synthetic_day(n_rows, seed=0):
+    """Generar un día sintético de llamadas (Inicio y Nombre Agente)"""
+    rng = np.random.default_rng(seed)
+    agentes = [agente for lista in GRUPOS_AGENTES.values() for agente in lista] + ['MZA 999']
+    inicio = pd.Timestamp('2025-09-19') + pd.to_timedelta(rng.integers(0, 86400, n_rows), unit='s')
+    return pd.DataFrame({
+        'Inicio': inicio,
+        'Nombre Agente': rng.choice(agentes, n_rows),
+    })
+
+
+def make_synthetic_calls(n_rows, n_days=90, seed=0):
+    """Generar un dataset procesado sintético (compacto) de n_rows llamadas"""
+    rng = np.random.default_rng(seed)
+    agentes = list(AGENTE_A_GRUPO)
+    codigos_agente = rng.integers(0, len(agentes), n_rows)
+    grupos = sorted(set(AGENTE_A_GRUPO.values()))
+    codigos_grupo = np.array([grupos.index(AGENTE_A_GRUPO[agente]) for agente in agentes])[codigos_agente]
+    tipificaciones = ['Cae Muda o Cortada', 'Llamada Completa', 'No Contesta', 'No Interesa',
+                      'Venta', 'Volver a Llamar']
+    segundos = rng.integers(9 * 3600 + 50 * 60, 21 * 3600 + 10 * 60, n_rows)
+
+    return pd.DataFrame({
+        'Inicio': pd.Timestamp('2025-07-01') + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit='D')
+        + pd.to_timedelta(segundos, unit='s'),
+        'Nombre Agente': pd.Categorical.from_codes(codigos_agente, agentes),
+        'Tipificación': pd.Categorical.from_codes(rng.integers(0, len(tipificaciones), n_rows), tipificaciones),
+        'TalkingTime': rng.exponential(scale=40, size=n_rows).round().astype(np.int16),
+        'Sentido': pd.Categorical.from_codes(rng.integers(0, 2, n_rows), ['Discador', 'Manual']),
+        'Turno': pd.Categorical.from_codes((segundos > 15 * 3600 + 30 * 60).astype(np.int8), ['TM', 'TT']),
+        'grupo': pd.Categorical.from_codes(codigos_grupo, grupos),
+    })
+
+
+def _random_filters(n_queries, seed=1):
+    """Combinaciones de filtros como las que genera la interfaz"""
+    rng = np.random.default_rng(seed)
+    grupos = list(GRUPOS_AGENTES)
+    tipificaciones = ['Cae Muda o Cortada', 'Llamada Completa', 'No Contesta', 'Venta']
+    for _ in range(n_queries):
+        seleccion = list(rng.choice(grupos, rng.integers(1, 4), replace=False))
+        yield seleccion, str(rng.choice(tipificaciones)), str(rng.choice(['TM', 'TT']))
+
+
+def filter_data(df, grupos_filtrados, tipificacion_filtrada, turno_filtrado):
+    """filter_data sin la caché de resultados: interesa el costo de resolver cada filtro"""
+    return _filter_by_expression(df, build_filter_expression(grupos_filtrados, tipificacion_filtrada,
+                                                             turno_filtrado))
+
+
+def _timeit(func, *args):
+    inicio = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - inicio
+
+
+def bench_turno_grupo(n_rows, rowwise_rows=10_000):
+    """Comparar asignación de turno y grupo fila a fila vs vectorizada
+
+    La versión vectorizada se mide sobre el día completo. La fila a fila del
+    notebook tarda minutos sobre un millón de filas, así que se mide sobre
+    las primeras rowwise_rows filas y se extrapola linealmente.
+    """
+    df = make_synthetic_day(n_rows)
+    muestra = df.head(min(rowwise_rows, n_rows))
+    escala = n_rows / len(muestra)
+    print(f"Día sintético: {n_rows} filas (fila a fila medido sobre {len(muestra)} y extrapolado)")
+
+    turno_fila, t_turno_fila = _timeit(lambda: muestra['Inicio'].apply(_asignar_turno_fila))
+    turno_vec, t_turno_vec = _timeit(assign_turno, df['Inicio'])
+    grupo_fila, t_grupo_fila = _timeit(lambda: muestra['Nombre Agente'].apply(_asignar_grupo_fila))
+    grupo_vec, t_grupo_vec = _timeit(assign_grupo, df['Nombre Agente'])
+
+    n = len(muestra)
+    assert (turno_fila.to_numpy() == turno_vec.to_numpy()[:n]).all(), "Turno vectorizado no coincide"
+    assert (grupo_fila.to_numpy() == grupo_vec.to_numpy()[:n]).all(), "Grupo vectorizado no coincide"
+
+    t_turno_fila *= escala
+    t_grupo_fila *= escala
+    print(f"Turno  fila a fila: {t_turno_fila:8.3f} s | vectorizado: {t_turno_vec:8.3f} s "
+          f"| x{t_turno_fila / t_turno_vec:.0f}")
+    print(f"Grupo  fila a fila: {t_grupo_fila:8.3f} s | Series.map:  {t_grupo_vec:8.3f} s "
+          f"| x{t_grupo_fila / t_grupo_vec:.0f}")
+
+
+def bench_backends(sizes, n_queries=20):
+    """Comparar filtrado en memoria (recorrido completo y con índice de bitmaps) vs SQLite indexado"""
+    for n_rows in sizes:
+        df, t_gen = _timeit(make_synthetic_calls, n_rows)
+        print(f"\n{n_rows} filas (generadas en {t_gen:.1f} s, "
+              f"{df.memory_usage(deep=True).sum() / 1024 ** 2:.0f} MB en memoria)")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store, t_build = _timeit(SQLiteStore.from_dataframe, df, os.path.join(tmp_dir, 'bench.sqlite'))
+            print(f"Construcción SQLite: {t_build:.1f} s")
+
+            filtros = list(_random_filters(n_queries))
+            t_mem = t_sql = 0.0
+            filas = 0
+            for grupos, tipificacion, turno in filtros:
+                resultado_mem, t = _timeit(filter_data, df, grupos, tipificacion, turno)
+                t_mem += t
+                resultado_sql, t = _timeit(filter_data, store, grupos, tipificacion, turno)
+                t_sql += t
+                assert len(resultado_mem) == len(resultado_sql), "Los backends devuelven filas distintas"
+                filas += len(resultado_mem)
+            store.close()
+
+        index, t_index = _timeit(build_filter_index, df)
+        print(f"Construcción índice de filtros: {t_index:.2f} s ({index.memory_usage() / 1024 ** 2:.1f} MB)")
+        t_idx = 0.0
+        for grupos, tipificacion, turno in filtros:
+            _, t = _timeit(filter_data, df, grupos, tipificacion, turno)
+            t_idx += t
+
+        print(f"{n_queries} filtros, {filas // n_queries} filas promedio por resultado")
+        print(f"Memoria: {1000 * t_mem / n_queries:8.1f} ms/filtro | "
+              f"Índice: {1000 * t_idx / n_queries:8.1f} ms/filtro | "
+              f"SQLite: {1000 * t_sql / n_queries:8.1f} ms/filtro")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las etapas de datos")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    turno_grupo = subparsers.add_parser('turno_grupo', help="Asignación de turno y grupo")
+    turno_grupo.add_argument('--rows', type=int, default=1_000_000)
+    turno_grupo.add_argument('--rowwise-rows', type=int, default=10_000,
+                             help="Filas sobre las que se mide la versión fila a fila")
+
+    backends = subparsers.add_parser('backends', help="Filtrado en memoria vs SQLite")
+    backends.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    backends.add_argument('--queries', type=int, default=20)
+
+    args = parser.parse_args(argv)
+    if args.benchmark == 'turno_grupo':
+        bench_turno_grupo(args.rows, args.rowwise_rows)
+    elif args.benchmark == 'backends':
+        bench_backends(args.rows, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Intervalos de confianza bootstrap para media, mediana y percentiles altos
+
+Como TalkingTime son segundos enteros (pocos valores distintos), remuestrear
+n llamadas con reposición equivale a sortear cuántas veces sale cada valor
+distinto: un vector multinomial(n, frecuencias). Un lote de remuestreos es
+una matriz (remuestreos × valores distintos) generada de una sola vez con
+NumPy, y los estadísticos de cada remuestreo salen de productos y sumas
+acumuladas por fila, sin importar cuántas llamadas tenga el grupo.
+
+Los lotes se reparten en un pool de procesos. BootstrapRunner no bloquea a
+quien lo usa: start() encola los lotes y poll() entrega cada intervalo
+apenas terminan los lotes de su grupo.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.data.config import BOOTSTRAP_CONFIDENCE, BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED, BOOTSTRAP_WORKERS
+from app.data.stats import interpolate_quantile, quantile_ranks
+
+# Estadísticos calculados: nombre -> cuantil (None = media)
+BOOTSTRAP_STATISTICS = {'Media': None, 'Mediana': 0.5, 'P90': 0.9, 'P95': 0.95}
+
+# Máximo de celdas de la matriz de un lote (acota la memoria de cada proceso)
+MAX_BATCH_CELLS = 2_000_000
+
+
+def _support(summary):
+    """Valores distintos y sus cantidades a partir de un StatsSummary"""
+    if summary.sketch is not None:
+        values = np.flatnonzero(summary.sketch)
+        return values.astype(np.float64), summary.sketch[values]
+    values, counts = np.unique(summary.values, return_counts=True)
+    return values.astype(np.float64), counts
+
+
+def point_estimates(summary):
+    """Estimaciones puntuales de BOOTSTRAP_STATISTICS"""
+    qs = [q for q in BOOTSTRAP_STATISTICS.values() if q is not None]
+    return np.concatenate([[summary.mean], summary.quantile(qs)])
+
+
+def resample_statistics(values, counts, n_resamples, seed):
+    """Estadísticos de n_resamples remuestreos bootstrap (matriz remuestreos × BOOTSTRAP_STATISTICS)
+
+    Se ejecuta en los procesos de trabajo: solo recibe arrays y la semilla.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(counts.sum())
+    draws = rng.multinomial(n, counts / n, size=n_resamples)
+    cumulative = np.cumsum(draws, axis=1)
+
+    result = np.empty((n_resamples, len(BOOTSTRAP_STATISTICS)))
+    for column, q in enumerate(BOOTSTRAP_STATISTICS.values()):
+        if q is None:
+            result[:, column] = draws @ values / n
+            continue
+        # Cuantil con interpolación lineal: posición del primer acumulado mayor al rango buscado
+        below, above, t = quantile_ranks(n, q)
+        a = values[(cumulative <= below).sum(axis=1)]
+        b = values[(cumulative <= above).sum(axis=1)]
+        result[:, column] = interpolate_quantile(a, b, t)
+    return result
+
+
+def _batch_sizes(n_resamples, n_values):
+    size = max(1, min(n_resamples, MAX_BATCH_CELLS // max(n_values, 1)))
+    return [min(size, n_resamples - start) for start in range(0, n_resamples, size)]
+
+
+def percentile_interval(replicates, confidence=BOOTSTRAP_CONFIDENCE):
+    """Intervalo percentil (inferior, superior) de cada columna de replicates"""
+    alpha = (1 - confidence) / 2
+    return np.quantile(replicates, [alpha, 1 - alpha], axis=0)
+
+
+class BootstrapRunner:
+    """Intervalos bootstrap de varios grupos calculados en un pool de procesos
+
+    start() reparte los lotes y vuelve enseguida; poll() devuelve los
+    intervalos que terminaron desde la llamada anterior. Un start() nuevo
+    cancela lo que quedaba pendiente del anterior.
+    """
+
+    def __init__(self, n_resamples=BOOTSTRAP_RESAMPLES, seed=BOOTSTRAP_SEED,
+                 confidence=BOOTSTRAP_CONFIDENCE, workers=BOOTSTRAP_WORKERS):
+        self.n_resamples = n_resamples
+        self.seed = seed
+        self.confidence = confidence
+        self.workers = workers
+        self._executor = None
+        self._summaries = {}
+        self._pending = {}
+        self._replicates = {}
+        self._differences = []
+
+    def _get_executor(self):
+        # El pool se crea al primer uso y se reutiliza (crear procesos es caro).
+        # Con 'spawn' y no fork: la aplicación tiene otros hilos vivos (cálculo
+        # de gráficos, carga) y un hijo creado con fork puede heredar sus locks tomados
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def start(self, summaries, differences=()):
+        """Encolar los remuestreos de summaries ({nombre: StatsSummary})
+
+        differences es una lista de (nombre, a, b): intervalo de la diferencia
+        b - a entre dos grupos de summaries, con remuestreos independientes.
+        """
+        self.cancel()
+        executor = self._get_executor()
+        self._summaries = dict(summaries)
+        self._differences = list(differences)
+
+        # Semillas independientes por grupo y por lote, reproducibles con la misma semilla
+        group_seeds = np.random.SeedSequence(self.seed).spawn(len(summaries))
+        for (name, summary), group_seed in zip(summaries.items(), group_seeds):
+            values, counts = _support(summary)
+            sizes = _batch_sizes(self.n_resamples, len(values))
+            self._pending[name] = [executor.submit(resample_statistics, values, counts, size, batch_seed)
+                                   for size, batch_seed in zip(sizes, group_seed.spawn(len(sizes)))]
+
+    def poll(self):
+        """Lista de (nombre, estimaciones, intervalo) terminados desde la última llamada
+
+        estimaciones es un array con un valor por estadístico e intervalo un
+        array 2 × estadísticos (inferior, superior).
+        """
+        finished = []
+        for name, futures in list(self._pending.items()):
+            if all(future.done() for future in futures):
+                del self._pending[name]
+                replicates = np.concatenate([future.result() for future in futures])
+                self._replicates[name] = replicates
+                finished.append((name, point_estimates(self._summaries[name]),
+                                 percentile_interval(replicates, self.confidence)))
+
+        for difference in list(self._differences):
+            name, a, b = difference
+            if a in self._replicates and b in self._replicates:
+                self._differences.remove(difference)
+                estimates = point_estimates(self._summaries[b]) - point_estimates(self._summaries[a])
+                replicates = self._replicates[b] - self._replicates[a]
+                finished.append((name, estimates, percentile_interval(replicates, self.confidence)))
+        return finished
+
+    def running(self):
+        """True si quedan intervalos por calcular"""
+        return bool(self._pending or self._differences)
+
+    def cancel(self):
+        """Descartar los lotes pendientes y los resultados anteriores"""
+        for futures in self._pending.values():
+            for future in futures:
+                future.cancel()
+        self._pending = {}
+        self._replicates = {}
+        self._differences = []
+
+    def shutdown(self):
+        """Cerrar el pool de procesos"""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
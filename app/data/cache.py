@@ -0,0 +1,170 @@
+"""
+Caché columnar en disco (NumPy .npz) para el dataset procesado
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CACHE_SUFFIX = '.cache.npz'
+CACHE_VERSION = 5
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_cache_path(csv_path):
+    """Ruta del archivo de caché asociado a un CSV (junto al CSV)"""
+    return os.path.splitext(csv_path)[0] + CACHE_SUFFIX
+
+
+def prefix_digest(f, size):
+    """blake2b de los primeros size bytes de un archivo abierto (se puede seguir actualizando)"""
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = size
+    while remaining > 0:
+        block = f.read(min(HASH_BLOCK_SIZE, remaining))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+    return digest
+
+
+def compute_fingerprint(path):
+    """Calcular huella del archivo fuente: tamaño, mtime y hash del contenido
+
+    El hash cubre exactamente los size bytes registrados, aunque el archivo
+    crezca mientras se lee.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = prefix_digest(f, stat.st_size)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': digest.hexdigest(),
+    }
+
+
+def _datetime_unit(series):
+    """Unidad de una columna de fechas ('ns', 'us', ...)"""
+    return np.datetime_data(series.dtype)[0]
+
+
+def _encode_column(series):
+    """Convertir una columna en arrays tipados (sin pickle)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Enteros en la unidad propia de la columna (la unidad va en la metadata)
+        values = series.to_numpy(dtype=f'datetime64[{_datetime_unit(series)}]').view('int64')
+        return 'datetime', {'values': values}
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categorical = series.cat
+        return 'category', {
+            'codes': categorical.codes.to_numpy().astype(np.int32),
+            'categories': categorical.categories.astype(str).to_numpy(dtype=str),
+        }
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        mask = series.isna().to_numpy()
+        if pd.api.types.is_extension_array_dtype(series.dtype):
+            # Enteros nulables (Int64): valores + máscara de nulos
+            values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            return 'nullable', {'values': values, 'mask': mask, 'dtype': np.array(str(series.dtype))}
+        return 'numeric', {'values': series.to_numpy()}
+
+    # Texto: códigos enteros + diccionario de valores
+    codes, uniques = pd.factorize(series, sort=True)
+    return 'string', {
+        'codes': codes.astype(np.int32),
+        'categories': np.asarray(uniques, dtype=str),
+    }
+
+
+def _decode_column(kind, arrays, unit='ns'):
+    """Reconstruir una columna a partir de sus arrays tipados"""
+    if kind == 'datetime':
+        return arrays['values'].view(f'datetime64[{unit}]')
+    if kind == 'category':
+        return pd.Categorical.from_codes(arrays['codes'], arrays['categories'])
+    if kind == 'nullable':
+        values = pd.Series(arrays['values']).astype(str(arrays['dtype']))
+        return values.mask(arrays['mask']).array
+    if kind == 'numeric':
+        return arrays['values']
+
+    # Texto: -1 en los códigos representa valores nulos
+    codes = arrays['codes']
+    values = arrays['categories'].astype(object)[np.maximum(codes, 0)] if len(arrays['categories']) \
+        else np.full(len(codes), None, dtype=object)
+    values[codes < 0] = None
+    return values
+
+
+def save_cache(df, csv_path, fingerprint=None):
+    """Guardar el DataFrame como caché columnar junto al CSV fuente"""
+    if fingerprint is None:
+        fingerprint = compute_fingerprint(csv_path)
+
+    arrays = {}
+    columns = []
+    for i, column in enumerate(df.columns):
+        kind, parts = _encode_column(df[column])
+        entry = {'name': column, 'kind': kind}
+        if kind == 'datetime':
+            # Misma unidad que una lectura fresca del CSV (datetime64[us])
+            entry['unit'] = _datetime_unit(df[column])
+        columns.append(entry)
+        for part, values in parts.items():
+            arrays[f'c{i}_{part}'] = values
+
+    meta = {'version': CACHE_VERSION, 'fingerprint': fingerprint, 'columns': columns, 'rows': len(df)}
+    arrays['meta'] = np.array(json.dumps(meta))
+
+    # Escritura atómica para no dejar cachés a medio escribir
+    cache_path = get_cache_path(csv_path)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def load_cache(csv_path, fingerprint=None):
+    """Cargar la caché si sigue siendo válida para el CSV fuente
+
+    Devuelve (DataFrame, huella) o (None, None) si no existe caché o si la
+    huella del CSV (tamaño, mtime y hash del contenido) ya no coincide con
+    la guardada. El contenido solo se hashea si el tamaño y el mtime
+    coinciden.
+    """
+    cache_path = get_cache_path(csv_path)
+    if not os.path.exists(cache_path):
+        return None, None
+
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz['meta']))
+            if meta.get('version') != CACHE_VERSION:
+                return None, None
+
+            # Descartar rápido si cambió el tamaño o el mtime: el hash solo se calcula si coinciden
+            stored = meta['fingerprint']
+            stat = os.stat(csv_path)
+            if stat.st_size != stored['size'] or stat.st_mtime_ns != stored['mtime_ns']:
+                return None, None
+            if fingerprint is None:
+                fingerprint = compute_fingerprint(csv_path)
+            if fingerprint != stored:
+                return None, None
+
+            data = {}
+            for i, column in enumerate(meta['columns']):
+                prefix = f'c{i}_'
+                arrays = {key[len(prefix):]: npz[key] for key in npz.files if key.startswith(prefix)}
+                data[column['name']] = _decode_column(column['kind'], arrays, column.get('unit', 'ns'))
+        return pd.DataFrame(data, columns=[c['name'] for c in meta['columns']]), stored
+    except Exception as e:
+        print(f"⚠️ Caché inválida, se reconstruirá: {e}")
+        return None, None
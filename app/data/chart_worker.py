@@ -0,0 +1,100 @@
+"""
+Cálculo de los datos de los gráficos en un hilo de trabajo
+
+El hilo de Tk solo dibuja: submit() deja el pedido (una función y una foto
+de los filtros) para el hilo de cálculo y vuelve enseguida, y quien lo usa
+revisa con poll() (desde root.after) si ya está el resultado.
+
+Cada pedido lleva un número de generación. Un pedido nuevo reemplaza al que
+todavía no empezó (nunca se calcula) y el resultado de uno que ya estaba en
+curso se descarta al terminar, así que varios clics seguidos no encolan
+varias actualizaciones completas ni dibujan resultados viejos.
+
+Es un hilo y no un proceso porque los índices, celdas y cubos de datos
+viven en la memoria del proceso: copiarlos a otro proceso en cada pedido
+costaría más que el cálculo.
+"""
+import threading
+
+
+class ChartWorker:
+    """Hilo de cálculo con un solo pedido vigente (el de la última generación)"""
+
+    def __init__(self):
+        self.generation = 0
+        self._condition = threading.Condition()
+        self._request = None   # (generación, func, args) que todavía no empezó
+        self._busy = False     # Hay un cálculo en curso (vigente o no)
+        self._result = None    # (generación, 'done'/'error', valor) sin entregar
+        self._closed = False
+        self._thread = None
+
+    def submit(self, func, *args):
+        """Pedir func(*args) en el hilo de cálculo; devuelve la generación del pedido"""
+        with self._condition:
+            self.generation += 1
+            self._request = (self.generation, func, args)
+            self._result = None
+            self._condition.notify_all()
+
+        # El hilo se crea con el primer pedido y se reutiliza
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self.generation
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, func, args = self._request
+                self._request = None
+                self._busy = True
+
+            try:
+                result = (generation, 'done', func(*args))
+            except Exception as e:
+                result = (generation, 'error', e)
+
+            with self._condition:
+                self._busy = False
+                # Si llegó otro pedido mientras tanto, este resultado ya no sirve
+                if generation == self.generation:
+                    self._result = result
+                self._condition.notify_all()
+
+    def poll(self):
+        """('done', resultado) o ('error', excepción) del pedido vigente si terminó, o None"""
+        with self._condition:
+            result, self._result = self._result, None
+        if result is None or result[0] != self.generation:
+            return None
+        return result[1:]
+
+    def running(self):
+        """True si hay un cálculo en curso o un resultado sin entregar"""
+        with self._condition:
+            return self._request is not None or self._busy or self._result is not None
+
+    def cancel(self):
+        """Descartar el pedido pendiente y el resultado del que está en curso"""
+        with self._condition:
+            self.generation += 1
+            self._request = None
+            self._result = None
+
+    def wait_idle(self):
+        """Esperar a que termine el cálculo en curso (para no modificar los datos mientras se leen)"""
+        with self._condition:
+            while self._busy:
+                self._condition.wait()
+
+    def shutdown(self):
+        """Descartar lo pendiente y terminar el hilo (no espera al cálculo en curso)"""
+        with self._condition:
+            self.cancel()
+            self._closed = True
+            self._condition.notify_all()
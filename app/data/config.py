@@ -0,0 +1,93 @@
+"""
+Configuración de rutas y grupos de agentes
+"""
+import os
+
+# Directorios del proyecto
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+RAW_DIR = os.path.join(DATA_DIR, 'raw')
+PROCESS_DIR = os.path.join(DATA_DIR, 'process')
+PROCESSED_CSV = os.path.join(PROCESS_DIR, 'llamadas_procesadas.csv')
+
+# Formato de los CSV (reportes de Mitrol y dataset procesado)
+CSV_SEP = ';'
+CSV_ENCODING = 'utf-8'
+
+# Agentes de cada equipo (organizados por supervisor)
+GRUPOS_AGENTES = {
+    'ap_connection': ['MZA 94', 'MZA 95', 'MZA 96', 'MZA 97', 'MZA 98'],
+    'byl': ['MZA 307', 'MZA 308', 'MZA 309', 'MZA 310', 'MZA 99', 'MZA 100', 'MZA 301', 'MZA 302',
+            'MZA 303', 'MZA 304', 'MZA 305'],
+    'capa': ['MZA 72', 'MZA 73', 'MZA 74', 'MZA 75', 'MZA 76', 'MZA 77', 'MZA 78', 'MZA 79', 'MZA 80',
+             'MZA 81', 'MZA 82', 'MZA 83'],
+    'diana': ['MZA Sup2', 'MZA 46', 'MZA 47', 'MZA 48', 'MZA 49', 'MZA 50', 'MZA 51', 'MZA Sup5', 'MZA 52',
+              'MZA 53', 'MZA 54', 'MZA 55', 'MZA 56', 'MZA 57', 'MZA 58', 'MZA 59', 'MZA 60', 'MZA 61',
+              'MZA 62', 'MZA 63', 'MZA 64', 'MZA 65', 'MZA 66', 'MZA 67', 'MZA 68', 'MZA 69', 'MZA 70',
+              'MZA 71', 'MZA 84', 'MZA 85', 'MZA 86', 'MZA 87', 'MZA 88', 'MZA 89', 'MZA 90', 'MZA 91',
+              'MZA 92', 'MZA 93'],
+    'josefina_marcos': ['MZA 31', 'MZA 32', 'MZA 33', 'MZA 34', 'MZA 35', 'MZA 36', 'MZA 37', 'MZA 38',
+                        'MZA 39', 'MZA 40', 'MZA 41', 'MZA 42', 'MZA 43', 'MZA 44', 'MZA 45'],
+    'melanie_naty': ['MZA 1', 'MZA 2', 'MZA 3', 'MZA 4', 'MZA 5', 'MZA 6', 'MZA 7', 'MZA 8', 'MZA 9',
+                     'MZA 10', 'MZA 12', 'MZA 13', 'MZA 14', 'MZA 15'],
+    'yasmin_marina': ['MZA 16', 'MZA 18', 'MZA 19', 'MZA 20', 'MZA 21', 'MZA 22', 'MZA 23', 'MZA 24',
+                      'MZA 25', 'MZA 26', 'MZA 27', 'MZA 28', 'MZA 29', 'MZA 30'],
+    'romi': ['MZA 306', 'MZA 311', 'MZA 312', 'MZA Sup3', 'MZA Sup4'],
+}
+
+# Límites de cada turno (HH:MM:SS, ambos extremos inclusive). Se evalúan en
+# orden y gana el primero que coincide; un turno cuyo fin es anterior a su
+# inicio cruza la medianoche, p. ej. ('TN', '21:10:00', '09:50:00').
+TURNOS = [
+    ('TM', '09:50:00', '15:30:00'),
+    ('TT', '15:30:00', '21:10:00'),
+]
+TURNO_FUERA = 'fuera de turno'
+GRUPO_SIN_ASIGNAR = 'sin grupo'
+
+# Carga por bloques (chunks) para datasets grandes: los CSV de más de
+# CHUNKED_LOAD_THRESHOLD_MB se leen por partes de modo que el texto crudo en
+# memoria nunca supere MEMORY_BUDGET_MB
+CHUNKED_LOAD_THRESHOLD_MB = 200
+MEMORY_BUDGET_MB = 256
+
+# Columnas que usa la aplicación (el resto del CSV se ignora al cargar)
+GUI_COLUMNS = ['Inicio', 'Nombre Agente', 'Tipificación', 'TalkingTime', 'Sentido', 'Turno', 'grupo']
+
+# Columnas enteras derivadas de Inicio que agrega el cargador: hora del día
+# (0 a 23), día de la semana (lunes = 0) y días desde 1970-01-01. Las filas
+# sin Inicio llevan TIME_NAT en las tres.
+TIME_COLUMNS = ['hour', 'weekday', 'day_index']
+TIME_NAT = -1
+
+# Backend de datos: 'memoria' (DataFrame, predeterminado) o 'sqlite' (base
+# indexada junto al CSV, con los filtros resueltos en SQL)
+DATA_BACKEND = 'memoria'
+
+# Caché de resultados de filtros (compartida entre pestañas): se descartan
+# los menos usados al superar la cantidad de entradas o la memoria indicadas
+RESULT_CACHE_MAX_ENTRIES = 64
+RESULT_CACHE_MAX_MB = 256
+
+# Intervalos de confianza bootstrap del panel de estadísticas: cantidad de
+# remuestreos, semilla (None = distinta en cada cálculo), nivel de confianza
+# y procesos de trabajo (None = uno por CPU)
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 12345
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_WORKERS = None
+
+# Detección de outliers de TalkingTime: límites calculados por celda (grupo,
+# Turno, Tipificación) y por agente sobre todo el dataset al cargarlo. Métodos: 'iqr' (cuartiles ±
+# OUTLIER_IQR_FACTOR × IQR), 'mad' (z robusto |0.6745 (x - mediana) / MAD|
+# mayor que OUTLIER_MAD_THRESHOLD) o 'percentil' (fuera de OUTLIER_PERCENTILES)
+OUTLIER_METHOD = 'iqr'
+OUTLIER_IQR_FACTOR = 1.5
+OUTLIER_MAD_THRESHOLD = 3.5
+OUTLIER_PERCENTILES = (0.01, 0.99)
+
+# Series temporales: en modo automático se usa la resolución más fina (hora,
+# día, semana, mes) con hasta TIMESERIES_MAX_PERIODS períodos en el rango
+# visible, y cada curva se reduce a TIMESERIES_MAX_POINTS puntos con LTTB
+TIMESERIES_MAX_PERIODS = 2000
+TIMESERIES_MAX_POINTS = 400
@@ -0,0 +1,478 @@
+"""
+Cubo de datos: grupo × Turno × Tipificación × Sentido × fecha × hora
+
+Al cargar el dataset las filas se agrupan por celda (una combinación de
+grupo, Turno, Tipificación, Sentido y hora de Inicio) y de cada celda se
+guarda la cantidad, la suma y la suma de cuadrados de TalkingTime, además
+de su histograma por segundo (disperso: pares segundo/cantidad). Una
+expresión de filtrado se traduce a una máscara de celdas, y los gráficos se
+responden sumando los totales o histogramas de esas celdas, sin recorrer
+las filas. Solo los listados de outliers vuelven a las filas.
+
+Un segundo cubo, por agente y día y sin histogramas, responde el gráfico
+de rendimiento por agente, y tres cubos más con las mismas dimensiones que
+el principal pero por día, semana y mes guardan los agregados de las series
+temporales. En una recarga incremental las filas nuevas se agrupan junto
+con las celdas existentes.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from app.data.expressions import And, Between, HourWindow, In, Not, Or
+from app.data.registry import IdentityRegistry
+from app.data.stats import StatsSummary, interpolate_quantile, quantile_ranks
+
+CUBE_DIMENSIONS = ['grupo', 'Turno', 'Tipificación', 'Sentido']
+AGENT_DIMENSIONS = ['Nombre Agente'] + CUBE_DIMENSIONS
+
+# Período de las celdas con Inicio nulo (es el entero que NumPy usa para NaT)
+NAT_PERIOD = np.iinfo(np.int64).min
+
+# Cubos de las series temporales por resolución (la horaria es el cubo 'llamadas')
+SERIES_CUBES = {'dia': ('serie_dia', 'D'), 'semana': ('serie_semana', 'W'), 'mes': ('serie_mes', 'M')}
+
+# DataFrame -> {nombre: DataCube}
+_CUBES = IdentityRegistry()
+# Resultado de un filtro -> (cubos, expresión, límite superior, selecciones)
+_SELECTIONS = IdentityRegistry()
+
+
+def period_index(inicio, period):
+    """Número de período de cada fecha (datetime64) contado desde 1970; NaT -> NAT_PERIOD
+
+    period es una unidad de NumPy ('h', 'D', 'M') o 'W': semanas que
+    empiezan el lunes (las semanas de NumPy empiezan el jueves).
+    """
+    if period != 'W':
+        return inicio.astype(f'datetime64[{period}]').astype(np.int64)
+    days = inicio.astype('datetime64[D]').astype(np.int64)
+    # El 1970-01-01 fue jueves: su lunes es 3 días antes
+    return np.where(days == NAT_PERIOD, NAT_PERIOD, (days + 3) // 7)
+
+
+def period_start(periods, period):
+    """Comienzo (datetime64[ns]) de cada período de period_index; NAT_PERIOD -> NaT"""
+    valid = periods != NAT_PERIOD
+    if period == 'W':
+        days = np.where(valid, np.where(valid, periods, 0) * 7 - 3, NAT_PERIOD)
+        return days.astype('datetime64[D]').astype('datetime64[ns]')
+    return periods.astype(f'datetime64[{period}]').astype('datetime64[ns]')
+
+
+class DataCube:
+    """Cantidad, suma, suma de cuadrados e histograma de TalkingTime por celda
+
+    Las celdas son las combinaciones presentes de las dimensiones y del
+    período de Inicio ('h' = hora, 'D' = día, 'W' = semana, 'M' = mes).
+    """
+
+    def __init__(self, dimensions, period='h', histograms=True):
+        self.dimensions = list(dimensions)
+        self.period = period
+        self.histograms = histograms
+        self.rows = 0
+        # Resolución de Inicio en ns (para saber si una celda queda entera dentro de un rango)
+        self.tick_ns = 1
+        self.categories = {column: [] for column in self.dimensions}
+        self._lookup = {column: {} for column in self.dimensions}
+
+        self.codes = {column: np.zeros(0, dtype=np.int32) for column in self.dimensions}
+        self.periods = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0, dtype=np.float64)
+        self.total_sq = np.zeros(0, dtype=np.float64)
+        # Histogramas dispersos ordenados por celda: la celda hist_cell[i] tiene
+        # hist_count[i] llamadas de hist_second[i] segundos
+        self.hist_cell = np.zeros(0, dtype=np.int64)
+        self.hist_second = np.zeros(0, dtype=np.int64)
+        self.hist_count = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.count)
+
+    def _global_codes(self, column, values):
+        """Códigos de values en las categorías del cubo (-1 = nulo)"""
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        local = [str(category) for category in values.cat.categories]
+        lookup, categories = self._lookup[column], self.categories[column]
+        for value in local:
+            if value not in lookup:
+                lookup[value] = len(categories)
+                categories.append(value)
+        # El último elemento atiende el código -1 (nulo) de pandas
+        mapping = np.array([lookup[value] for value in local] + [-1], dtype=np.int32)
+        return mapping[values.cat.codes.to_numpy()]
+
+    def copy(self):
+        """Copia que se puede extender sin modificar este cubo (los arrays se reemplazan, no se modifican)"""
+        cube = copy.copy(self)
+        cube.categories = {column: list(values) for column, values in self.categories.items()}
+        cube._lookup = {column: dict(lookup) for column, lookup in self._lookup.items()}
+        cube.codes = dict(self.codes)
+        return cube
+
+    def extend(self, df_new):
+        """Agregar filas nuevas: entran como celdas de una fila y se agrupan con las existentes"""
+        n = len(df_new)
+        if n == 0:
+            return
+        codes = {column: self._global_codes(column, df_new[column]) for column in self.dimensions}
+        inicio = df_new['Inicio'].to_numpy()
+        self.tick_ns = int(np.timedelta64(1, np.datetime_data(inicio.dtype)[0]) // np.timedelta64(1, 'ns'))
+        periods = period_index(inicio, self.period)
+        seconds = df_new['TalkingTime'].to_numpy().astype(np.int64)
+
+        first_new = len(self)
+        self._group(
+            {column: np.concatenate([self.codes[column], codes[column]]) for column in self.dimensions},
+            np.concatenate([self.periods, periods]),
+            np.concatenate([self.count, np.ones(n, dtype=np.int64)]),
+            np.concatenate([self.total, seconds.astype(np.float64)]),
+            np.concatenate([self.total_sq, np.square(seconds.astype(np.float64))]),
+            np.concatenate([self.hist_cell, first_new + np.arange(n)]),
+            np.concatenate([self.hist_second, seconds]),
+            np.concatenate([self.hist_count, np.ones(n, dtype=np.int64)]),
+        )
+        self.rows += n
+
+    def _group(self, codes, periods, count, total, total_sq, hist_cell, hist_second, hist_count):
+        """Agrupar celdas con la misma clave sumando sus totales e histogramas"""
+        # Clave entera por celda en base mixta: cada dimensión con sus valores más el nulo
+        key = np.zeros(len(periods), dtype=np.int64)
+        for column in self.dimensions:
+            key = key * (len(self.categories[column]) + 1) + (codes[column] + 1)
+        valid = periods != NAT_PERIOD
+        base = int(periods[valid].min()) if valid.any() else 0
+        span = int(periods[valid].max()) - base + 2 if valid.any() else 1
+        key = key * span + np.where(valid, periods - base + 1, 0)
+
+        unique, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        n_cells = len(unique)
+        self.codes = {column: codes[column][first] for column in self.dimensions}
+        self.periods = periods[first]
+        self.count = np.bincount(inverse, weights=count, minlength=n_cells).astype(np.int64)
+        self.total = np.bincount(inverse, weights=total, minlength=n_cells)
+        self.total_sq = np.bincount(inverse, weights=total_sq, minlength=n_cells)
+
+        if self.histograms:
+            width = int(hist_second.max()) + 1 if len(hist_second) else 1
+            hist_key, hist_inverse = np.unique(inverse[hist_cell] * width + hist_second, return_inverse=True)
+            self.hist_count = np.bincount(hist_inverse, weights=hist_count).astype(np.int64)
+            self.hist_cell = hist_key // width
+            self.hist_second = hist_key % width
+
+    def key_values(self, name):
+        """Valor entero por celda de una dimensión o de una clave de Inicio
+
+        Las claves de Inicio son 'periodo' (el período del cubo, ver
+        period_index), 'fecha' (días desde 1970), 'semana' y 'mes' (como
+        period_index), 'hora' y 'dia_semana' (0 = lunes). Las celdas sin valor (nulos, Inicio vacío) tienen -1.
+        Devuelve None si el cubo no tiene esa clave.
+        """
+        if name in self.codes:
+            return self.codes[name]
+        valid = self.periods != NAT_PERIOD
+        if name == 'periodo':
+            return np.where(valid, self.periods, -1)
+        if self.period not in ('h', 'D'):
+            return None
+        days = self.periods // 24 if self.period == 'h' else self.periods
+        if name == 'fecha':
+            return np.where(valid, days, -1)
+        if name in ('semana', 'mes'):
+            period = 'W' if name == 'semana' else 'M'
+            return np.where(valid, period_index(np.where(valid, days, 0).astype('datetime64[D]'), period), -1)
+        if name == 'dia_semana':
+            # El 1970-01-01 fue jueves
+            return np.where(valid, (days + 3) % 7, -1)
+        if name == 'hora' and self.period == 'h':
+            return np.where(valid, self.periods % 24, -1)
+        return None
+
+    def decode(self, name, values):
+        """Convertir valores enteros de key_values a etiquetas legibles"""
+        if name in self.categories:
+            return np.array(self.categories[name], dtype=object)[values]
+        if name == 'fecha':
+            return pd.to_datetime(values, unit='D')
+        if name in ('periodo', 'semana', 'mes'):
+            period = {'periodo': self.period, 'semana': 'W', 'mes': 'M'}[name]
+            return pd.to_datetime(period_start(np.asarray(values, dtype=np.int64), period))
+        return values
+
+    def cell_mask(self, expr):
+        """Máscara de celdas que cumplen expr, o None si el cubo no puede resolverla
+
+        No se puede cuando la expresión usa columnas que no son dimensiones o
+        cuando algún rango de fechas corta una celda por la mitad.
+        """
+        if isinstance(expr, In):
+            if expr.column not in self.codes:
+                return None
+            lookup = self._lookup[expr.column]
+            return np.isin(self.codes[expr.column], [lookup[value] for value in expr.values if value in lookup])
+        if isinstance(expr, Between):
+            return self._inicio_mask(expr.inferior, expr.superior) if expr.column == 'Inicio' else None
+        if isinstance(expr, HourWindow):
+            hours = self.key_values('hora')
+            return None if hours is None else np.isin(hours, expr.hours())
+        if isinstance(expr, (And, Or)):
+            masks = [self.cell_mask(child) for child in expr.children]
+            if any(mask is None for mask in masks):
+                return None
+            if isinstance(expr, And):
+                return np.logical_and.reduce(masks) if masks else np.ones(len(self), dtype=bool)
+            return np.logical_or.reduce(masks) if masks else np.zeros(len(self), dtype=bool)
+        if isinstance(expr, Not):
+            mask = self.cell_mask(expr.child)
+            return None if mask is None else ~mask
+        return None
+
+    def _inicio_mask(self, inferior, superior):
+        valid = self.periods != NAT_PERIOD
+        periods = np.where(valid, self.periods, 0)
+        start = period_start(periods, self.period).astype(np.int64)
+        last = period_start(periods + 1, self.period).astype(np.int64) - self.tick_ns
+        inside, outside = valid.copy(), ~valid
+        if inferior is not None:
+            inside &= start >= inferior.value
+            outside |= last < inferior.value
+        if superior is not None:
+            inside &= last <= superior.value
+            outside |= start > superior.value
+        if (~inside & ~outside).any():
+            return None
+        return inside
+
+    def memory_usage(self):
+        """Bytes ocupados por las celdas y los histogramas"""
+        arrays = [self.periods, self.count, self.total, self.total_sq,
+                  self.hist_cell, self.hist_second, self.hist_count, *self.codes.values()]
+        return sum(array.nbytes for array in arrays)
+
+
+class CubeSelection:
+    """Celdas de un cubo que forman una selección, con TalkingTime <= limite_sup"""
+
+    def __init__(self, cube, mask, limite_sup=None):
+        self.cube = cube
+        self.mask = mask
+        self.limite_sup = limite_sup
+        # Filas del cubo al calcular la máscara (si el cubo se extiende, las celdas cambian)
+        self.rows = cube.rows
+
+    def _entries(self):
+        """Posiciones de los histogramas que pertenecen a la selección"""
+        cube = self.cube
+        entries = self.mask[cube.hist_cell]
+        if self.limite_sup is not None:
+            entries &= cube.hist_second <= self.limite_sup
+        return np.flatnonzero(entries)
+
+    def cell_totals(self):
+        """(celdas, cantidad, suma, suma de cuadrados) de las celdas seleccionadas, o None
+
+        Con límite superior los totales salen de los histogramas; si el cubo
+        no los tiene, devuelve None.
+        """
+        cube = self.cube
+        cells = np.flatnonzero(self.mask)
+        if self.limite_sup is None:
+            return cells, cube.count[cells], cube.total[cells], cube.total_sq[cells]
+        if not cube.histograms:
+            return None
+        entries = self._entries()
+        owner = cube.hist_cell[entries]
+        weights = cube.hist_count[entries]
+        seconds = cube.hist_second[entries].astype(np.float64)
+        count = np.bincount(owner, weights=weights, minlength=len(cube))[cells].astype(np.int64)
+        total = np.bincount(owner, weights=weights * seconds, minlength=len(cube))[cells]
+        total_sq = np.bincount(owner, weights=weights * np.square(seconds), minlength=len(cube))[cells]
+        return cells, count, total, total_sq
+
+    def count(self):
+        """Cantidad de llamadas seleccionadas"""
+        if self.limite_sup is None:
+            return int(self.cube.count[self.mask].sum())
+        totals = self.cell_totals()
+        return None if totals is None else int(totals[1].sum())
+
+    def histogram(self):
+        """Histograma por segundo de TalkingTime de la selección, o None si el cubo no tiene histogramas"""
+        if not self.cube.histograms:
+            return None
+        entries = self._entries()
+        return np.bincount(self.cube.hist_second[entries],
+                           weights=self.cube.hist_count[entries]).astype(np.int64)
+
+    def summary(self):
+        """StatsSummary de la selección, o None si el cubo no tiene histogramas"""
+        hist = self.histogram()
+        return None if hist is None else StatsSummary.from_histogram(hist)
+
+    def split(self, dimension):
+        """{valor: CubeSelection} con la selección separada por una dimensión del cubo"""
+        codes = self.cube.codes[dimension]
+        parts = {}
+        for code, value in enumerate(self.cube.categories[dimension]):
+            mask = self.mask & (codes == code)
+            if mask.any():
+                parts[value] = CubeSelection(self.cube, mask, self.limite_sup)
+        return parts
+
+    def group_stats(self, by, quantiles=()):
+        """count, sum y mean de TalkingTime (y los cuantiles pedidos) por cada combinación de claves
+
+        by son nombres aceptados por DataCube.key_values; las celdas sin valor
+        en alguna clave se descartan (como en groupby). Los cuantiles quedan
+        en columnas con el valor de q como nombre. Devuelve None si el cubo
+        no puede responder.
+        """
+        cube = self.cube
+        keys = [cube.key_values(name) for name in by]
+        totals = self.cell_totals()
+        if totals is None or any(values is None for values in keys) or (quantiles and not cube.histograms):
+            return None
+
+        cells, count, total, _ = totals
+        keep = count > 0
+        for values in keys:
+            keep &= values[cells] >= 0
+        cells, count, total = cells[keep], count[keep], total[keep]
+
+        # Clave combinada por celda en base mixta y grupos con np.unique
+        combined = np.zeros(len(cells), dtype=np.int64)
+        for values in keys:
+            combined = combined * (int(values.max()) + 1 if len(values) else 1) + values[cells]
+        unique, first, group = np.unique(combined, return_index=True, return_inverse=True)
+
+        result = pd.DataFrame({name: cube.decode(name, values[cells[first]]) for name, values in zip(by, keys)})
+        result['count'] = np.bincount(group, weights=count, minlength=len(unique)).astype(np.int64)
+        result['sum'] = np.bincount(group, weights=total, minlength=len(unique))
+        result['mean'] = result['sum'] / result['count']
+
+        if quantiles:
+            cell_group = np.full(len(cube), -1, dtype=np.int64)
+            cell_group[cells] = group
+            entries = self._entries()
+            owner = cell_group[cube.hist_cell[entries]]
+            entries = entries[owner >= 0]
+            owner = owner[owner >= 0]
+            for q in quantiles:
+                result[q] = _grouped_quantile(owner, cube.hist_second[entries], cube.hist_count[entries],
+                                              result['count'].to_numpy(), q)
+        return result
+
+
+def _grouped_quantile(group, seconds, counts, n, q):
+    """Cuantil q (interpolación lineal, como pandas) de cada grupo a partir de pares segundo/cantidad"""
+    order = np.lexsort((seconds, group))
+    seconds, counts = seconds[order], counts[order]
+    cumulative = np.cumsum(counts)
+    offsets = np.cumsum(n) - n
+
+    below, above, t = quantile_ranks(n, q)
+    a = seconds[np.searchsorted(cumulative, offsets + below, side='right')].astype(np.float64)
+    b = seconds[np.searchsorted(cumulative, offsets + above, side='right')].astype(np.float64)
+    return interpolate_quantile(a, b, t)
+
+
+def cubes_supported(df):
+    """True si df tiene las columnas de los cubos y TalkingTime es un entero no negativo (histogramas por segundo)"""
+    return all(column in df.columns for column in CUBE_DIMENSIONS + ['Inicio', 'TalkingTime']) \
+        and pd.api.types.is_integer_dtype(df['TalkingTime']) \
+        and pd.api.types.is_datetime64_any_dtype(df['Inicio']) \
+        and not (len(df) and df['TalkingTime'].min() < 0)
+
+
+def new_cubes(columns):
+    """Cubos vacíos ('llamadas', 'agentes' si hay columna de agente y las series) para extender"""
+    cubes = {'llamadas': DataCube(CUBE_DIMENSIONS)}
+    if 'Nombre Agente' in columns:
+        cubes['agentes'] = DataCube(AGENT_DIMENSIONS, period='D', histograms=False)
+    for name, period in SERIES_CUBES.values():
+        cubes[name] = DataCube(CUBE_DIMENSIONS, period=period)
+    return cubes
+
+
+def register_cubes(df, cubes):
+    """Asociar a df cubos ya construidos con sus filas (p. ej. durante la carga por bloques)"""
+    _CUBES.set(df, cubes)
+
+
+def build_cubes(df, previous=None, appended_rows=None):
+    """Construir los cubos de df ('llamadas' y 'agentes'), o extender los anteriores con las filas agregadas
+
+    Se extienden copias, así los cubos anteriores siguen valiendo para su
+    DataFrame si la recarga falla más adelante.
+
+    Devuelve None si faltan columnas o TalkingTime no es un entero no
+    negativo (los histogramas son por segundo).
+    """
+    if not cubes_supported(df):
+        return None
+
+    if previous is not None and appended_rows is not None \
+            and previous['llamadas'].rows + appended_rows == len(df):
+        cubes = {name: cube.copy() for name, cube in previous.items()}
+        new_rows = df.iloc[len(df) - appended_rows:]
+    else:
+        cubes = new_cubes(df.columns)
+        new_rows = df
+    for cube in cubes.values():
+        cube.extend(new_rows)
+
+    register_cubes(df, cubes)
+    return cubes
+
+
+def get_cubes(df):
+    """Cubos asociados a df, o None si no hay vigentes"""
+    cubes = _CUBES.get(df)
+    if cubes is None or cubes['llamadas'].rows != len(df):
+        return None
+    return cubes
+
+
+def select_cube(df, expr, name='llamadas'):
+    """CubeSelection de las filas de df que cumplen expr, sin filtrarlas (None si no se puede)"""
+    cubes = get_cubes(df)
+    if cubes is None or name not in cubes:
+        return None
+    mask = cubes[name].cell_mask(expr)
+    return None if mask is None else CubeSelection(cubes[name], mask)
+
+
+def register_cube_selection(result, cubes, expr, limite_sup=None):
+    """Recordar que result son las filas que cumplen expr (con TalkingTime <= limite_sup)"""
+    _SELECTIONS.set(result, (cubes, expr, limite_sup, {}))
+
+
+def refine_cube_selection(df_filtrado, result, limite_sup):
+    """Registrar result = filas de df_filtrado con TalkingTime <= limite_sup"""
+    entry = _SELECTIONS.get(df_filtrado)
+    if entry is None:
+        return
+    cubes, expr, limite_previo, _ = entry
+    if limite_previo is not None:
+        limite_sup = min(limite_sup, limite_previo)
+    register_cube_selection(result, cubes, expr, limite_sup)
+
+
+def cube_selection(df_filtrado, name='llamadas'):
+    """CubeSelection de un resultado de filtro en el cubo indicado, o None si no se conoce"""
+    entry = _SELECTIONS.get(df_filtrado)
+    if entry is None or name not in entry[0]:
+        return None
+    cubes, expr, limite_sup, selections = entry
+    if name not in selections:
+        mask = cubes[name].cell_mask(expr)
+        selections[name] = None if mask is None else CubeSelection(cubes[name], mask, limite_sup)
+    selection = selections[name]
+    # Si el cubo ya no corresponde a estas filas (p. ej. se extendió), no se usa
+    if selection is None or selection.rows != selection.cube.rows or selection.count() != len(df_filtrado):
+        return None
+    return selection
@@ -0,0 +1,391 @@
+"""
+Expresiones de filtrado componibles
+
+Un filtro es un árbol de predicados (In, Between, HourWindow) combinados con
+And, Or y Not (también con &, | y ~). select_rows resuelve el árbol en un
+único array de posiciones: dentro de un And primero se aplican los rangos
+de fechas (porciones contiguas del dataset ordenado por Inicio), después se
+combinan los predicados que tienen índice de bitmaps (FilterIndex) y por
+último se evalúan los demás, del más al menos selectivo, solo sobre las
+filas que quedan.
+
+    expr = (In('grupo', ['capa', 'romi']) & In('Turno', ['TM'])
+            & Between('Inicio', '2025-09-01', '2025-09-30') & HourWindow(10, 12))
+"""
+import numpy as np
+import pandas as pd
+
+# Selectividad supuesta cuando no hay información para estimarla
+DEFAULT_SELECTIVITY = 0.5
+
+
+def _all_rows(df, rows):
+    return np.arange(len(df)) if rows is None else rows
+
+
+def _column(df, column, rows):
+    values = df[column]
+    return values if rows is None else values.iloc[rows]
+
+
+def _bits_at(packed, rows):
+    """Valores de un bitmap empaquetado en las posiciones rows"""
+    return ((packed[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+
+class Predicate:
+    """Nodo de una expresión de filtrado"""
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def key(self):
+        """Clave normalizada (hashable) para cachés"""
+        raise NotImplementedError
+
+    def selectivity(self, df, index=None):
+        """Fracción estimada de filas que cumplen el predicado"""
+        return DEFAULT_SELECTIVITY
+
+    def bitmap(self, index):
+        """Bitmap empaquetado del predicado si el índice puede resolverlo, o None"""
+        return None
+
+    def mask(self, df, rows=None):
+        """Máscara booleana sobre df (o sobre las posiciones rows)"""
+        raise NotImplementedError
+
+    def slice_bounds(self, df, index):
+        """(desde, hasta) si el predicado equivale a una porción contigua de filas, o None"""
+        return None
+
+    def select(self, df, rows=None, index=None):
+        """Posiciones (ordenadas) de las filas de rows que cumplen el predicado"""
+        bitmap = self.bitmap(index) if index is not None else None
+        if bitmap is not None:
+            if rows is None:
+                return np.flatnonzero(np.unpackbits(bitmap, count=len(df)).view(bool))
+            return rows[_bits_at(bitmap, rows)]
+        return _all_rows(df, rows)[self.mask(df, rows)]
+
+    def to_sql(self):
+        """(condición SQL, parámetros) para el backend SQLite"""
+        raise NotImplementedError
+
+    def cell_selection(self):
+        """(grupos, tipificación, turno) si la expresión es el filtro clásico de celdas, o None"""
+        return None
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.key()[1:]}"
+
+
+class In(Predicate):
+    """Valor de una columna dentro de un conjunto (grupo, Turno, Tipificación, Sentido, agente...)"""
+
+    def __init__(self, column, values):
+        self.column = column
+        self.values = frozenset(str(value) for value in values)
+
+    def key(self):
+        return ('in', self.column, tuple(sorted(self.values)))
+
+    def selectivity(self, df, index=None):
+        if len(df) == 0:
+            return 0.0
+        if index is not None and self.column in index.bitmaps:
+            return index.count(self.column, self.values) / len(df)
+        values = df[self.column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            return len(self.values & set(categories.astype(str))) / max(len(categories), 1)
+        return DEFAULT_SELECTIVITY
+
+    def bitmap(self, index):
+        if self.column in index.bitmaps:
+            return index.bits(self.column, self.values)
+        return None
+
+    def mask(self, df, rows=None):
+        values = _column(df, self.column, rows)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Comparar códigos enteros en lugar de texto
+            wanted = values.cat.categories.get_indexer(pd.Index(list(self.values), dtype=object))
+            return np.isin(values.cat.codes.to_numpy(), wanted[wanted >= 0])
+        return values.astype(str).isin(self.values).to_numpy()
+
+    def to_sql(self):
+        from app.data.sqlite_backend import SQL_COLUMNS
+
+        if not self.values:
+            return '0', []
+        values = sorted(self.values)
+        return f"{SQL_COLUMNS[self.column]} IN ({', '.join('?' for _ in values)})", values
+
+
+class Between(Predicate):
+    """Valor de una columna en [inferior, superior] (extremos None = sin límite)
+
+    Sirve para rangos de TalkingTime y de fechas sobre Inicio.
+    """
+
+    def __init__(self, column, inferior=None, superior=None):
+        self.column = column
+        if column == 'Inicio':
+            inferior = pd.Timestamp(inferior) if inferior is not None else None
+            superior = pd.Timestamp(superior) if superior is not None else None
+        self.inferior = inferior
+        self.superior = superior
+
+    def key(self):
+        return ('between', self.column, self.inferior, self.superior)
+
+    def slice_bounds(self, df, index):
+        if index is None or self.column != 'Inicio':
+            return None
+        return index.inicio_slice(df, self.inferior, self.superior)
+
+    def selectivity(self, df, index=None):
+        bounds = self.slice_bounds(df, index)
+        if bounds is None or len(df) == 0:
+            return DEFAULT_SELECTIVITY
+        return (bounds[1] - bounds[0]) / len(df)
+
+    def select(self, df, rows=None, index=None):
+        bounds = self.slice_bounds(df, index)
+        if bounds is None:
+            return super().select(df, rows, index)
+        lo, hi = bounds
+        if rows is None:
+            return np.arange(lo, hi)
+        return rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+
+    def mask(self, df, rows=None):
+        values = _column(df, self.column, rows)
+        mask = values.notna()
+        if self.inferior is not None:
+            mask &= values >= self.inferior
+        if self.superior is not None:
+            mask &= values <= self.superior
+        return mask.to_numpy(dtype=bool)
+
+    def _sql_value(self, value):
+        return value.value if isinstance(value, pd.Timestamp) else value
+
+    def to_sql(self):
+        from app.data.sqlite_backend import SQL_COLUMNS
+
+        name = SQL_COLUMNS[self.column]
+        conditions, params = [f"{name} IS NOT NULL"], []
+        if self.inferior is not None:
+            conditions.append(f"{name} >= ?")
+            params.append(self._sql_value(self.inferior))
+        if self.superior is not None:
+            conditions.append(f"{name} <= ?")
+            params.append(self._sql_value(self.superior))
+        return ' AND '.join(conditions), params
+
+
+class HourWindow(Predicate):
+    """Hora de Inicio en [desde, hasta) (admite ventanas que cruzan la medianoche, p. ej. 22 a 6)"""
+
+    def __init__(self, desde, hasta):
+        self.desde = int(desde)
+        self.hasta = int(hasta)
+
+    def key(self):
+        return ('hour', self.desde, self.hasta)
+
+    def hours(self):
+        """Horas del día (0 a 23) que abarca la ventana"""
+        if self.desde <= self.hasta:
+            return list(range(self.desde, self.hasta))
+        return list(range(self.desde, 24)) + list(range(0, self.hasta))
+
+    def selectivity(self, df, index=None):
+        return len(self.hours()) / 24
+
+    def mask(self, df, rows=None):
+        if 'hour' in df.columns:
+            # Columna precalculada por el cargador (sin Inicio vale -1, que no está en ninguna ventana)
+            return np.isin(_column(df, 'hour', rows).to_numpy(), self.hours())
+        hours = _column(df, 'Inicio', rows).dt.hour
+        return hours.isin(self.hours()).to_numpy(dtype=bool)
+
+    def to_sql(self):
+        hours = self.hours()
+        if not hours:
+            return '0', []
+        # inicio se guarda en nanosegundos desde epoch
+        hour_sql = "((inicio / 1000000000) % 86400) / 3600"
+        return f"inicio IS NOT NULL AND {hour_sql} IN ({', '.join('?' for _ in hours)})", hours
+
+
+class And(Predicate):
+    """Todas las condiciones"""
+
+    def __init__(self, *children):
+        self.children = []
+        for child in children:
+            # Aplanar And anidados para poder reordenar todos los predicados juntos
+            self.children.extend(child.children if isinstance(child, And) else [child])
+
+    def key(self):
+        return ('and', tuple(sorted((child.key() for child in self.children), key=repr)))
+
+    def selectivity(self, df, index=None):
+        return float(np.prod([child.selectivity(df, index) for child in self.children]))
+
+    def bitmap(self, index):
+        bitmaps = [child.bitmap(index) for child in self.children]
+        if any(bitmap is None for bitmap in bitmaps):
+            return None
+        result = bitmaps[0].copy()
+        for bitmap in bitmaps[1:]:
+            result &= bitmap
+        return result
+
+    def mask(self, df, rows=None):
+        selected = self.select(df, rows)
+        return np.isin(_all_rows(df, rows), selected, assume_unique=True)
+
+    def select(self, df, rows=None, index=None):
+        children = self.children
+        if index is not None:
+            # Un rango de fechas sobre el dataset ordenado es una porción contigua:
+            # se aplica antes que cualquier otro filtro
+            sliced = [child for child in children if child.slice_bounds(df, index) is not None]
+            for child in sliced:
+                rows = child.select(df, rows, index)
+            children = [child for child in children if child not in sliced]
+
+            # Los predicados con índice se combinan con AND de bitmaps
+            bitmaps = [child.bitmap(index) for child in children]
+            indexed = [bitmap for bitmap in bitmaps if bitmap is not None]
+            if indexed:
+                combined = indexed[0].copy()
+                for bitmap in indexed[1:]:
+                    combined &= bitmap
+                rows = np.flatnonzero(np.unpackbits(combined, count=len(df)).view(bool)) if rows is None \
+                    else rows[_bits_at(combined, rows)]
+                children = [child for child, bitmap in zip(children, bitmaps) if bitmap is None]
+
+        # El resto, del más selectivo al menos, sobre las filas que van quedando
+        for child in sorted(children, key=lambda child: child.selectivity(df, index)):
+            if rows is not None and len(rows) == 0:
+                break
+            rows = child.select(df, rows, index)
+        return _all_rows(df, rows)
+
+    def to_sql(self):
+        parts = [child.to_sql() for child in self.children]
+        if not parts:
+            return '1', []
+        return ' AND '.join(f"({where})" for where, _ in parts), [p for _, params in parts for p in params]
+
+    def cell_selection(self):
+        by_column = {}
+        for child in self.children:
+            if not isinstance(child, In) or child.column in by_column:
+                return None
+            by_column[child.column] = child.values
+        if set(by_column) - {'grupo', 'Turno', 'Tipificación'} or 'grupo' not in by_column:
+            return None
+        turnos = by_column.get('Turno', ())
+        tipificaciones = by_column.get('Tipificación')
+        if len(turnos) != 1 or (tipificaciones is not None and len(tipificaciones) != 1):
+            return None
+        tipificacion = next(iter(tipificaciones)) if tipificaciones is not None else None
+        return sorted(by_column['grupo']), tipificacion, next(iter(turnos))
+
+
+class Or(Predicate):
+    """Alguna de las condiciones"""
+
+    def __init__(self, *children):
+        self.children = []
+        for child in children:
+            self.children.extend(child.children if isinstance(child, Or) else [child])
+
+    def key(self):
+        return ('or', tuple(sorted((child.key() for child in self.children), key=repr)))
+
+    def selectivity(self, df, index=None):
+        return min(1.0, sum(child.selectivity(df, index) for child in self.children))
+
+    def bitmap(self, index):
+        bitmaps = [child.bitmap(index) for child in self.children]
+        if not bitmaps or any(bitmap is None for bitmap in bitmaps):
+            return None
+        result = bitmaps[0].copy()
+        for bitmap in bitmaps[1:]:
+            result |= bitmap
+        return result
+
+    def mask(self, df, rows=None):
+        mask = np.zeros(len(_all_rows(df, rows)), dtype=bool)
+        for child in self.children:
+            mask |= child.mask(df, rows)
+        return mask
+
+    def select(self, df, rows=None, index=None):
+        if index is not None and self.bitmap(index) is not None:
+            return super().select(df, rows, index)
+        selected = [child.select(df, rows, index) for child in self.children]
+        return np.unique(np.concatenate(selected)) if selected else np.zeros(0, dtype=np.intp)
+
+    def to_sql(self):
+        parts = [child.to_sql() for child in self.children]
+        if not parts:
+            return '0', []
+        return ' OR '.join(f"({where})" for where, _ in parts), [p for _, params in parts for p in params]
+
+
+class Not(Predicate):
+    """Negación de una condición"""
+
+    def __init__(self, child):
+        self.child = child
+
+    def key(self):
+        return ('not', self.child.key())
+
+    def selectivity(self, df, index=None):
+        return 1.0 - self.child.selectivity(df, index)
+
+    def bitmap(self, index):
+        bitmap = self.child.bitmap(index)
+        if bitmap is None:
+            return None
+        # Los bits de relleno del último byte no corresponden a filas y se ignoran al desempaquetar
+        return ~bitmap
+
+    def mask(self, df, rows=None):
+        return ~self.child.mask(df, rows)
+
+    def select(self, df, rows=None, index=None):
+        all_rows = _all_rows(df, rows)
+        return np.setdiff1d(all_rows, self.child.select(df, rows, index), assume_unique=True)
+
+    def to_sql(self):
+        where, params = self.child.to_sql()
+        return f"NOT ({where})", params
+
+
+def build_filter_expression(grupos_filtrados, tipificacion_filtrada, turno_filtrado):
+    """Expresión del filtro clásico: grupos, tipificación (None = todas) y turno"""
+    expr = In('grupo', grupos_filtrados) & In('Turno', [turno_filtrado])
+    if tipificacion_filtrada is not None:
+        expr = expr & In('Tipificación', [tipificacion_filtrada])
+    return expr
+
+
+def select_rows(df, expr, index=None):
+    """Posiciones de las filas de df que cumplen la expresión"""
+    return expr.select(df, None, index)
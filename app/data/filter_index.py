@@ -0,0 +1,164 @@
+"""
+Índice de filtrado por bitmaps para grupo, Turno y Tipificación
+
+Al cargar el dataset se construye, para cada valor distinto de las
+columnas de filtro, el conjunto de filas que lo contienen como bitmap
+empaquetado (np.packbits, 1 bit por fila). Cualquier combinación de filtros
+se resuelve con OR/AND de bitmaps en lugar de recorrer la tabla con isin y
+comparaciones de texto. En una recarga incremental solo se agregan los bits
+de las filas nuevas.
+
+Si el dataset está ordenado por Inicio (el loader lo deja así), un rango de
+fechas se resuelve con np.searchsorted como una porción contigua de filas.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from app.data.registry import IdentityRegistry
+
+# DataFrame -> FilterIndex
+_INDEXES = IdentityRegistry()
+
+
+def _column_codes(values):
+    """Códigos enteros y categorías de una columna (categórica o no)"""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    return values.cat.codes.to_numpy(), [str(category) for category in values.cat.categories]
+
+
+def is_sorted_by_inicio(df):
+    """True si Inicio está en orden creciente (con los NaT al final, como ordena NumPy)"""
+    if 'Inicio' not in df.columns or not pd.api.types.is_datetime64_any_dtype(df['Inicio']):
+        return False
+    values = df['Inicio'].to_numpy()
+    valid = ~np.isnat(values)
+    n_valid = int(valid.sum())
+    return bool(valid[:n_valid].all() and (values[1:n_valid] >= values[:n_valid - 1]).all())
+
+
+def _datetime_key(value, dtype):
+    """Límite de fecha en la unidad de la columna si no pierde precisión (evita convertir la columna)"""
+    key = pd.Timestamp(value).to_datetime64()
+    cast = key.astype(dtype)
+    return cast if cast == key else key
+
+
+def _append_bits(packed, n_bits, bits):
+    """Agregar bits (array booleano) a un bitmap empaquetado de n_bits bits"""
+    if len(bits) == 0:
+        return packed
+
+    partial = n_bits % 8
+    if partial:
+        # Completar el último byte, que tiene 8 - partial bits libres
+        used = np.unpackbits(packed[-1:])[:partial]
+        head = np.packbits(np.concatenate([used, bits[:8 - partial].astype(np.uint8)]))
+        return np.concatenate([packed[:-1], head, np.packbits(bits[8 - partial:])])
+    return np.concatenate([packed, np.packbits(bits)])
+
+
+class FilterIndex:
+    """Bitmap de filas por cada valor de grupo, Turno y Tipificación"""
+    KEYS = ['grupo', 'Turno', 'Tipificación']
+
+    def __init__(self, df):
+        self.rows = 0
+        self.bitmaps = {column: {} for column in self.KEYS if column in df.columns}
+        self.counts = {column: {} for column in self.bitmaps}
+        self.sorted_by_inicio = False
+        self.extend(df)
+
+    def copy(self):
+        """Copia que se puede extender sin modificar este índice (los bitmaps se reemplazan, no se modifican)"""
+        index = copy.copy(self)
+        index.bitmaps = {column: dict(bitmaps) for column, bitmaps in self.bitmaps.items()}
+        index.counts = {column: dict(counts) for column, counts in self.counts.items()}
+        return index
+
+    def extend(self, df_new):
+        """Agregar las filas nuevas (al final del dataset) al índice"""
+        for column, bitmaps in self.bitmaps.items():
+            codes, categories = _column_codes(df_new[column])
+            counts = self.counts[column]
+            for code, value in enumerate(categories):
+                if value not in bitmaps:
+                    bitmaps[value] = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+                    counts[value] = 0
+                bits = codes == code
+                bitmaps[value] = _append_bits(bitmaps[value], self.rows, bits)
+                counts[value] += int(bits.sum())
+
+            # Los valores ausentes en las filas nuevas se completan con ceros
+            missing = np.zeros(len(df_new), dtype=bool)
+            for value in set(bitmaps) - set(categories):
+                bitmaps[value] = _append_bits(bitmaps[value], self.rows, missing)
+        self.rows += len(df_new)
+
+    def bits(self, column, values):
+        """Bitmap empaquetado de las filas cuyo valor en column está en values"""
+        bitmaps = self.bitmaps[column]
+        result = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+        for value in values:
+            if value in bitmaps:
+                result |= bitmaps[value]
+        return result
+
+    def select(self, grupos_filtrados, tipificacion_filtrada, turno_filtrado):
+        """Máscara booleana de filas para la combinación de filtros"""
+        bits = self.bits('grupo', grupos_filtrados)
+        bits &= self.bits('Turno', [turno_filtrado])
+        if tipificacion_filtrada is not None:
+            bits &= self.bits('Tipificación', [tipificacion_filtrada])
+        return np.unpackbits(bits, count=self.rows).view(bool)
+
+    def inicio_slice(self, df, inferior=None, superior=None):
+        """(desde, hasta) de las filas con Inicio en [inferior, superior], o None si df no está ordenado"""
+        if not self.sorted_by_inicio:
+            return None
+        values = df['Inicio'].to_numpy()
+        lo = 0 if inferior is None else int(np.searchsorted(values, _datetime_key(inferior, values.dtype), 'left'))
+        if superior is None:
+            hi = int(np.searchsorted(values, np.datetime64('NaT'), 'left'))
+        else:
+            hi = int(np.searchsorted(values, _datetime_key(superior, values.dtype), 'right'))
+        return lo, max(lo, hi)
+
+    def count(self, column, values):
+        """Cantidad de filas con valor en values (para estimar selectividad)"""
+        return sum(self.counts[column].get(value, 0) for value in values)
+
+    def memory_usage(self):
+        """Bytes ocupados por los bitmaps"""
+        return sum(bitmap.nbytes for bitmaps in self.bitmaps.values() for bitmap in bitmaps.values())
+
+
+def attach_filter_index(df, index):
+    """Asociar un índice a un DataFrame (lo usa filter_data mientras el DataFrame exista)"""
+    return _INDEXES.set(df, index)
+
+
+def build_filter_index(df, previous=None, appended_rows=None):
+    """Construir el índice de df, o extender el anterior si solo se agregaron filas al final
+
+    Se extiende una copia: el índice anterior sigue valiendo para su
+    DataFrame si la recarga falla más adelante.
+    """
+    if previous is not None and appended_rows is not None and previous.rows + appended_rows == len(df):
+        index = previous.copy()
+        if appended_rows:
+            index.extend(df.iloc[len(df) - appended_rows:])
+    else:
+        index = FilterIndex(df)
+    index.sorted_by_inicio = is_sorted_by_inicio(df)
+    return attach_filter_index(df, index)
+
+
+def get_filter_index(df):
+    """Índice asociado a df, o None si no hay uno vigente para ese DataFrame"""
+    index = _INDEXES.get(df)
+    if index is None or index.rows != len(df) or len(index.bitmaps) != len(FilterIndex.KEYS):
+        return None
+    return index
@@ -0,0 +1,179 @@
+"""
+Pruebas de hipótesis entre varios grupos a partir de sus resúmenes
+
+Todas las pruebas se calculan con los StatsSummary de los grupos (conteo,
+media, M2 e histograma por segundo), sin volver a las filas ni recorrer los
+pares en Python:
+
+- t de Welch y Mann-Whitney: matrices k × k para todos los pares a la vez
+  (operaciones entre vectores y productos de matrices de histogramas).
+- ANOVA de un factor y Kruskal-Wallis: una prueba global para los k grupos.
+
+Los rangos (con empates promediados) salen de los histogramas: el rango
+medio de un valor es la cantidad de valores menores más (empates + 1) / 2.
+Los p-valores de las pruebas por pares se corrigen por comparaciones
+múltiples (Holm, Bonferroni o Benjamini-Hochberg).
+"""
+import numpy as np
+from scipy import stats
+
+# Nombre visible -> método de corrección de adjust_pvalues
+CORRECTIONS = {
+    'Holm': 'holm',
+    'Bonferroni': 'bonferroni',
+    'Benjamini-Hochberg': 'fdr_bh',
+}
+
+
+def _histogram_matrix(summaries):
+    """Matriz k × V con la cantidad de cada valor distinto por grupo (y los valores)"""
+    if all(summary.sketch is not None for summary in summaries):
+        width = max(len(summary.sketch) for summary in summaries)
+        matrix = np.zeros((len(summaries), width), dtype=np.float64)
+        for row, summary in zip(matrix, summaries):
+            row[:len(summary.sketch)] = summary.sketch
+        return np.arange(width, dtype=np.float64), matrix
+
+    # Valores no enteros: histograma sobre la unión de valores distintos
+    values = [summary.sorted_values() for summary in summaries]
+    support = np.unique(np.concatenate(values))
+    matrix = np.array([np.bincount(np.searchsorted(support, group), minlength=len(support))
+                       for group in values], dtype=np.float64)
+    return support, matrix
+
+
+def _group_arrays(summaries):
+    counts = np.array([summary.count for summary in summaries], dtype=np.float64)
+    means = np.array([summary.mean for summary in summaries], dtype=np.float64)
+    m2 = np.array([summary.m2 for summary in summaries], dtype=np.float64)
+    return counts, means, m2
+
+
+def welch_t_test(summaries):
+    """t de Welch para todos los pares: matrices de estadístico, grados de libertad y p-valor"""
+    counts, means, m2 = _group_arrays(summaries)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        se2 = m2 / (counts - 1) / counts
+        pair_se2 = se2[:, np.newaxis] + se2
+        statistic = (means[:, np.newaxis] - means) / np.sqrt(pair_se2)
+        dof = pair_se2 ** 2 / (se2[:, np.newaxis] ** 2 / (counts[:, np.newaxis] - 1) + se2 ** 2 / (counts - 1))
+        pvalue = 2 * stats.t.sf(np.abs(statistic), dof)
+    np.fill_diagonal(pvalue, 1.0)
+    return {'statistic': statistic, 'df': dof, 'pvalue': pvalue}
+
+
+def anova_oneway(summaries):
+    """ANOVA de un factor (igual que scipy.stats.f_oneway)"""
+    counts, means, m2 = _group_arrays(summaries)
+    n, k = counts.sum(), len(counts)
+    grand_mean = (counts * means).sum() / n
+    between = (counts * (means - grand_mean) ** 2).sum() / (k - 1)
+    within = m2.sum() / (n - k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistic = between / within
+    return {'statistic': float(statistic), 'df': (k - 1, int(n - k)),
+            'pvalue': float(stats.f.sf(statistic, k - 1, n - k))}
+
+
+def _tie_term(totals):
+    """Suma de t³ - t sobre los grupos de empates"""
+    return (totals ** 3 - totals).sum(axis=-1)
+
+
+def kruskal_wallis(summaries):
+    """Kruskal-Wallis con corrección por empates (igual que scipy.stats.kruskal)"""
+    _, matrix = _histogram_matrix(summaries)
+    counts = matrix.sum(axis=1)
+    pooled = matrix.sum(axis=0)
+    n, k = pooled.sum(), len(summaries)
+
+    # Rango medio de cada valor y suma de rangos de cada grupo (un producto matriz-vector)
+    ranks = np.cumsum(pooled) - pooled + (pooled + 1) / 2
+    rank_sums = matrix @ ranks
+    statistic = 12 / (n * (n + 1)) * (rank_sums ** 2 / counts).sum() - 3 * (n + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistic /= 1 - _tie_term(pooled) / (n ** 3 - n)
+    return {'statistic': float(statistic), 'df': k - 1, 'pvalue': float(stats.chi2.sf(statistic, k - 1))}
+
+
+def mann_whitney(summaries):
+    """Mann-Whitney (bilateral, aproximación normal con corrección por continuidad y empates) para todos los pares
+
+    U[i, j] cuenta los pares (x de i, y de j) con x > y más la mitad de los
+    empates: es la fila i del histograma contra la distribución acumulada de
+    j, así que la matriz completa es un solo producto de matrices.
+    """
+    _, matrix = _histogram_matrix(summaries)
+    counts = matrix.sum(axis=1)
+    below = np.cumsum(matrix, axis=1) - matrix
+    statistic = matrix @ (below + matrix / 2).T
+
+    # Empates del par (i, j): sum((a + b)^3) desarrollado con productos de matrices
+    cubes = (matrix ** 3).sum(axis=1)
+    squares_by = (matrix ** 2) @ matrix.T
+    pair_n = counts[:, np.newaxis] + counts
+    ties = cubes[:, np.newaxis] + cubes + 3 * squares_by + 3 * squares_by.T - pair_n
+
+    product = counts[:, np.newaxis] * counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(product / 12 * ((pair_n + 1) - ties / (pair_n * (pair_n - 1))))
+        z = (np.maximum(statistic, product - statistic) - product / 2 - 0.5) / sigma
+        pvalue = np.minimum(2 * stats.norm.sf(z), 1.0)
+    np.fill_diagonal(pvalue, 1.0)
+    return {'statistic': statistic, 'pvalue': pvalue}
+
+
+def adjust_pvalues(pvalues, method='holm'):
+    """Corregir una matriz simétrica de p-valores por comparaciones múltiples (pares i < j)"""
+    k = len(pvalues)
+    rows, cols = np.triu_indices(k, 1)
+    p = pvalues[rows, cols]
+    valid = ~np.isnan(p)
+    m = int(valid.sum())
+    adjusted = np.full(len(p), np.nan)
+
+    if m:
+        order = np.argsort(p[valid])
+        ranked = p[valid][order]
+        if method == 'bonferroni':
+            corrected = ranked * m
+        elif method == 'holm':
+            corrected = np.maximum.accumulate(ranked * (m - np.arange(m)))
+        elif method == 'fdr_bh':
+            corrected = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+        else:
+            raise ValueError(f"Método de corrección desconocido: {method}")
+        values = np.empty(m)
+        values[order] = np.minimum(corrected, 1.0)
+        adjusted[valid] = values
+
+    result = np.ones_like(pvalues, dtype=np.float64)
+    result[rows, cols] = adjusted
+    result[cols, rows] = adjusted
+    return result
+
+
+def compare_groups(summaries, correction='holm'):
+    """Todas las pruebas para un diccionario {grupo: StatsSummary}
+
+    Se descartan los grupos sin datos. Devuelve None si quedan menos de
+    dos grupos.
+    """
+    names = [name for name, summary in summaries.items() if summary is not None and summary.count > 0]
+    if len(names) < 2:
+        return None
+    groups = [summaries[name] for name in names]
+
+    welch = welch_t_test(groups)
+    welch['pvalue_adj'] = adjust_pvalues(welch['pvalue'], correction)
+    mw = mann_whitney(groups)
+    mw['pvalue_adj'] = adjust_pvalues(mw['pvalue'], correction)
+    return {
+        'groups': names,
+        'counts': [group.count for group in groups],
+        'correction': correction,
+        'welch': welch,
+        'mann_whitney': mw,
+        'anova': anova_oneway(groups),
+        'kruskal': kruskal_wallis(groups),
+    }
@@ -0,0 +1,182 @@
+"""
+Ingesta incremental de reportes diarios de Mitrol
+
+Procesa solo los reportes de data/raw/ que todavía no figuran en el
+manifiesto, los guarda como particiones por día y agrega sus filas al
+CSV procesado que usa la aplicación.
+
+Uso:
+    python -m app.data.ingest [--raw-dir DIR] [--process-dir DIR] [--workers N]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.data.config import CSV_ENCODING, CSV_SEP, PROCESS_DIR, PROCESSED_CSV, RAW_DIR
+from app.data.pipeline import process_report
+
+PROCESSED_NAME = os.path.basename(PROCESSED_CSV)
+MANIFEST_NAME = 'manifiesto_ingesta.json'
+PARTITIONS_NAME = 'particiones'
+
+
+def load_manifest(manifest_path):
+    """Cargar el manifiesto de reportes ya ingeridos"""
+    if not os.path.exists(manifest_path):
+        return {'reportes': {}}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_path):
+    """Guardar el manifiesto de forma atómica"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def find_new_reports(raw_dir, manifest):
+    """Buscar reportes crudos que todavía no fueron ingeridos
+
+    Returns:
+        tuple: (lista de reportes nuevos, lista de reportes ya ingeridos que cambiaron)
+    """
+    nuevos = []
+    modificados = []
+    if not os.path.isdir(raw_dir):
+        return nuevos, modificados
+
+    for nombre in sorted(os.listdir(raw_dir)):
+        if not nombre.lower().endswith('.csv'):
+            continue
+        registro = manifest['reportes'].get(nombre)
+        if registro is None:
+            nuevos.append(nombre)
+        elif registro['size'] != os.path.getsize(os.path.join(raw_dir, nombre)):
+            modificados.append(nombre)
+    return nuevos, modificados
+
+
+def _append_csv(df, path):
+    """Agregar filas a un CSV, escribiendo el encabezado solo si es nuevo"""
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    if exists:
+        with open(path, encoding=CSV_ENCODING, newline='') as f:
+            header = next(csv.reader(f, delimiter=CSV_SEP), [])
+        if header != list(df.columns):
+            raise ValueError(f"Las columnas de {path} no coinciden con las del reporte procesado")
+    df.to_csv(path, sep=CSV_SEP, encoding=CSV_ENCODING, index=False, header=not exists, mode='a')
+
+
+def write_partitions(df, partitions_dir):
+    """Guardar las filas de un reporte en particiones por día (AAAA-MM-DD.csv)"""
+    os.makedirs(partitions_dir, exist_ok=True)
+    particiones = []
+    for fecha, df_dia in df.groupby(df['Inicio'].dt.strftime('%Y-%m-%d'), sort=True):
+        _append_csv(df_dia, os.path.join(partitions_dir, f"{fecha}.csv"))
+        particiones.append(fecha)
+    return particiones
+
+
+def _process_report_timed(path):
+    """Procesar un reporte midiendo el tiempo (se ejecuta en un proceso worker)"""
+    inicio = time.perf_counter()
+    df = process_report(path)
+    return df, time.perf_counter() - inicio
+
+
+def parse_reports(paths, workers=None):
+    """Procesar varios reportes crudos en paralelo con un pool de procesos
+
+    Los reportes son independientes entre sí, así que cada uno se parsea en
+    un proceso distinto. Los resultados se devuelven en el mismo orden que
+    paths, como tuplas (DataFrame procesado, segundos de procesamiento).
+    Con workers=1 se procesa en el proceso actual.
+    """
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield _process_report_timed(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_process_report_timed, paths)
+
+
+def ingest_reports(raw_dir=RAW_DIR, process_dir=PROCESS_DIR, workers=None):
+    """Ingerir los reportes nuevos de raw_dir
+
+    Cada reporte nuevo se procesa una sola vez: se escriben sus particiones
+    diarias, se agregan sus filas al CSV procesado y se registra en el
+    manifiesto, de modo que agregar un día cuesta lo mismo que procesar ese
+    día y no el historial completo. El parseo se reparte entre workers
+    procesos; la escritura se hace en orden desde el proceso principal.
+
+    Returns:
+        list: resumen por reporte ingerido (nombre, filas, particiones, segundos)
+    """
+    os.makedirs(process_dir, exist_ok=True)
+    manifest_path = os.path.join(process_dir, MANIFEST_NAME)
+    processed_path = os.path.join(process_dir, PROCESSED_NAME)
+    partitions_dir = os.path.join(process_dir, PARTITIONS_NAME)
+
+    manifest = load_manifest(manifest_path)
+    nuevos, modificados = find_new_reports(raw_dir, manifest)
+
+    for nombre in modificados:
+        print(f"⚠️ {nombre} cambió después de ser ingerido; se omite (reconstruir para incluirlo)")
+
+    resumen = []
+    paths = [os.path.join(raw_dir, nombre) for nombre in nuevos]
+    for nombre, path, (df, segundos) in zip(nuevos, paths, parse_reports(paths, workers)):
+
+        particiones = write_partitions(df, partitions_dir)
+        _append_csv(df, processed_path)
+
+        manifest['reportes'][nombre] = {
+            'size': os.path.getsize(path),
+            'mtime_ns': os.stat(path).st_mtime_ns,
+            'filas': len(df),
+            'segundos': round(segundos, 3),
+            'particiones': particiones,
+            'ingerido': datetime.now().isoformat(timespec='seconds'),
+        }
+        save_manifest(manifest, manifest_path)
+
+        print(f"✅ {nombre}: {len(df)} registros en {segundos:.2f} s "
+              f"-> {', '.join(particiones) or 'sin particiones'}")
+        resumen.append({'reporte': nombre, 'filas': len(df), 'particiones': particiones,
+                        'segundos': segundos})
+
+    if not nuevos:
+        print("No hay reportes nuevos para ingerir.")
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta incremental de reportes de Mitrol")
+    parser.add_argument('--raw-dir', default=RAW_DIR, help="Directorio de reportes crudos")
+    parser.add_argument('--process-dir', default=PROCESS_DIR, help="Directorio de datos procesados")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para parsear reportes (por defecto, uno por CPU)")
+    args = parser.parse_args(argv)
+
+    resumen = ingest_reports(args.raw_dir, args.process_dir, args.workers)
+    if resumen:
+        total_filas = sum(r['filas'] for r in resumen)
+        total_segundos = sum(r['segundos'] for r in resumen)
+        print(f"Total: {len(resumen)} reportes, {total_filas} registros, "
+              f"{total_segundos:.2f} s de parseo acumulado")
+
+
+if __name__ == "__main__":
+    main()
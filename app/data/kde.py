@@ -0,0 +1,106 @@
+"""
+Estimación de densidad por núcleos (KDE) gaussiana sobre histogramas
+
+En lugar de sumar un núcleo por llamada (gaussian_kde, O(n × puntos)), las
+cantidades se acumulan en una grilla regular y se convolucionan con el
+núcleo gaussiano muestreado en la misma grilla mediante FFT. Como
+TalkingTime son segundos enteros, la grilla es el histograma por segundo
+del resumen de la selección (subdividido si el ancho de banda es chico) y
+el resultado coincide con gaussian_kde en los puntos de la grilla; entre
+ellos se interpola linealmente.
+
+Las curvas se guardan por resultado de filtro y ancho de banda.
+"""
+import numpy as np
+from scipy.signal import fftconvolve
+
+from app.data.processor import get_summary
+from app.data.registry import IdentityRegistry
+
+# Reglas de ancho de banda (nombre visible -> regla), como en gaussian_kde
+KDE_BANDWIDTHS = {
+    'Scott': 'scott',
+    'Silverman': 'silverman',
+}
+
+# Puntos de grilla por ancho de banda como mínimo (se subdivide el segundo si hace falta)
+GRID_POINTS_PER_BANDWIDTH = 4
+MAX_SUBDIVISIONS = 64
+# Puntos de grilla para valores no enteros: como mínimo GRID_SIZE y los
+# necesarios para GRID_POINTS_PER_BANDWIDTH puntos por ancho de banda
+GRID_SIZE = 2048
+MAX_GRID_SIZE = 2 ** 20
+# Alcance del núcleo en anchos de banda (más allá su peso es despreciable)
+KERNEL_SUPPORT = 5
+
+# Resultado de un filtro -> {(ancho de banda, puntos): (x, densidad)}
+_CURVES = IdentityRegistry()
+
+
+def bandwidth(summary, rule='scott'):
+    """Ancho de banda en segundos: regla de Scott o Silverman (como gaussian_kde) o un valor fijo"""
+    if not isinstance(rule, str):
+        return float(rule)
+    if rule == 'scott':
+        factor = summary.count ** (-1 / 5)
+    elif rule == 'silverman':
+        factor = (summary.count * 3 / 4) ** (-1 / 5)
+    else:
+        raise ValueError(f"Regla de ancho de banda desconocida: {rule}")
+    return factor * summary.std()
+
+
+def _grid_counts(summary, h):
+    """(primer punto, paso, cantidades) de la grilla regular con los valores del resumen"""
+    if summary.sketch is not None:
+        # Segundos enteros: el histograma por segundo ya es la grilla (exacta)
+        subdivisions = int(min(max(1, np.ceil(GRID_POINTS_PER_BANDWIDTH / h)), MAX_SUBDIVISIONS))
+        counts = np.zeros((len(summary.sketch) - 1) * subdivisions + 1, dtype=np.float64)
+        counts[::subdivisions] = summary.sketch
+        return 0.0, 1 / subdivisions, counts
+
+    # Valores no enteros: binning lineal (cada valor se reparte entre los dos puntos vecinos)
+    values = summary.values
+    span = summary.max - summary.min
+    grid_size = int(min(max(GRID_SIZE, np.ceil(span * GRID_POINTS_PER_BANDWIDTH / h) + 1), MAX_GRID_SIZE))
+    step = span / (grid_size - 1) or 1.0
+    position = (values - summary.min) / step
+    below = np.minimum(np.floor(position).astype(np.int64), grid_size - 2)
+    fraction = position - below
+    counts = np.bincount(below, weights=1 - fraction, minlength=grid_size) \
+        + np.bincount(below + 1, weights=fraction, minlength=grid_size)
+    return summary.min, step, counts
+
+
+def binned_kde(summary, rule='scott', n_points=200):
+    """(x, densidad) de la KDE gaussiana en n_points entre el mínimo y el máximo
+
+    Devuelve None si no hay al menos dos valores distintos (ancho de banda nulo).
+    """
+    if summary is None or summary.count < 2:
+        return None
+    h = bandwidth(summary, rule)
+    if not np.isfinite(h) or h <= 0:
+        return None
+
+    start, step, counts = _grid_counts(summary, h)
+    reach = int(np.ceil(KERNEL_SUPPORT * h / step))
+    offsets = np.arange(-reach, reach + 1) * step
+    kernel = np.exp(-0.5 * (offsets / h) ** 2)
+
+    density = np.maximum(fftconvolve(counts, kernel), 0) / (summary.count * h * np.sqrt(2 * np.pi))
+    grid = start - reach * step + np.arange(len(density)) * step
+    x_range = np.linspace(summary.min, summary.max, n_points)
+    return x_range, np.interp(x_range, grid, density)
+
+
+def kde_curve(df_filtrado, rule='scott', n_points=200):
+    """KDE de TalkingTime de un resultado de filtro (guardada por resultado y ancho de banda)"""
+    curves = _CURVES.get(df_filtrado)
+    if curves is None:
+        curves = _CURVES.set(df_filtrado, {})
+
+    key = (rule, n_points)
+    if key not in curves:
+        curves[key] = binned_kde(get_summary(df_filtrado), rule, n_points)
+    return curves[key]
@@ -0,0 +1,367 @@
+"""
+Módulo de carga de datos
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.data.cache import compute_fingerprint, load_cache, prefix_digest, save_cache
+from app.data.config import (CHUNKED_LOAD_THRESHOLD_MB, CSV_ENCODING, CSV_SEP, GRUPOS_AGENTES, GUI_COLUMNS,
+                             MEMORY_BUDGET_MB, PROCESSED_CSV, TIME_COLUMNS, TIME_NAT)
+from app.data.cube import register_cubes
+from app.data.filter_index import is_sorted_by_inicio
+from app.data.sqlite_backend import SQLiteStore
+from app.data.streaming import concat_compact, load_data_streaming
+
+# Columnas de texto con pocos valores distintos que se guardan como categorías
+CATEGORICAL_COLUMNS = ['grupo', 'Tipificación', 'Turno', 'Sentido', 'Nombre Agente']
+
+
+class _PrefixFile(io.RawIOBase):
+    """Archivo binario de solo lectura que termina después de sus primeros size bytes"""
+
+    def __init__(self, path, size):
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._file.readinto(memoryview(buffer)[:self._remaining])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_prefix(csv_path, size=None):
+    """Abrir el CSV para parsear solo sus primeros size bytes (todo si size es None)
+
+    Así lo parseado es exactamente lo que registra la huella aunque el
+    archivo crezca mientras se lee.
+    """
+    if size is None:
+        return open(csv_path, 'rb')
+    return io.BufferedReader(_PrefixFile(csv_path, size))
+
+
+def read_processed_csv(csv_path, size=None):
+    """Leer el CSV procesado (solo GUI_COLUMNS, como la carga por bloques) y convertir Inicio a datetime"""
+    with open_prefix(csv_path, size) as f:
+        df = pd.read_csv(f, sep=CSV_SEP, encoding=CSV_ENCODING, usecols=lambda column: column in GUI_COLUMNS)
+    if 'Inicio' in df.columns:
+        df['Inicio'] = pd.to_datetime(df['Inicio'], errors='coerce')
+    return df
+
+
+def _no_progress(mensaje):
+    pass
+
+
+def _format_mb(n_bytes):
+    return f"{n_bytes / 1024 ** 2:.1f} MB"
+
+
+def compact_dataframe(df, report_memory=True):
+    """Convertir el dataset a una representación compacta en memoria
+
+    Las columnas de texto pasan a categorías (códigos enteros), TalkingTime
+    al entero más chico que lo contiene e Inicio a datetime64. Informa la
+    memoria usada antes y después de la conversión.
+    """
+    memoria_antes = df.memory_usage(deep=True).sum() if report_memory else 0
+
+    # Además de las columnas conocidas, cualquier otra columna de texto
+    # (p. ej. 'Causa Terminación') también se guarda como categoría
+    text_columns = [column for column in df.columns
+                    if column != 'Inicio' and (column in CATEGORICAL_COLUMNS
+                                               or pd.api.types.is_string_dtype(df[column])
+                                               or pd.api.types.is_object_dtype(df[column]))]
+    for column in text_columns:
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+
+    if 'TalkingTime' in df.columns and not df['TalkingTime'].isna().any():
+        df['TalkingTime'] = pd.to_numeric(df['TalkingTime'].astype('int64'), downcast='integer')
+
+    if 'Inicio' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Inicio']):
+        df['Inicio'] = pd.to_datetime(df['Inicio'], errors='coerce')
+
+    if report_memory:
+        memoria_despues = df.memory_usage(deep=True).sum()
+        print(f"💾 Memoria del dataset: {_format_mb(memoria_antes)} -> {_format_mb(memoria_despues)}")
+    return df
+
+
+def add_time_columns(df):
+    """Agregar las columnas TIME_COLUMNS (hour, weekday, day_index) calculadas desde Inicio
+
+    Se calculan una sola vez al cargar para que los gráficos no vuelvan a
+    convertir fechas. Son enteros chicos (int8/int32); las filas sin Inicio
+    llevan TIME_NAT.
+    """
+    if 'Inicio' not in df.columns:
+        return df
+    inicio = df['Inicio'].to_numpy(dtype='datetime64[s]')
+    nat = np.isnat(inicio)
+    days = inicio.astype('datetime64[D]')
+    day_index = days.astype(np.int64)
+    hour = (inicio - days).astype(np.int64) // 3600
+    # 1970-01-01 fue jueves: con lunes = 0 le corresponde el 3
+    df['hour'] = np.where(nat, TIME_NAT, hour).astype(np.int8)
+    df['weekday'] = np.where(nat, TIME_NAT, (day_index + 3) % 7).astype(np.int8)
+    df['day_index'] = np.where(nat, TIME_NAT, day_index).astype(np.int32)
+    return df
+
+
+def sort_by_inicio(df):
+    """Ordenar el dataset por Inicio (NaT al final) para resolver rangos de fechas con búsqueda binaria"""
+    if 'Inicio' not in df.columns or is_sorted_by_inicio(df):
+        return df
+    order = np.argsort(df['Inicio'].to_numpy(), kind='stable')
+    return df.take(order).reset_index(drop=True)
+
+
+def load_data(csv_path=PROCESSED_CSV, use_cache=True, chunked=None, memory_budget_mb=MEMORY_BUDGET_MB,
+              progress=None):
+    """Cargar datos desde el archivo CSV procesado (ver load_data_with_state)
+
+    Returns:
+        tuple: (DataFrame, True si se cargó el archivo / False si son datos de ejemplo)
+    """
+    df, file_loaded, _ = load_data_with_state(csv_path, use_cache, chunked, memory_budget_mb, progress)
+    return df, file_loaded
+
+
+def load_data_with_state(csv_path=PROCESSED_CSV, use_cache=True, chunked=None, memory_budget_mb=MEMORY_BUDGET_MB,
+                         progress=None):
+    """Cargar datos desde el archivo CSV procesado y registrar hasta dónde se leyó
+
+    Si existe una caché columnar válida junto al CSV se usa directamente;
+    si el CSV cambió (tamaño, mtime o contenido) se vuelve a parsear y se
+    reconstruye la caché. El dataset queda ordenado por Inicio. Con chunked=None el CSV se lee por bloques cuando
+    supera CHUNKED_LOAD_THRESHOLD_MB; en ese caso los cubos de datos se
+    construyen mientras se leen los bloques. Si se pasa progress, se llama con
+    mensajes de avance (puede ejecutarse desde un hilo de carga).
+
+    El estado para las recargas incrementales (ver get_source_state) sale de
+    la huella de los bytes que se parsearon o que guarda la caché, no del
+    archivo después de cargar: las filas agregadas mientras se leía quedan
+    para la próxima recarga.
+
+    Returns:
+        tuple: (DataFrame, True si se cargó el archivo / False si son datos de
+                ejemplo, estado de la fuente o None)
+    """
+    if progress is None:
+        progress = _no_progress
+
+    try:
+        if os.path.exists(csv_path):
+            df = None
+            if use_cache:
+                progress("Verificando caché...")
+                df, fingerprint = load_cache(csv_path)
+                if df is not None:
+                    if any(column not in df.columns for column in TIME_COLUMNS):
+                        add_time_columns(df)
+                    print(f"✅ Caché cargada: {len(df)} registros "
+                          f"({_format_mb(df.memory_usage(deep=True).sum())})")
+
+            if df is None:
+                # La huella se toma antes de parsear y solo se parsean sus size
+                # bytes: si el CSV crece mientras se lee, lo nuevo queda afuera
+                fingerprint = compute_fingerprint(csv_path)
+                if chunked is None:
+                    chunked = os.path.getsize(csv_path) > CHUNKED_LOAD_THRESHOLD_MB * 1024 ** 2
+                progress("Leyendo archivo CSV...")
+                aggregates = None
+                if chunked:
+                    df, aggregates = load_data_streaming(csv_path, memory_budget_mb, progress=progress,
+                                                         size=fingerprint['size'])
+                else:
+                    df = compact_dataframe(read_processed_csv(csv_path, fingerprint['size']))
+                df = add_time_columns(sort_by_inicio(df))
+                if aggregates is not None and aggregates.cubes is not None:
+                    # Los cubos no dependen del orden de las filas: se reutilizan los de la lectura por bloques
+                    register_cubes(df, aggregates.cubes)
+                print(f"✅ Archivo cargado exitosamente: {len(df)} registros")
+                if use_cache:
+                    try:
+                        save_cache(df, csv_path, fingerprint)
+                    except OSError as e:
+                        print(f"⚠️ No se pudo guardar la caché: {e}")
+
+            print(f"Columnas disponibles: {list(df.columns)}")
+            return df, True, get_source_state(csv_path, len(df), fingerprint)
+
+        print("❌ Archivo no encontrado, creando datos de ejemplo...")
+    except Exception as e:
+        print(f"❌ Error al cargar archivo: {e}")
+        print("Creando datos de ejemplo...")
+
+    return add_time_columns(sort_by_inicio(compact_dataframe(create_sample_data()))), False, None
+
+
+def _read_header(csv_path):
+    with open(csv_path, 'rb') as f:
+        return f.readline()
+
+
+def get_source_state(csv_path, rows, fingerprint):
+    """Registrar hasta dónde se leyó el CSV: offset en bytes, filas, encabezado y hash del contenido
+
+    fingerprint es la huella (compute_fingerprint) de los bytes que se
+    parsearon; su tamaño es el offset desde el que sigue la próxima recarga.
+    """
+    return {
+        'path': csv_path,
+        'offset': fingerprint['size'],
+        'mtime_ns': fingerprint['mtime_ns'],
+        'rows': rows,
+        'header': _read_header(csv_path).decode(CSV_ENCODING),
+        'prefix_hash': fingerprint['hash'],
+    }
+
+
+def read_appended_rows(state, columns):
+    """Leer solo las filas agregadas al CSV desde la última lectura
+
+    Devuelve (filas nuevas, huella de lo leído hasta la última fila completa)
+    o None si el archivo no solo creció (encabezado distinto, archivo más
+    corto o bytes previos al offset modificados), en cuyo caso hay que
+    recargarlo completo. El hash de lo ya leído se continúa con los bytes
+    nuevos, así el archivo se recorre una sola vez.
+    """
+    csv_path = state['path']
+    if not os.path.exists(csv_path):
+        return None
+
+    stat = os.stat(csv_path)
+    if stat.st_size < state['offset']:
+        return None
+    if _read_header(csv_path).decode(CSV_ENCODING) != state['header']:
+        return None
+
+    with open(csv_path, 'rb') as f:
+        digest = prefix_digest(f, state['offset'] - 1)
+        last = f.read(1)
+        digest.update(last)
+        if digest.hexdigest() != state['prefix_hash']:
+            return None
+        if last != b'\n':
+            # La última fila leída estaba incompleta
+            return None
+        tail = f.read(stat.st_size - state['offset'])
+
+    # Una fila que se está escribiendo queda para la próxima recarga
+    tail = tail[:tail.rfind(b'\n') + 1]
+    digest.update(tail)
+    fingerprint = {'size': state['offset'] + len(tail), 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+    names = list(pd.read_csv(io.StringIO(state['header']), sep=CSV_SEP, nrows=0).columns)
+    if not tail.strip():
+        return pd.DataFrame(columns=columns), fingerprint
+
+    df = pd.read_csv(io.BytesIO(tail), sep=CSV_SEP, encoding=CSV_ENCODING, header=None, names=names,
+                     usecols=[column for column in names if column in columns])
+    if 'Inicio' in df.columns:
+        df['Inicio'] = pd.to_datetime(df['Inicio'], errors='coerce')
+    # Las columnas derivadas de Inicio no están en el CSV
+    if any(column in columns for column in TIME_COLUMNS):
+        add_time_columns(df)
+    return compact_dataframe(df[columns], report_memory=False), fingerprint
+
+
+def reload_data_incremental(df, state, use_cache=True, progress=None):
+    """Recargar el dataset leyendo solo las filas nuevas si el CSV solo creció
+
+    Si el CSV cambió en otra parte (o no hay estado previo) se recarga
+    completo con load_data_with_state. Si las filas nuevas son anteriores a
+    las ya cargadas se reordena el dataset por Inicio y se informa como
+    recarga completa (los índices se reconstruyen). Las columnas de df que no
+    salen del CSV (p. ej. las marcas de outliers) llegan en cero en las filas
+    nuevas: quien las agregó debe recalcularlas.
+
+    Returns:
+        tuple: (DataFrame, True si se cargó el archivo, nuevo estado,
+                filas agregadas o None si fue una recarga completa)
+    """
+    if progress is None:
+        progress = _no_progress
+
+    # El estado debe corresponder al DataFrame en memoria
+    if state is not None and state['rows'] == len(df):
+        progress("Buscando filas nuevas...")
+        names = list(pd.read_csv(io.StringIO(state['header']), sep=CSV_SEP, nrows=0).columns)
+        columns = [column for column in df.columns if column in names or column in TIME_COLUMNS]
+        appended = read_appended_rows(state, columns)
+        if appended is not None:
+            df_new, fingerprint = appended
+            if len(df_new) > 0:
+                progress(f"Agregando {len(df_new)} registros nuevos...")
+                for column in df.columns:
+                    if column not in df_new.columns:
+                        df_new[column] = np.zeros(len(df_new), dtype=df[column].dtype)
+                df = compact_dataframe(concat_compact([df, df_new[list(df.columns)]]), report_memory=False)
+                if not is_sorted_by_inicio(df):
+                    print("🔄 Filas nuevas fuera de orden, reordenando por Inicio...")
+                    df = sort_by_inicio(df)
+                    df_new = None
+                if use_cache:
+                    try:
+                        save_cache(df[columns], state['path'], fingerprint)
+                    except OSError as e:
+                        print(f"⚠️ No se pudo guardar la caché: {e}")
+            new_state = get_source_state(state['path'], len(df), fingerprint)
+            if df_new is None:
+                return df, True, new_state, None
+            print(f"✅ Recarga incremental: {len(df_new)} registros nuevos")
+            return df, True, new_state, len(df_new)
+        print("🔄 El archivo cambió, recargando completo...")
+
+    csv_path = state['path'] if state is not None else PROCESSED_CSV
+    df, file_loaded, new_state = load_data_with_state(csv_path, use_cache=use_cache, progress=progress)
+    return df, file_loaded, new_state, None
+
+
+def create_sample_data(n_samples=1000):
+    """Crear datos de ejemplo que simulan el dataset (fallback)"""
+    rng = np.random.default_rng()
+
+    grupos = rng.choice(list(GRUPOS_AGENTES.keys()), n_samples)
+    agentes = [rng.choice(GRUPOS_AGENTES[grupo]) for grupo in grupos]
+    inicio = pd.Timestamp('2025-09-22 09:50:00') + pd.to_timedelta(
+        rng.integers(0, 5, n_samples), unit='D') + pd.to_timedelta(rng.integers(0, 11 * 3600, n_samples), unit='s')
+
+    data = {
+        'Inicio': inicio,
+        'Nombre Agente': agentes,
+        'Tipificación': rng.choice(["Cae Muda o Cortada", "Llamada Completa", "No Contesta"], n_samples),
+        'TalkingTime': rng.exponential(scale=30, size=n_samples).round().astype(int),
+        'Sentido': rng.choice(["Manual", "Discador"], n_samples),
+        'Turno': rng.choice(["TT", "TM", "TN"], n_samples),
+        'grupo': grupos,
+    }
+
+    return pd.DataFrame(data)
+
+
+def get_available_groups():
+    """Obtener la lista de grupos de agentes disponibles"""
+    return list(GRUPOS_AGENTES.keys())
+
+
+def get_unique_values(df, column):
+    """Obtener valores únicos ordenados de una columna"""
+    if isinstance(df, SQLiteStore):
+        return df.get_unique_values(column)
+    if column not in df.columns:
+        return []
+    return sorted(str(value) for value in df[column].dropna().unique())
@@ -0,0 +1,76 @@
+"""
+Etapas del ETL de reportes diarios de Mitrol (crudo -> procesado)
+"""
+import numpy as np
+import pandas as pd
+
+from app.data.config import CSV_ENCODING, CSV_SEP, GRUPO_SIN_ASIGNAR, GRUPOS_AGENTES, TURNO_FUERA, TURNOS
+
+# Columnas que se conservan de cada reporte crudo
+COLUMNAS_REPORTE = ["Inicio", "Nombre Agente", "Tipificación", "Causa Terminación",
+                    "TalkingTime", "Sentido", "Origen Corte"]
+
+
+def _time_to_seconds(hora):
+    """Convertir 'HH:MM:SS' a segundos desde la medianoche"""
+    h, m, s = (int(parte) for parte in hora.split(':'))
+    return h * 3600 + m * 60 + s
+
+
+def assign_turno(inicio, turnos=TURNOS):
+    """Asignar turno a cada llamada según su hora de inicio (vectorizado)
+
+    Compara los segundos desde la medianoche contra los límites de cada
+    turno; las llamadas que no caen en ningún turno quedan 'fuera de turno'.
+    """
+    segundos = (inicio - inicio.dt.floor('D')).dt.total_seconds().to_numpy()
+
+    condiciones = []
+    for _, desde, hasta in turnos:
+        desde, hasta = _time_to_seconds(desde), _time_to_seconds(hasta)
+        if desde <= hasta:
+            condiciones.append((segundos >= desde) & (segundos <= hasta))
+        else:
+            # El turno cruza la medianoche (TN)
+            condiciones.append((segundos >= desde) | (segundos <= hasta))
+
+    nombres = [nombre for nombre, _, _ in turnos]
+    return pd.Series(np.select(condiciones, nombres, default=TURNO_FUERA), index=inicio.index)
+
+
+def build_agent_lookup(grupos=GRUPOS_AGENTES):
+    """Construir el diccionario agente -> grupo (gana el primer grupo listado)"""
+    lookup = {}
+    for grupo, agentes in grupos.items():
+        for agente in agentes:
+            lookup.setdefault(agente, grupo)
+    return lookup
+
+
+AGENTE_A_GRUPO = build_agent_lookup()
+
+
+def assign_grupo(agentes, lookup=AGENTE_A_GRUPO):
+    """Asignar el grupo (equipo) de cada agente mediante el diccionario agente -> grupo"""
+    return agentes.map(lookup).fillna(GRUPO_SIN_ASIGNAR)
+
+
+def read_report(path):
+    """Leer un reporte crudo de Mitrol como texto"""
+    df = pd.read_csv(path, sep=CSV_SEP, encoding=CSV_ENCODING, dtype=str)
+    return df[COLUMNAS_REPORTE]
+
+
+def process_report(path):
+    """Procesar un reporte crudo: filtros, tipos, turno y grupo"""
+    df = read_report(path)
+    df = df[(df['Tipificación'] != 'No Disp.') | (df['Causa Terminación'] == 'Se contacta con el operador')].copy()
+    df['TalkingTime'] = pd.to_numeric(df['TalkingTime'], errors='coerce').astype('Int64')
+
+    df['Inicio'] = pd.to_datetime(df['Inicio'], dayfirst=True)
+    df['Turno'] = assign_turno(df['Inicio'])
+    df = df.dropna(subset=['Nombre Agente'])
+    df = df.dropna(subset=['TalkingTime'])
+    df['grupo'] = assign_grupo(df['Nombre Agente'])
+
+    return df.reset_index(drop=True)
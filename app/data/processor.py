@@ -0,0 +1,188 @@
+"""
+Módulo de procesamiento y filtrado de datos
+"""
+import numpy as np
+
+from app.data.cube import cube_selection, get_cubes, refine_cube_selection, register_cube_selection, select_cube
+from app.data.expressions import build_filter_expression, select_rows
+from app.data.filter_index import get_filter_index
+from app.data.registry import IdentityRegistry
+from app.data.result_cache import RESULT_CACHE
+from app.data.sorted_cells import get_selection, get_sorted_cells, register_selection, sorted_quantiles
+from app.data.sqlite_backend import SQLiteStore
+from app.data.stats import StatsSummary, combine_summaries
+
+# Resultado de un filtro -> StatsSummary
+_SUMMARIES = IdentityRegistry()
+
+
+def filter_data(df, grupos_filtrados, tipificacion_filtrada, turno_filtrado):
+    """Filtrar datos por grupos, tipificación y turno
+
+    Con tipificacion_filtrada=None no se filtra por tipificación. Es un atajo
+    de filter_by_expression con build_filter_expression.
+    """
+    return filter_by_expression(df, build_filter_expression(grupos_filtrados, tipificacion_filtrada,
+                                                            turno_filtrado))
+
+
+def filter_by_expression(df, expr):
+    """Filtrar datos con una expresión de filtrado (ver app.data.expressions)
+
+    Si df es un SQLiteStore la expresión se traduce a SQL; si tiene un
+    FilterIndex asociado, los predicados de grupo/Turno/Tipificación se
+    resuelven con bitmaps. El resultado se guarda en RESULT_CACHE (no
+    modificarlo en el lugar).
+    """
+    return RESULT_CACHE.get_or_compute(df, ('expr', expr.key()), _filter_by_expression, df, expr)
+
+
+def _filter_by_expression(df, expr):
+    if isinstance(df, SQLiteStore):
+        return df.filter_expression(expr)
+    if len(df) == 0:
+        return df
+
+    result = df.iloc[select_rows(df, expr, get_filter_index(df))]
+
+    # Los gráficos se responden desde el cubo con la misma expresión
+    cubes = get_cubes(df)
+    if cubes is not None:
+        register_cube_selection(result, cubes, expr)
+
+    # Si es una unión de celdas, recordar cuáles para calcular sus cuantiles sin ordenar
+    cells = get_sorted_cells(df)
+    selection = expr.cell_selection()
+    if cells is not None and selection is not None:
+        register_selection(result, cells, cells.select(*selection))
+    return result
+
+
+def apply_extremes_filter(df_filtrado, quitar_x_porciento_extremo_sup):
+    """Quitar el porcentaje superior de valores extremos de TalkingTime"""
+    if quitar_x_porciento_extremo_sup <= 0 or len(df_filtrado) == 0:
+        return df_filtrado
+
+    key = ('extremes', float(quitar_x_porciento_extremo_sup))
+    return RESULT_CACHE.get_or_compute(df_filtrado, key, _apply_extremes_filter, df_filtrado,
+                                       quitar_x_porciento_extremo_sup)
+
+
+def _apply_extremes_filter(df_filtrado, quitar_x_porciento_extremo_sup):
+    limite_sup = talking_time_quantiles(df_filtrado, [1 - quitar_x_porciento_extremo_sup])[0]
+    result = df_filtrado[df_filtrado["TalkingTime"] <= limite_sup]
+    refine_cube_selection(df_filtrado, result, limite_sup)
+
+    selection = get_selection(df_filtrado)
+    if selection is not None:
+        cells, keys, limite_previo = selection
+        if limite_previo is not None:
+            limite_sup = min(limite_sup, limite_previo)
+        register_selection(result, cells, keys, limite_sup)
+    return result
+
+
+def talking_time_quantiles(df_filtrado, qs):
+    """Cuantiles de TalkingTime (interpolación lineal, como pandas)
+
+    Si df_filtrado es el resultado de filter_data/apply_extremes_filter sobre
+    un dataset con celdas ordenadas, se responden desde esas celdas sin
+    ordenar los datos; si no, desde el histograma del cubo de datos.
+    """
+    selection = get_selection(df_filtrado)
+    if selection is not None:
+        cells, keys, limite_sup = selection
+        return sorted_quantiles(cells.arrays(keys, limite_sup), qs)
+    selection = cube_selection(df_filtrado)
+    if selection is not None and len(df_filtrado) > 0:
+        return selection.summary().quantile(qs)
+    return df_filtrado["TalkingTime"].quantile(qs).to_numpy()
+
+
+def calculate_bins(df_filtrado, df_comp_filtrado, size_bin):
+    """Calcular bins del histograma considerando ambos datasets"""
+    max_value = 0
+    for df in (df_filtrado, df_comp_filtrado):
+        summary = get_summary(df)
+        if summary is not None:
+            max_value = max(max_value, summary.max)
+
+    if max_value > 0:
+        return np.arange(0, max_value + size_bin, size_bin)
+    return np.array([0, size_bin])
+
+
+def get_summary(df_filtrado):
+    """Resumen combinable (StatsSummary) de TalkingTime, o None si no hay datos
+
+    Para resultados de filter_data/apply_extremes_filter sobre un dataset
+    con celdas precalculadas se combinan los resúmenes de las celdas (o los
+    histogramas del cubo, si hay filtros de fecha u hora) sin recorrer las
+    filas.
+    """
+    if len(df_filtrado) == 0:
+        return None
+
+    # El resumen de un resultado se guarda mientras el resultado exista:
+    # bins, histogramas, boxplot y panel de estadísticas lo piden varias veces
+    summary = _SUMMARIES.get(df_filtrado)
+    if summary is not None:
+        return summary
+
+    selection = get_selection(df_filtrado)
+    if selection is not None:
+        cells, keys, limite_sup = selection
+        summary = combine_summaries(cells.summaries[key] for key in keys)
+        if limite_sup is not None:
+            summary = summary.truncate(limite_sup)
+    else:
+        selection = cube_selection(df_filtrado)
+        if selection is not None:
+            summary = selection.summary()
+        else:
+            summary = StatsSummary.from_values(df_filtrado["TalkingTime"].to_numpy())
+
+    return _SUMMARIES.set(df_filtrado, summary)
+
+
+def get_group_summaries(df_filtrado, column='grupo'):
+    """{valor de column: StatsSummary} de un resultado de filtro (desde el cubo de datos si se puede)"""
+    if len(df_filtrado) == 0:
+        return {}
+
+    selection = cube_selection(df_filtrado)
+    if selection is not None and column in selection.cube.codes:
+        summaries = {value: part.summary() for value, part in selection.split(column).items()}
+        return {value: summary for value, summary in summaries.items() if summary.count > 0}
+    return {str(value): StatsSummary.from_values(values.to_numpy())
+            for value, values in df_filtrado.groupby(column, observed=True)['TalkingTime']}
+
+
+def summarize_expression(df, expr):
+    """StatsSummary de las filas de df que cumplen expr, o None si no hay datos
+
+    Si el cubo de datos puede resolver la expresión se suman sus
+    histogramas sin filtrar las filas.
+    """
+    selection = select_cube(df, expr)
+    if selection is not None:
+        return selection.summary() if selection.count() else None
+    return get_summary(filter_by_expression(df, expr))
+
+
+def get_descriptive_stats(df_filtrado):
+    """Obtener estadísticas descriptivas de TalkingTime (mismo formato que describe())"""
+    summary = get_summary(df_filtrado)
+    return summary.describe() if summary is not None else None
+
+
+def calculate_comparison_stats(stats_principal, stats_comp):
+    """Calcular diferencias entre el grupo de comparación y el principal (a partir de StatsSummary)"""
+    if stats_principal is None or stats_comp is None:
+        return None
+
+    return {
+        'media_diff': stats_comp.mean - stats_principal.mean,
+        'mediana_diff': stats_comp.median() - stats_principal.median(),
+        'std_diff': stats_comp.std() - stats_principal.std(),
+    }
@@ -0,0 +1,32 @@
+"""
+Registro de estructuras asociadas a un DataFrame sin prolongar su vida
+
+Índices, celdas, cubos, resúmenes, curvas y tasas se calculan para un
+DataFrame (o un resultado de filtro) concreto. Los DataFrames no se pueden
+usar como clave de diccionario, así que se guardan por id() junto con una
+referencia débil: como un id() puede reutilizarse cuando el objeto se
+libera, una entrada solo vale mientras su referencia siga apuntando al mismo
+objeto. Las entradas de objetos ya liberados se descartan al registrar otras.
+"""
+import weakref
+
+
+class IdentityRegistry:
+    """Valores asociados a objetos por identidad (id() + referencia débil)"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def set(self, obj, value):
+        """Asociar value a obj (reemplaza lo que tuviera)"""
+        for key in [key for key, (ref, _) in self._entries.items() if ref() is None]:
+            del self._entries[key]
+        self._entries[id(obj)] = (weakref.ref(obj), value)
+        return value
+
+    def get(self, obj, default=None):
+        """Valor asociado a obj, o default si no tiene (o si era de otro objeto con el mismo id)"""
+        ref, value = self._entries.get(id(obj), (None, None))
+        if ref is None or ref() is not obj:
+            return default
+        return value
@@ -0,0 +1,86 @@
+"""
+Caché LRU de resultados de filtrado compartida entre pestañas
+
+filter_data y apply_extremes_filter se llaman varias veces con los mismos
+argumentos en cada actualización de gráficos. Los resultados se guardan
+con una clave normalizada (filtro + versión del dataset de entrada) y se
+descartan los menos usados al superar la cantidad de entradas o la memoria
+configuradas.
+"""
+import itertools
+from collections import OrderedDict
+
+from app.data.config import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_MB
+from app.data.registry import IdentityRegistry
+
+# Dataset -> versión
+_VERSIONS = IdentityRegistry()
+_NEXT_VERSION = itertools.count(1)
+
+
+def dataset_version(dataset):
+    """Versión de un dataset: cambia cuando se reemplaza por otro objeto (p. ej. al recargar)"""
+    version = _VERSIONS.get(dataset)
+    if version is None:
+        version = _VERSIONS.set(dataset, next(_NEXT_VERSION))
+    return version
+
+
+def _result_size(result):
+    if hasattr(result, 'memory_usage'):
+        return int(result.memory_usage(deep=True).sum())
+    return 0
+
+
+class ResultCache:
+    """Caché LRU acotada por cantidad de entradas y por bytes, con contadores de aciertos"""
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_mb=RESULT_CACHE_MAX_MB):
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 1024 ** 2
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, dataset, key, func, *args):
+        """Devolver el resultado guardado para (versión de dataset, key) o calcularlo con func(*args)"""
+        key = (dataset_version(dataset),) + key
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses += 1
+        result = func(*args)
+        size = _result_size(result)
+        if size <= self.max_bytes:
+            self.entries[key] = (result, size)
+            self.total_bytes += size
+            self._evict()
+        return result
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, (_, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Contadores de aciertos/fallos y ocupación actual"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+            'mb': self.total_bytes / 1024 ** 2,
+        }
+
+
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,143 @@
+"""
+TalkingTime ordenado por celda (grupo, Turno, Tipificación) para cuantiles
+
+Los filtros de la aplicación son uniones de grupos dentro de un turno y una
+tipificación, así que cualquier selección es una unión de celdas. Al cargar
+el dataset se guarda el TalkingTime de cada celda ya ordenado; los
+cuantiles de una selección se obtienen con una selección ponderada sobre
+esos arrays (búsqueda binaria en el rango de valores contando con
+np.searchsorted en cada celda), sin volver a ordenar los datos. Cada celda
+guarda además su StatsSummary, que se combina para cualquier selección.
+"""
+import numpy as np
+import pandas as pd
+
+from app.data.registry import IdentityRegistry
+from app.data.stats import StatsSummary, interpolate_quantile, quantile_ranks
+
+# DataFrame -> SortedCells
+_CELLS = IdentityRegistry()
+# Resultado de un filtro -> (SortedCells, claves de celda, límite superior)
+_SELECTIONS = IdentityRegistry()
+
+
+class SortedCells:
+    """Arrays ordenados de TalkingTime por celda (grupo, Turno, Tipificación)"""
+    KEYS = ['grupo', 'Turno', 'Tipificación']
+
+    def __init__(self, df):
+        self.rows = 0
+        self.cells = {}
+        self.summaries = {}
+        self.extend(df)
+
+    def copy(self):
+        """Copia que se puede extender sin modificar estas celdas (los arrays se reemplazan, no se modifican)"""
+        cells = SortedCells.__new__(SortedCells)
+        cells.rows = self.rows
+        cells.cells = dict(self.cells)
+        cells.summaries = dict(self.summaries)
+        return cells
+
+    def extend(self, df_new):
+        """Agregar filas nuevas intercalándolas en los arrays ya ordenados"""
+        values = df_new['TalkingTime'].to_numpy()
+        for key, positions in df_new.groupby(self.KEYS, observed=True, sort=False).indices.items():
+            key = tuple(str(value) for value in key)
+            new = np.sort(values[positions])
+            summary = StatsSummary.from_values(new)
+            previous = self.cells.get(key)
+            if previous is not None:
+                new = np.insert(previous, np.searchsorted(previous, new, side='right'), new)
+                summary = self.summaries[key].merge(summary)
+            self.cells[key] = new
+            self.summaries[key] = summary
+        self.rows += len(df_new)
+
+    def select(self, grupos_filtrados, tipificacion_filtrada, turno_filtrado):
+        """Claves de las celdas que forman la selección"""
+        grupos = set(grupos_filtrados)
+        return [key for key in self.cells
+                if key[0] in grupos and key[1] == turno_filtrado
+                and (tipificacion_filtrada is None or key[2] == tipificacion_filtrada)]
+
+    def arrays(self, keys, limite_sup=None):
+        """Arrays ordenados de las celdas, recortados a valores <= limite_sup"""
+        arrays = [self.cells[key] for key in keys]
+        if limite_sup is not None:
+            arrays = [values[:np.searchsorted(values, limite_sup, side='right')] for values in arrays]
+        return [values for values in arrays if len(values)]
+
+
+def _kth(arrays, ks):
+    """k-ésimos menores valores (base 0) de la unión de arrays ordenados de enteros
+
+    Búsqueda binaria sobre el rango de valores, simultánea para todos los k:
+    en cada paso se cuenta con searchsorted cuántos valores de cada celda son
+    <= al candidato.
+    """
+    lo = np.full(len(ks), min(int(values[0]) for values in arrays), dtype=np.int64)
+    hi = np.full(len(ks), max(int(values[-1]) for values in arrays), dtype=np.int64)
+    while (lo < hi).any():
+        mid = (lo + hi) // 2
+        count_le = sum(values.searchsorted(mid, side='right') for values in arrays)
+        above = count_le > ks
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid + 1)
+    return lo
+
+
+def sorted_quantiles(arrays, qs):
+    """Cuantiles con interpolación lineal (como pandas) sobre la unión de arrays ordenados"""
+    n = sum(len(values) for values in arrays)
+    if n == 0:
+        return np.full(len(qs), np.nan)
+    below, above, t = quantile_ranks(n, qs)
+    values = _kth(arrays, np.concatenate([below, above]))
+    a, b = values[:len(below)].astype(np.float64), values[len(below):].astype(np.float64)
+    return interpolate_quantile(a, b, t)
+
+
+def build_sorted_cells(df, previous=None, appended_rows=None):
+    """Construir las celdas ordenadas de df, o extender las anteriores con las filas agregadas
+
+    Se extiende una copia, así las celdas anteriores siguen valiendo para su
+    DataFrame si la recarga falla. Devuelve None si TalkingTime no es entero
+    (con nulos, p. ej.): en ese caso los cuantiles se calculan con pandas.
+    """
+    if 'TalkingTime' not in df.columns or not pd.api.types.is_integer_dtype(df['TalkingTime']) \
+            or any(column not in df.columns for column in SortedCells.KEYS):
+        return None
+
+    if previous is not None and appended_rows is not None and previous.rows + appended_rows == len(df):
+        cells = previous.copy()
+        if appended_rows:
+            cells.extend(df.iloc[len(df) - appended_rows:])
+    else:
+        cells = SortedCells(df)
+
+    return _CELLS.set(df, cells)
+
+
+def get_sorted_cells(df):
+    """Celdas ordenadas asociadas a df, o None si no hay vigentes"""
+    cells = _CELLS.get(df)
+    if cells is None or cells.rows != len(df):
+        return None
+    return cells
+
+
+def register_selection(result, cells, keys, limite_sup=None):
+    """Recordar que result son las filas de las celdas keys (con TalkingTime <= limite_sup)"""
+    _SELECTIONS.set(result, (cells, keys, limite_sup))
+
+
+def get_selection(df):
+    """(SortedCells, claves, límite) de un resultado de filtro, o None si no se conoce"""
+    entry = _SELECTIONS.get(df)
+    if entry is None:
+        return None
+    cells, keys, limite_sup = entry
+    if sum(len(values) for values in cells.arrays(keys, limite_sup)) != len(df):
+        return None
+    return cells, keys, limite_sup
@@ -0,0 +1,175 @@
+"""
+Backend opcional de llamadas en SQLite con filtros resueltos en la base
+
+Las llamadas se guardan en una base SQLite junto al CSV procesado, con
+índices sobre (grupo, Turno, Tipificación) y sobre Inicio, de modo que los
+filtros se ejecutan como SQL y a pandas solo llegan las filas que coinciden.
+El backend en memoria (DataFrame) sigue siendo el predeterminado.
+"""
+import os
+import sqlite3
+
+import pandas as pd
+
+from app.data.cache import compute_fingerprint
+
+SQLITE_SUFFIX = '.sqlite'
+INSERT_BATCH_ROWS = 100_000
+
+# Columnas del DataFrame -> columnas de la tabla
+SQL_COLUMNS = {
+    'Inicio': 'inicio',
+    'Nombre Agente': 'agente',
+    'Tipificación': 'tipificacion',
+    'TalkingTime': 'talking_time',
+    'Sentido': 'sentido',
+    'Turno': 'turno',
+    'grupo': 'grupo',
+}
+SQL_TYPES = {
+    'inicio': 'INTEGER',  # nanosegundos desde epoch (ordenable y compacto)
+    'agente': 'TEXT',
+    'tipificacion': 'TEXT',
+    'talking_time': 'INTEGER',
+    'sentido': 'TEXT',
+    'turno': 'TEXT',
+    'grupo': 'TEXT',
+}
+
+
+def get_sqlite_path(csv_path):
+    """Ruta de la base SQLite asociada a un CSV (junto al CSV)"""
+    return os.path.splitext(csv_path)[0] + SQLITE_SUFFIX
+
+
+class SQLiteStore:
+    """Tabla de llamadas en SQLite con la misma interfaz de filtrado que el DataFrame"""
+
+    def __init__(self, db_path=':memory:'):
+        self.db_path = db_path
+        # La base se crea en el hilo de carga y se consulta desde el hilo de Tk
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL" if db_path != ':memory:' else "PRAGMA journal_mode=MEMORY")
+        self.columns = pd.Index(list(SQL_COLUMNS))
+
+    def create_schema(self):
+        """Crear la tabla, sus índices y la tabla de metadatos"""
+        columns_sql = ', '.join(f"{name} {SQL_TYPES[name]}" for name in SQL_COLUMNS.values())
+        self.conn.executescript(f"""
+            DROP TABLE IF EXISTS llamadas;
+            DROP TABLE IF EXISTS meta;
+            CREATE TABLE llamadas ({columns_sql});
+            CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT);
+        """)
+
+    def create_indexes(self):
+        """Crear índices de filtrado (después de insertar, que es más rápido)"""
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_llamadas_filtros ON llamadas (grupo, turno, tipificacion);
+            CREATE INDEX IF NOT EXISTS idx_llamadas_inicio ON llamadas (inicio);
+            ANALYZE;
+        """)
+
+    def append(self, df):
+        """Insertar filas de un DataFrame (p. ej. las agregadas en una recarga)"""
+        df = df[[column for column in SQL_COLUMNS if column in df.columns]]
+        names = [SQL_COLUMNS[column] for column in df.columns]
+        placeholders = ', '.join('?' for _ in names)
+        sql = f"INSERT INTO llamadas ({', '.join(names)}) VALUES ({placeholders})"
+
+        for start in range(0, len(df), INSERT_BATCH_ROWS):
+            batch = df.iloc[start:start + INSERT_BATCH_ROWS]
+            columns = []
+            for column in batch.columns:
+                values = batch[column]
+                missing = values.isna()
+                if pd.api.types.is_datetime64_any_dtype(values):
+                    values = values.astype('datetime64[ns]').fillna(pd.Timestamp(0)).astype('int64')
+                elif pd.api.types.is_integer_dtype(values):
+                    values = values.astype('int64')
+                columns.append(values.astype(object).where(~missing, None).tolist())
+            self.conn.executemany(sql, zip(*columns))
+        self.conn.commit()
+
+    def set_meta(self, clave, valor):
+        self.conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, str(valor)))
+        self.conn.commit()
+
+    def get_meta(self, clave):
+        try:
+            row = self.conn.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        return row[0] if row else None
+
+    @classmethod
+    def from_dataframe(cls, df, db_path=':memory:', fingerprint=None):
+        """Construir la base a partir de un DataFrame"""
+        store = cls(db_path)
+        store.create_schema()
+        store.append(df)
+        store.create_indexes()
+        if fingerprint is not None:
+            store.set_meta('fingerprint', fingerprint['hash'])
+        store.columns = pd.Index([column for column in SQL_COLUMNS if column in df.columns])
+        return store
+
+    @classmethod
+    def open_or_build(cls, csv_path, progress=None):
+        """Abrir la base junto al CSV si corresponde a su contenido actual, o reconstruirla"""
+        # Importación local: loader importa este módulo
+        from app.data.loader import load_data
+
+        db_path = get_sqlite_path(csv_path)
+        fingerprint = compute_fingerprint(csv_path)
+        if os.path.exists(db_path):
+            store = cls(db_path)
+            if store.get_meta('fingerprint') == fingerprint['hash']:
+                print(f"✅ Base SQLite cargada: {len(store)} registros")
+                return store
+            store.close()
+
+        df, _ = load_data(csv_path, progress=progress)
+        if progress is not None:
+            progress("Construyendo base SQLite...")
+        store = cls.from_dataframe(df, db_path, fingerprint)
+        print(f"✅ Base SQLite construida: {len(store)} registros")
+        return store
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM llamadas").fetchone()[0]
+
+    def query(self, where='', params=()):
+        """Ejecutar un SELECT sobre llamadas y devolver un DataFrame compacto"""
+        # Importación local: loader importa este módulo
+        from app.data.loader import compact_dataframe
+
+        select = ', '.join(f'{SQL_COLUMNS[column]} AS "{column}"' for column in self.columns)
+        sql = f"SELECT {select} FROM llamadas" + (f" WHERE {where}" if where else '')
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        if 'Inicio' in df.columns:
+            df['Inicio'] = pd.to_datetime(df['Inicio'], unit='ns')
+        return compact_dataframe(df, report_memory=False)
+
+    def filter_data(self, grupos_filtrados, tipificacion_filtrada, turno_filtrado):
+        """Filtrar por grupos, tipificación y turno en SQL (usa idx_llamadas_filtros)"""
+        # Importación local: expressions importa este módulo para traducir columnas
+        from app.data.expressions import build_filter_expression
+
+        return self.filter_expression(build_filter_expression(grupos_filtrados, tipificacion_filtrada,
+                                                              turno_filtrado))
+
+    def filter_expression(self, expr):
+        """Filtrar con una expresión de filtrado traducida a SQL"""
+        return self.query(*expr.to_sql())
+
+    def get_unique_values(self, column):
+        """Valores distintos de una columna, resueltos en SQL"""
+        if column not in SQL_COLUMNS:
+            return []
+        name = SQL_COLUMNS[column]
+        rows = self.conn.execute(f"SELECT DISTINCT {name} FROM llamadas WHERE {name} IS NOT NULL ORDER BY {name}")
+        return [str(row[0]) for row in rows]
+
+    def close(self):
+        self.conn.close()
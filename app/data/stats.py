@@ -0,0 +1,196 @@
+"""
+Motor de estadísticas descriptivas combinables
+
+StatsSummary resume una muestra de TalkingTime en una sola pasada: conteo,
+media, suma de cuadrados de desvíos (M2, para la varianza), mínimo, máximo
+y un sketch de cuantiles. Como TalkingTime son segundos enteros, el sketch
+es un histograma por segundo (np.bincount) y los cuantiles que da son
+exactos. Dos resúmenes se combinan sin volver a las filas (fórmula de Chan
+para media y M2, suma de histogramas), así que los resúmenes por celda
+calculados al cargar alcanzan para cualquier selección de grupos.
+"""
+import numpy as np
+import pandas as pd
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def quantile_ranks(n, qs):
+    """Posiciones (base 0) entre las que se interpola cada cuantil q de n valores ordenados
+
+    n puede ser un array con un total por grupo.
+
+    Returns:
+        tuple: (posición inferior, posición superior, fracción entre ambas)
+    """
+    n = np.asarray(n)
+    h = (n - 1) * np.asarray(qs, dtype=np.float64)
+    below = np.floor(h).astype(np.int64)
+    return below, np.minimum(below + 1, n - 1), h - below
+
+
+def interpolate_quantile(a, b, t):
+    """Interpolación lineal entre los valores de las posiciones de quantile_ranks
+
+    Misma fórmula que np.quantile (y pandas) para obtener exactamente los
+    mismos valores.
+    """
+    return np.where(t >= 0.5, b - (b - a) * (1 - t), a + (b - a) * t)
+
+
+class StatsSummary:
+    """Resumen combinable: conteo, media, M2, mínimo, máximo y sketch de cuantiles"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=np.inf, maximum=-np.inf, sketch=None, values=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+        # Histograma por segundo (enteros >= 0); si los valores no son enteros
+        # se guardan ordenados en values para que los cuantiles sigan siendo exactos
+        self.sketch = sketch if sketch is not None else (np.zeros(0, dtype=np.int64) if values is None else None)
+        self.values = values
+
+    @classmethod
+    def from_values(cls, values):
+        """Resumir un array de valores (se ignoran los NaN)"""
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls()
+
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        minimum, maximum = values.min(), values.max()
+        if minimum >= 0 and (values.dtype.kind in 'iu' or np.array_equal(values, np.floor(values))):
+            return cls(len(values), mean, m2, float(minimum), float(maximum),
+                       sketch=np.bincount(values.astype(np.int64)))
+        return cls(len(values), mean, m2, float(minimum), float(maximum), values=np.sort(values))
+
+    @classmethod
+    def from_histogram(cls, hist):
+        """Resumir un histograma por segundo"""
+        n = int(hist.sum())
+        if n == 0:
+            return cls()
+        seconds = np.arange(len(hist), dtype=np.float64)
+        mean = float((seconds * hist).sum() / n)
+        m2 = float((hist * np.square(seconds - mean)).sum())
+        nonzero = np.flatnonzero(hist)
+        return cls(n, mean, m2, float(nonzero[0]), float(nonzero[-1]), sketch=hist)
+
+    def merge(self, other):
+        """Combinar con otro resumen (como si se hubieran resumido todas las filas juntas)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.count / n
+        m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / n
+
+        if self.sketch is not None and other.sketch is not None:
+            sketch = np.zeros(max(len(self.sketch), len(other.sketch)), dtype=np.int64)
+            sketch[:len(self.sketch)] += self.sketch
+            sketch[:len(other.sketch)] += other.sketch
+            return StatsSummary(n, mean, m2, min(self.min, other.min), max(self.max, other.max), sketch=sketch)
+
+        values = np.sort(np.concatenate([self.sorted_values(), other.sorted_values()]))
+        return StatsSummary(n, mean, m2, min(self.min, other.min), max(self.max, other.max), values=values)
+
+    def sorted_values(self):
+        """Valores ordenados (a partir del histograma si no se guardaron)"""
+        if self.values is not None:
+            return self.values
+        return np.repeat(np.arange(len(self.sketch), dtype=np.float64), self.sketch)
+
+    def truncate(self, limite_sup):
+        """Resumen de los valores <= limite_sup"""
+        if self.sketch is not None:
+            return StatsSummary.from_histogram(self.sketch[:max(int(np.floor(limite_sup)) + 1, 0)])
+        return StatsSummary.from_values(self.values[:np.searchsorted(self.values, limite_sup, side='right')])
+
+    def histogram(self, bins):
+        """Cantidad de valores en cada intervalo de bins (bordes crecientes, como np.histogram)
+
+        Con el histograma por segundo no se vuelve a los valores: si los
+        bordes son enteros y equiespaciados cada intervalo es la suma de un
+        tramo del histograma (una suma por filas de una matriz); si no, se
+        interpola la cantidad acumulada en cada borde repartiendo cada
+        segundo k de forma uniforme en [k, k + 1). El último intervalo
+        incluye su borde derecho.
+        """
+        bins = np.asarray(bins, dtype=np.float64)
+        if self.sketch is None:
+            return np.histogram(self.values, bins)[0]
+
+        sketch = self.sketch
+        if len(sketch) == 0:
+            return np.zeros(len(bins) - 1, dtype=np.int64)
+        width = bins[1] - bins[0]
+        if width >= 1 and width == np.floor(width) and bins[0] == np.floor(bins[0]) \
+                and np.all(np.diff(bins) == width) and bins[0] >= 0:
+            start, width, n_bins = int(bins[0]), int(width), len(bins) - 1
+            window = np.zeros(n_bins * width, dtype=np.int64)
+            segment = sketch[start:start + len(window)]
+            window[:len(segment)] = segment
+            counts = window.reshape(n_bins, width).sum(axis=1)
+            last = start + len(window)
+            if last < len(sketch):
+                counts[-1] += sketch[last]
+            return counts
+
+        # Cantidad acumulada de valores menores que x, lineal dentro de cada
+        # segundo; en los bordes extremos es exacta para no perder valores del rango
+        below = np.concatenate([[0], np.cumsum(sketch)]).astype(np.float64)
+        x = np.clip(bins, 0, len(sketch))
+        floor = np.minimum(np.floor(x).astype(np.int64), len(sketch) - 1)
+        cumulative = below[floor] + (x - floor) * sketch[floor]
+        cumulative[0] = below[int(np.ceil(x[0]))]
+        cumulative[-1] = below[min(int(np.floor(bins[-1])) + 1, len(sketch))] if bins[-1] >= 0 else 0
+        return np.diff(cumulative)
+
+    def variance(self):
+        """Varianza muestral (ddof=1, como pandas)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    def std(self):
+        return float(np.sqrt(self.variance()))
+
+    def quantile(self, qs):
+        """Cuantiles con interpolación lineal (como pandas)"""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+
+        below, above, t = quantile_ranks(self.count, qs)
+        if self.sketch is not None:
+            cumulative = np.cumsum(self.sketch)
+            a = np.searchsorted(cumulative, below, side='right').astype(np.float64)
+            b = np.searchsorted(cumulative, above, side='right').astype(np.float64)
+        else:
+            a, b = self.values[below], self.values[above]
+        return interpolate_quantile(a, b, t)
+
+    def median(self):
+        return float(self.quantile([0.5])[0])
+
+    def describe(self):
+        """Serie con el mismo formato que Series.describe()"""
+        q1, q2, q3 = self.quantile([0.25, 0.5, 0.75])
+        if self.count == 0:
+            return pd.Series([0] + [np.nan] * 7, index=DESCRIBE_INDEX, name='TalkingTime', dtype=np.float64)
+        return pd.Series([self.count, self.mean, self.std(), self.min, q1, q2, q3, self.max],
+                         index=DESCRIBE_INDEX, name='TalkingTime', dtype=np.float64)
+
+
+def combine_summaries(summaries):
+    """Combinar una lista de resúmenes en uno"""
+    result = StatsSummary()
+    for summary in summaries:
+        result = result.merge(summary)
+    return result
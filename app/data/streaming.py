@@ -0,0 +1,175 @@
+"""
+Carga por bloques (out-of-core) para datasets de varios meses
+
+El CSV procesado se lee en chunks con solo las columnas que usa la
+aplicación; cada chunk se convierte a la representación compacta y se
+acumula en los agregados que necesitan los gráficos (resúmenes e
+histogramas por celda y los cubos de datos), de modo que el historial
+completo nunca está en memoria como texto crudo.
+
+Con keep_rows=False las filas de cada chunk se descartan después de
+acumularlas: la memoria pico es la de un chunk (acotada por el
+presupuesto) más la de los agregados, que crece con la cantidad de celdas
+y no con la de registros.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.data.config import CSV_ENCODING, CSV_SEP, GUI_COLUMNS, MEMORY_BUDGET_MB
+from app.data.cube import cubes_supported, new_cubes
+from app.data.stats import StatsSummary, combine_summaries
+
+SAMPLE_ROWS = 2000
+MIN_CHUNK_ROWS = 1000
+
+
+def estimate_chunk_rows(csv_path, memory_budget_mb=MEMORY_BUDGET_MB):
+    """Estimar cuántas filas por chunk entran en el presupuesto de memoria
+
+    Mide la memoria por fila de una muestra leída como texto y deja margen
+    para las copias que hace pandas al parsear.
+    """
+    sample = pd.read_csv(csv_path, sep=CSV_SEP, encoding=CSV_ENCODING, nrows=SAMPLE_ROWS,
+                         usecols=lambda column: column in GUI_COLUMNS, dtype=str)
+    if len(sample) == 0:
+        return MIN_CHUNK_ROWS
+
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    budget_bytes = memory_budget_mb * 1024 ** 2 / 3
+    return max(MIN_CHUNK_ROWS, int(budget_bytes / bytes_per_row))
+
+
+class StreamingAggregates:
+    """Agregados construidos chunk a chunk
+
+    Por cada celda (grupo, Turno, Tipificación) un StatsSummary (conteo,
+    media, M2, mínimo, máximo e histograma por segundo) y, si los chunks lo
+    permiten, los mismos cubos de datos que build_cubes, extendidos con cada
+    chunk.
+    """
+    KEYS = ['grupo', 'Turno', 'Tipificación']
+
+    def __init__(self):
+        self.rows = 0
+        self.summaries = {}
+        self.cubes = None
+        self._cubes_ok = True
+
+    def update(self, chunk):
+        """Acumular un chunk (ya con tipos compactos)"""
+        self.rows += len(chunk)
+        if len(chunk) == 0:
+            return
+
+        # Los cubos necesitan TalkingTime entero en todos los chunks; si uno
+        # no lo cumple se descartan y los gráficos usan las filas
+        if self._cubes_ok and cubes_supported(chunk):
+            if self.cubes is None:
+                self.cubes = new_cubes(chunk.columns)
+            for cube in self.cubes.values():
+                cube.extend(chunk)
+        else:
+            self._cubes_ok = False
+            self.cubes = None
+
+        if any(column not in chunk.columns for column in self.KEYS + ['TalkingTime']):
+            return
+        values = chunk['TalkingTime'].to_numpy()
+        for key, positions in chunk.groupby(self.KEYS, observed=True, sort=False).indices.items():
+            key = tuple(str(value) for value in key)
+            summary = StatsSummary.from_values(values[positions])
+            previous = self.summaries.get(key)
+            self.summaries[key] = summary if previous is None else previous.merge(summary)
+
+    def counts(self):
+        """Tabla con conteo, media y desvío de TalkingTime por celda"""
+        rows = [key + (summary.count, summary.mean, summary.std()) for key, summary in self.summaries.items()]
+        return pd.DataFrame(rows, columns=self.KEYS + ['count', 'mean', 'std'])
+
+    def summary(self, grupos, turno, tipificacion=None):
+        """StatsSummary de la unión de celdas seleccionadas (tipificacion=None: todas)"""
+        grupos = set(grupos)
+        return combine_summaries(summary for (grupo, t, tip), summary in self.summaries.items()
+                                 if grupo in grupos and t == turno
+                                 and (tipificacion is None or tip == tipificacion))
+
+    def histogram(self, grupos, turno, tipificacion=None):
+        """Histograma (conteo por segundo) de la unión de celdas seleccionadas, o None si TalkingTime no es entero"""
+        return self.summary(grupos, turno, tipificacion).sketch
+
+
+def _union_categorical(columns):
+    """Concatenar columnas (categóricas o no) en una categórica con categorías unificadas"""
+    categorias = set()
+    for column in columns:
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            categorias.update(column.cat.categories)
+        else:
+            categorias.update(column.dropna().astype(str))
+    categorias = sorted(categorias)
+
+    codes = [pd.Categorical(column if isinstance(column.dtype, pd.CategoricalDtype)
+                            else column.where(column.isna(), column.astype(str)),
+                            categories=categorias).codes
+             for column in columns]
+    return pd.Categorical.from_codes(np.concatenate(codes), categorias)
+
+
+def concat_compact(chunks):
+    """Unir DataFrames compactos unificando las categorías de cada columna"""
+    if not chunks:
+        return pd.DataFrame(columns=GUI_COLUMNS)
+
+    data = {}
+    for column in chunks[0].columns:
+        columns = [chunk[column] for chunk in chunks]
+        if any(isinstance(values.dtype, pd.CategoricalDtype) for values in columns):
+            data[column] = _union_categorical(columns)
+        else:
+            data[column] = np.concatenate([values.to_numpy() for values in columns])
+    return pd.DataFrame(data)
+
+
+def load_data_streaming(csv_path, memory_budget_mb=MEMORY_BUDGET_MB, progress=None, keep_rows=True, size=None):
+    """Leer el CSV por bloques construyendo los agregados incrementalmente
+
+    El texto crudo en memoria se limita a un chunk, cuyo tamaño se calcula a
+    partir de memory_budget_mb. Con keep_rows=True también se conservan las
+    filas en formato compacto (columnas GUI_COLUMNS); con keep_rows=False
+    solo se mantienen los agregados y la memoria pico queda acotada por el
+    presupuesto, independientemente de la cantidad de registros. Si se pasa
+    progress, se llama con un mensaje de avance después de cada chunk. Con
+    size solo se leen los primeros size bytes del archivo (ver open_prefix).
+
+    Returns:
+        tuple: (DataFrame compacto o None, StreamingAggregates)
+    """
+    # Importación local: loader importa este módulo
+    from app.data.loader import compact_dataframe, open_prefix
+
+    chunk_rows = estimate_chunk_rows(csv_path, memory_budget_mb)
+    size_mb = os.path.getsize(csv_path) / 1024 ** 2
+    print(f"📦 Carga por bloques: {size_mb:.0f} MB en chunks de {chunk_rows} filas "
+          f"(presupuesto {memory_budget_mb} MB)")
+
+    aggregates = StreamingAggregates()
+    chunks = []
+    with open_prefix(csv_path, size) as f:
+        reader = pd.read_csv(f, sep=CSV_SEP, encoding=CSV_ENCODING, chunksize=chunk_rows,
+                             usecols=lambda column: column in GUI_COLUMNS)
+        for chunk in reader:
+            if 'Inicio' in chunk.columns:
+                chunk['Inicio'] = pd.to_datetime(chunk['Inicio'], errors='coerce')
+            chunk = compact_dataframe(chunk, report_memory=False)
+            aggregates.update(chunk)
+            if keep_rows:
+                chunks.append(chunk)
+            if progress is not None:
+                progress(f"Leídos {aggregates.rows} registros...")
+
+    if not keep_rows:
+        return None, aggregates
+    # Los chunks pueden tener enteros de distinto tamaño: se vuelve a compactar la unión
+    return compact_dataframe(concat_compact(chunks), report_memory=False), aggregates
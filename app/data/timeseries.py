@@ -0,0 +1,112 @@
+"""
+Series temporales de TalkingTime en varias resoluciones
+
+Los agregados por hora, día, semana y mes (cantidad, media, mediana y P90)
+salen de los cubos de datos construidos al cargar: el cubo horario
+principal y los cubos de series por día, semana y mes (SERIES_CUBES), que
+guardan los histogramas por segundo de cada celda y período. Si el cubo de
+la resolución no puede resolver el filtro (p. ej. un rango de fechas corta
+una semana) se agrupa el cubo horario por esa resolución, y solo sin cubos
+se vuelve a las filas.
+
+Para el gráfico se elige la resolución según el rango visible y cada curva
+se reduce con LTTB (Largest-Triangle-Three-Buckets) a una cantidad fija de
+puntos, así que dibujar no depende de la longitud del historial.
+"""
+import numpy as np
+import pandas as pd
+
+from app.data.config import TIMESERIES_MAX_PERIODS, TIMESERIES_MAX_POINTS
+from app.data.cube import NAT_PERIOD, SERIES_CUBES, cube_selection, period_index, period_start
+
+# Resoluciones de la más fina a la más gruesa: nombre -> período de period_index
+RESOLUTIONS = {'hora': 'h', 'dia': 'D', 'semana': 'W', 'mes': 'M'}
+
+# Nombre visible -> resolución (None = automática)
+RESOLUTION_CHOICES = {'Automática': None, 'Hora': 'hora', 'Día': 'dia', 'Semana': 'semana', 'Mes': 'mes'}
+
+# Clave del cubo horario para agrupar por cada resolución
+HOURLY_KEYS = {'hora': 'periodo', 'dia': 'fecha', 'semana': 'semana', 'mes': 'mes'}
+
+SERIES_COLUMNS = ['periodo', 'count', 'mean', 'median', 'p90']
+
+
+def visible_range(df_filtrado):
+    """(primer, último) Inicio de la selección como datetime64[ns], o None si no hay fechas"""
+    selection = cube_selection(df_filtrado)
+    if selection is not None:
+        cube = selection.cube
+        periods = cube.periods[selection.mask & (cube.periods != NAT_PERIOD)]
+        if len(periods) == 0:
+            return None
+        return (period_start(periods.min(keepdims=True), cube.period)[0],
+                period_start(periods.max(keepdims=True) + 1, cube.period)[0] - np.timedelta64(1, 'ns'))
+
+    inicio = df_filtrado['Inicio'].to_numpy(dtype='datetime64[ns]')
+    inicio = inicio[~np.isnat(inicio)]
+    if len(inicio) == 0:
+        return None
+    return inicio.min(), inicio.max()
+
+
+def choose_resolution(start, end, max_periods=TIMESERIES_MAX_PERIODS):
+    """Resolución más fina con hasta max_periods períodos entre start y end"""
+    bounds = np.array([start, end], dtype='datetime64[ns]')
+    for resolution, period in RESOLUTIONS.items():
+        first, last = period_index(bounds, period)
+        if last - first + 1 <= max_periods:
+            return resolution
+    return resolution
+
+
+def series_stats(df_filtrado, resolution):
+    """Cantidad, media, mediana y P90 de TalkingTime por período (columnas SERIES_COLUMNS)"""
+    attempts = [('llamadas', HOURLY_KEYS[resolution])]
+    if resolution in SERIES_CUBES:
+        attempts.insert(0, (SERIES_CUBES[resolution][0], 'periodo'))
+
+    for cube_name, key in attempts:
+        selection = cube_selection(df_filtrado, cube_name)
+        stats = selection.group_stats([key], quantiles=[0.5, 0.9]) if selection is not None else None
+        if stats is not None:
+            stats = stats.rename(columns={key: 'periodo', 0.5: 'median', 0.9: 'p90'})
+            return stats[SERIES_COLUMNS]
+
+    # Sin cubos: agrupar las filas por período
+    period = RESOLUTIONS[resolution]
+    periods = period_index(df_filtrado['Inicio'].to_numpy(dtype='datetime64[ns]'), period)
+    valid = periods != NAT_PERIOD
+    grouped = df_filtrado['TalkingTime'][valid].groupby(periods[valid])
+    stats = grouped.agg(['count', 'mean', 'median'])
+    stats['p90'] = grouped.quantile(0.9)
+    stats.insert(0, 'periodo', pd.to_datetime(period_start(stats.index.to_numpy(), period)))
+    return stats.reset_index(drop=True)[SERIES_COLUMNS]
+
+
+def lttb(x, y, n_out=TIMESERIES_MAX_POINTS):
+    """Índices de los n_out puntos que conserva LTTB (el primero y el último siempre)
+
+    Los puntos intermedios se reparten en n_out - 2 tramos; de cada tramo
+    se queda el punto que forma el triángulo de mayor área con el punto
+    elegido en el tramo anterior y el promedio del tramo siguiente.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x, next_y = x[end:edges[bucket + 2]].mean(), y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        a = selected[bucket]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        selected[bucket + 1] = start + int(np.argmax(area))
+    return selected
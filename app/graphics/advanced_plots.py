@@ -6,38 +6,71 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
 
+from app.data.config import TIME_COLUMNS
+from app.data.cube import cube_selection
+from app.data.loader import add_time_columns
+from app.data.timeseries import choose_resolution, lttb, series_stats, visible_range
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Etiquetas de cada resolución de las series temporales para leyendas y título
+RESOLUTION_LABELS = {'hora': 'hora', 'dia': 'día', 'semana': 'semana', 'mes': 'mes'}
+
+
+def _time_columns(df):
+    """Arrays hour, weekday y day_index de df (las columnas del cargador, o calculadas si faltan)"""
+    if all(column in df.columns for column in TIME_COLUMNS):
+        return tuple(df[column].to_numpy() for column in TIME_COLUMNS)
+    # Resultados sin las columnas derivadas (p. ej. backend SQLite): se calculan solo desde Inicio
+    derived = add_time_columns(pd.DataFrame({'Inicio': pd.to_datetime(df['Inicio'].to_numpy())}))
+    return tuple(derived[column].to_numpy() for column in TIME_COLUMNS)
+
+
+def _activity_counts(df):
+    """Llamadas por día de la semana (filas, lunes primero) y hora (24 columnas) desde el cubo, o None"""
+    selection = cube_selection(df)
+    stats = selection.group_stats(['dia_semana', 'hora']) if selection is not None else None
+    if stats is None:
+        return None
+    counts = np.zeros((7, 24), dtype=np.int64)
+    counts[stats['dia_semana'].to_numpy(), stats['hora'].to_numpy()] = stats['count'].to_numpy()
+    return pd.DataFrame(counts, index=DAY_ORDER, columns=range(24))
+
+
+def _activity_pivot(df):
+    """Pivot día de la semana × hora con la cantidad de llamadas"""
+    pivot_data = _activity_counts(df)
+    if pivot_data is not None:
+        return pivot_data
+
+    # Un solo bincount sobre día × 24 + hora (las filas sin Inicio no cuentan)
+    hour, weekday, _ = _time_columns(df)
+    valid = weekday >= 0
+    slots = weekday[valid].astype(np.int64) * 24 + hour[valid]
+    counts = np.bincount(slots, minlength=7 * 24).reshape(7, 24)
+    return pd.DataFrame(counts, index=DAY_ORDER, columns=range(24))
+
 
 def plot_activity_heatmap(ax, df_filtrado, df_comp_filtrado=None, comparar_activo=False):
     """Crear heatmap de actividad por hora y día"""
-    # Usar el DataFrame principal, o combinado si hay comparación
-    df_to_use = df_filtrado
+    # Usar el DataFrame principal, o la suma de ambos si hay comparación
+    frames = [df_filtrado]
     if comparar_activo and len(df_comp_filtrado) > 0:
-        df_to_use = pd.concat([df_filtrado, df_comp_filtrado], ignore_index=True)
+        frames.append(df_comp_filtrado)
+    frames = [frame for frame in frames if len(frame) > 0]
 
-    if len(df_to_use) == 0 or 'Inicio' not in df_to_use.columns:
+    if not frames or 'Inicio' not in frames[0].columns:
         ax.text(0.5, 0.5, 'Sin datos temporales\ndisponibles', ha='center', va='center',
                 transform=ax.transAxes, fontsize=12)
         return
 
-    df_temp = df_to_use.copy()
-    if not pd.api.types.is_datetime64_any_dtype(df_temp['Inicio']):
-        df_temp['Inicio'] = pd.to_datetime(df_temp['Inicio'])
-
-    df_temp['Hora'] = df_temp['Inicio'].dt.hour
-    df_temp['Dia_Semana'] = df_temp['Inicio'].dt.day_name()
-
-    # Crear pivot table
-    pivot_data = df_temp.groupby(['Dia_Semana', 'Hora']).size().unstack(fill_value=0)
-
-    # Asegurar orden de días
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    pivot_data = pivot_data.reindex(day_order, fill_value=0)
+    pivot_data = sum(_activity_pivot(frame) for frame in frames)
 
     # Crear heatmap con estilo similar al resto de gráficos
     im = ax.imshow(pivot_data, cmap='Blues', aspect='auto')
     ax.set_xticks(range(24))
     ax.set_xticklabels(range(24))
-    ax.set_yticks(range(len(day_order)))
+    ax.set_yticks(range(len(DAY_ORDER)))
     ax.set_yticklabels(['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'])
 
     ax.set_xlabel("Hora del día")
@@ -46,26 +79,35 @@ def plot_activity_heatmap(ax, df_filtrado, df_comp_filtrado=None, comparar_activ
     ax.grid(True, alpha=0.3)
 
 
-def plot_time_series(ax, df):
-    """Crear gráfico de series de tiempo"""
-    if len(df) == 0 or 'Inicio' not in df.columns:
+def plot_time_series(ax, df, resolution=None):
+    """Crear gráfico de series de tiempo
+
+    Con resolution=None se elige la resolución según el rango de fechas de
+    la selección; cada curva se reduce con LTTB a TIMESERIES_MAX_POINTS.
+    """
+    date_range = visible_range(df) if len(df) > 0 and 'Inicio' in df.columns else None
+    if date_range is None:
         ax.text(0.5, 0.5, 'Sin datos de tiempo\ndisponibles', ha='center', va='center',
                 transform=ax.transAxes, fontsize=12)
         return
 
-    # Convertir a datetime si es necesario
-    df_temp = df.copy()
-    if not pd.api.types.is_datetime64_any_dtype(df_temp['Inicio']):
-        df_temp['Inicio'] = pd.to_datetime(df_temp['Inicio'])
-
-    # Agrupar por día y calcular estadísticas
-    df_temp['Fecha'] = df_temp['Inicio'].dt.date
-    daily_stats = df_temp.groupby('Fecha')['TalkingTime'].agg(['mean', 'median', 'count']).reset_index()
-
-    ax.plot(daily_stats['Fecha'], daily_stats['mean'], marker='o', label='Media diaria', linewidth=2)
-    ax.plot(daily_stats['Fecha'], daily_stats['median'], marker='s', label='Mediana diaria', linewidth=2)
-
-    ax.set_title("Evolución Temporal de TalkingTime")
+    if resolution is None:
+        resolution = choose_resolution(*date_range)
+    series = series_stats(df, resolution)
+    x = series['periodo'].to_numpy()
+    label = RESOLUTION_LABELS[resolution]
+
+    shown = 0
+    for column, name, marker in [('mean', 'Media', 'o'), ('median', 'Mediana', 's'), ('p90', 'P90', '^')]:
+        values = series[column].to_numpy()
+        keep = lttb(x.astype(np.int64), values)
+        shown = max(shown, len(keep))
+        # Marcadores solo si hay pocos puntos
+        ax.plot(x[keep], values[keep], marker=marker if len(keep) <= 60 else None, markersize=4,
+                label=f'{name} por {label}', linewidth=2 if column != 'p90' else 1)
+
+    points = f"{len(series)} puntos" if shown == len(series) else f"{shown} de {len(series)} puntos (LTTB)"
+    ax.set_title(f"Evolución Temporal de TalkingTime\n(por {label}, {points})")
     ax.set_xlabel("Fecha")
     ax.set_ylabel("Tiempo de conversación (segundos)")
     ax.legend()
@@ -80,8 +122,11 @@ def plot_agent_performance(ax, df):
                 transform=ax.transAxes, fontsize=12)
         return
 
-    # Calcular estadísticas por agente
-    agent_stats = df.groupby('Nombre Agente')['TalkingTime'].agg(['mean', 'count']).reset_index()
+    # Calcular estadísticas por agente (desde el cubo por agente si está disponible)
+    selection = cube_selection(df, 'agentes')
+    agent_stats = selection.group_stats(['Nombre Agente']) if selection is not None else None
+    if agent_stats is None:
+        agent_stats = df.groupby('Nombre Agente', observed=True)['TalkingTime'].agg(['mean', 'count']).reset_index()
     agent_stats = agent_stats[agent_stats['count'] >= 5]  # Filtrar agentes con pocas llamadas
     agent_stats = agent_stats.sort_values('mean', ascending=True).head(5)  # Top 5
 
@@ -96,29 +141,75 @@ def plot_agent_performance(ax, df):
     ax.grid(True, alpha=0.3, axis='x')
 
 
-def plot_correlation_matrix(ax, df):
-    """Crear matriz de correlación"""
-    if len(df) == 0:
-        ax.text(0.5, 0.5, 'Sin datos para\ncorrelación', ha='center', va='center',
-                transform=ax.transAxes, fontsize=12)
-        return
-
+def _correlation_from_rows(df):
+    """Matriz de correlación calculada sobre las filas"""
     # Seleccionar columnas numéricas relevantes
     numeric_cols = ['TalkingTime']
 
-    # Agregar variables categóricas codificadas
-    df_corr = df.copy()
-    df_corr['Turno_TM'] = (df_corr['Turno'] == 'TM').astype(int)
-    df_corr['Turno_TT'] = (df_corr['Turno'] == 'TT').astype(int)
-    df_corr['Sentido_Manual'] = (df_corr['Sentido'] == 'Manual').astype(int) if 'Sentido' in df.columns else 0
+    # Agregar variables categóricas codificadas (en un DataFrame nuevo, sin copiar df)
+    df_corr = pd.DataFrame({'TalkingTime': df['TalkingTime'].to_numpy()})
+    df_corr['Turno_TM'] = (df['Turno'] == 'TM').to_numpy(dtype=int)
+    df_corr['Turno_TT'] = (df['Turno'] == 'TT').to_numpy(dtype=int)
+    df_corr['Sentido_Manual'] = (df['Sentido'] == 'Manual').to_numpy(dtype=int) if 'Sentido' in df.columns else 0
 
-    # Si hay columna de fecha, agregar información temporal
+    # Si hay columna de fecha, agregar información temporal (NaN sin Inicio, como antes)
     if 'Inicio' in df.columns:
-        df_corr['Hora'] = pd.to_datetime(df_corr['Inicio']).dt.hour
+        hour, _, _ = _time_columns(df)
+        df_corr['Hora'] = np.where(hour >= 0, hour, np.nan)
         numeric_cols.append('Hora')
 
     corr_cols = numeric_cols + ['Turno_TM', 'Turno_TT', 'Sentido_Manual']
-    corr_matrix = df_corr[corr_cols].corr()
+    return df_corr[corr_cols].corr()
+
+
+def _correlation_from_cube(df):
+    """Matriz de correlación desde los totales de las celdas del cubo, o None
+
+    Hora, turno y sentido son constantes dentro de una celda, así que los
+    momentos cruzados con TalkingTime salen de la cantidad, la suma y la
+    suma de cuadrados de cada celda.
+    """
+    selection = cube_selection(df)
+    totals = selection.cell_totals() if selection is not None else None
+    if totals is None:
+        return None
+    cube = selection.cube
+    cells, count, total, total_sq = totals
+    hours = cube.key_values('hora')[cells]
+    if (hours < 0).any():
+        # Con Inicio nulo pandas descarta la fila solo en los pares con Hora
+        return None
+
+    def indicator(column, value):
+        code = cube.categories[column].index(value) if value in cube.categories[column] else -2
+        return (cube.codes[column][cells] == code).astype(np.float64)
+
+    columns = ['TalkingTime', 'Hora', 'Turno_TM', 'Turno_TT', 'Sentido_Manual']
+    x = np.column_stack([hours.astype(np.float64), indicator('Turno', 'TM'), indicator('Turno', 'TT'),
+                         indicator('Sentido', 'Manual')])
+    n = count.sum()
+    mean_x = count @ x / n
+    mean_t = total.sum() / n
+    cov = np.empty((len(columns), len(columns)))
+    cov[0, 0] = total_sq.sum() / n - mean_t ** 2
+    cov[0, 1:] = cov[1:, 0] = total @ x / n - mean_t * mean_x
+    cov[1:, 1:] = (x.T * count) @ x / n - np.outer(mean_x, mean_x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.sqrt(np.diag(cov))
+        corr = cov / np.outer(std, std)
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def plot_correlation_matrix(ax, df):
+    """Crear matriz de correlación"""
+    if len(df) == 0:
+        ax.text(0.5, 0.5, 'Sin datos para\ncorrelación', ha='center', va='center',
+                transform=ax.transAxes, fontsize=12)
+        return
+
+    corr_matrix = _correlation_from_cube(df)
+    if corr_matrix is None:
+        corr_matrix = _correlation_from_rows(df)
 
     # Crear heatmap
     im = ax.imshow(corr_matrix, cmap='coolwarm', aspect='auto', vmin=-1, vmax=1)
@@ -144,25 +235,13 @@ def plot_hourly_heatmap(ax, df):
                 transform=ax.transAxes, fontsize=12)
         return
 
-    df_temp = df.copy()
-    if not pd.api.types.is_datetime64_any_dtype(df_temp['Inicio']):
-        df_temp['Inicio'] = pd.to_datetime(df_temp['Inicio'])
-
-    df_temp['Hora'] = df_temp['Inicio'].dt.hour
-    df_temp['Dia_Semana'] = df_temp['Inicio'].dt.day_name()
-
-    # Crear pivot table
-    pivot_data = df_temp.groupby(['Dia_Semana', 'Hora']).size().unstack(fill_value=0)
-
-    # Asegurar orden de días
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    pivot_data = pivot_data.reindex(day_order, fill_value=0)
+    pivot_data = _activity_pivot(df)
 
     # Crear heatmap
     im = ax.imshow(pivot_data, cmap='YlOrRd', aspect='auto')
     ax.set_xticks(range(24))
     ax.set_xticklabels(range(24))
-    ax.set_yticks(range(len(day_order)))
+    ax.set_yticks(range(len(DAY_ORDER)))
     ax.set_yticklabels(['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'])
 
     ax.set_xlabel("Hora del día")
@@ -1,6 +1,39 @@
 """
 Módulo para gráficos de boxplot
 """
+import numpy as np
+from matplotlib import cbook
+
+from app.data.processor import get_summary
+
+
+def _box_stats(df_filtrado, label):
+    """Estadísticas de la caja (formato de Axes.bxp)
+
+    Con el histograma por segundo del resumen (celdas o cubo de datos) no
+    se recorren las filas: cuartiles, bigotes a 1.5 IQR y valores atípicos
+    salen del histograma. Si no, se calculan con matplotlib sobre las filas.
+    """
+    summary = get_summary(df_filtrado)
+    if summary is None or summary.sketch is None:
+        return cbook.boxplot_stats(df_filtrado["TalkingTime"].to_numpy(), labels=[label])[0]
+
+    q1, median, q3 = summary.quantile([0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    seconds = np.flatnonzero(summary.sketch)
+    inside = seconds[(seconds >= q1 - 1.5 * iqr) & (seconds <= q3 + 1.5 * iqr)]
+    return {
+        'label': label,
+        'mean': summary.mean,
+        'med': median,
+        'q1': q1,
+        'q3': q3,
+        'iqr': iqr,
+        'whislo': inside.min() if len(inside) else q1,
+        'whishi': inside.max() if len(inside) else q3,
+        # Un punto por valor distinto (los repetidos se dibujan en el mismo lugar)
+        'fliers': np.setdiff1d(seconds, inside),
+    }
 
 
 def plot_boxplot_simple(ax, df_filtrado):
@@ -8,8 +41,7 @@ def plot_boxplot_simple(ax, df_filtrado):
     if len(df_filtrado) == 0:
         return
 
-    bp = ax.boxplot([df_filtrado["TalkingTime"]], vert=True, patch_artist=True,
-                   labels=['Principal'])
+    bp = ax.bxp([_box_stats(df_filtrado, 'Principal')], patch_artist=True)
     bp['boxes'][0].set_facecolor('lightblue')
     bp['boxes'][0].set_alpha(0.7)
 
@@ -20,15 +52,15 @@ def plot_boxplot_comparison(ax, ax_twin, df_filtrado, df_comp_filtrado):
     """Crear boxplot con comparación (doble eje Y)"""
     # Boxplot grupo principal (eje Y izquierdo)
     if len(df_filtrado) > 0:
-        bp1 = ax.boxplot([df_filtrado["TalkingTime"]], positions=[0.8], widths=0.6,
-                         vert=True, patch_artist=True, labels=['Principal'])
+        bp1 = ax.bxp([_box_stats(df_filtrado, 'Principal')], positions=[0.8], widths=0.6,
+                     patch_artist=True)
         bp1['boxes'][0].set_facecolor('lightblue')
         bp1['boxes'][0].set_alpha(0.7)
 
     # Boxplot grupo comparación (eje Y derecho)
     if len(df_comp_filtrado) > 0:
-        bp2 = ax_twin.boxplot([df_comp_filtrado["TalkingTime"]], positions=[1.2], widths=0.6,
-                              vert=True, patch_artist=True, labels=['Comparación'])
+        bp2 = ax_twin.bxp([_box_stats(df_comp_filtrado, 'Comparación')], positions=[1.2], widths=0.6,
+                          patch_artist=True)
         bp2['boxes'][0].set_facecolor('lightcoral')
         bp2['boxes'][0].set_alpha(0.7)
 
@@ -49,4 +81,4 @@ def plot_boxplot_comparison(ax, ax_twin, df_filtrado, df_comp_filtrado):
 def configure_boxplot_axes(ax):
     """Configurar ejes del boxplot"""
     ax.set_title("Boxplot de\nTalkingTime")
-    ax.grid(True, alpha=0.3)
\ No newline at end of file
+    ax.grid(True, alpha=0.3)
@@ -0,0 +1,31 @@
+"""
+Módulo para gráficos de comparaciones múltiples entre grupos
+"""
+import numpy as np
+
+
+def plot_pvalue_matrix(ax, grupos, counts, pvalues, title, alpha=0.05):
+    """Crear matriz de p-valores por par de grupos (con * los pares con p < alpha)"""
+    k = len(grupos)
+    display = np.where(np.eye(k, dtype=bool), np.nan, pvalues)
+    im = ax.imshow(display, cmap='RdYlGn', vmin=0, vmax=max(alpha * 4, 0.2), aspect='auto')
+
+    labels = [f"{grupo}\n(n={count})" for grupo, count in zip(grupos, counts)]
+    ax.set_xticks(range(k))
+    ax.set_yticks(range(k))
+    ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
+    ax.set_yticklabels(labels, fontsize=8)
+
+    # Agregar valores en las celdas
+    for i in range(k):
+        for j in range(k):
+            if i == j:
+                text = '—'
+            elif np.isnan(pvalues[i, j]):
+                text = 's/d'
+            else:
+                text = f"{pvalues[i, j]:.3f}" + ('*' if pvalues[i, j] < alpha else '')
+            ax.text(j, i, text, ha="center", va="center", color="black", fontsize=8)
+
+    ax.set_title(title, fontsize=10)
+    return im
@@ -2,27 +2,44 @@
 Módulo para gráficos de histograma con KDE
 """
 import numpy as np
-from scipy import stats
 
+from app.data.kde import kde_curve
+from app.data.processor import get_summary
 
-def plot_histogram_simple(ax, df_filtrado, bins, mostrar_kde=False):
+
+def _plot_talking_time_hist(ax, bins, summary, **kwargs):
+    """Barras del histograma de TalkingTime a partir del resumen de la selección
+
+    Las cantidades por intervalo salen del histograma por segundo del
+    resumen (StatsSummary.histogram), así que cambiar el ancho de intervalo
+    no vuelve a las filas.
+    """
+    counts = summary.histogram(bins)
+    ax.bar(bins[:-1], counts, width=np.diff(bins), align='edge', **kwargs)
+
+
+def _plot_kde(ax, df_filtrado, bins, kde_bandwidth, **kwargs):
+    """Curva KDE escalada a la frecuencia del histograma (no se dibuja si no hay dispersión)"""
+    curve = kde_curve(df_filtrado, kde_bandwidth)
+    if curve is None:
+        return
+    x_range, kde_values = curve
+    # Escalar KDE para que coincida con la escala del histograma
+    ax.plot(x_range, kde_values * len(df_filtrado) * (bins[1] - bins[0]), linewidth=2, alpha=0.8, **kwargs)
+
+
+def plot_histogram_simple(ax, df_filtrado, bins, mostrar_kde=False, kde_bandwidth='scott'):
     """Crear histograma simple"""
     if len(df_filtrado) == 0:
         return
 
-    ax.hist(df_filtrado["TalkingTime"], bins=bins, edgecolor="black", alpha=0.7,
-            color='skyblue', label=f'Grupo Principal ({len(df_filtrado)} registros)')
+    summary = get_summary(df_filtrado)
+    _plot_talking_time_hist(ax, bins, summary, edgecolor="black", alpha=0.7,
+                            color='skyblue', label=f'Grupo Principal ({len(df_filtrado)} registros)')
 
     # Agregar curva KDE si está activada
     if mostrar_kde:
-        kde_data = df_filtrado["TalkingTime"]
-        kde = stats.gaussian_kde(kde_data)
-        x_range = np.linspace(kde_data.min(), kde_data.max(), 200)
-        kde_values = kde(x_range)
-        # Escalar KDE para que coincida con la escala del histograma
-        kde_scaled = kde_values * len(kde_data) * (bins[1] - bins[0])
-        ax.plot(x_range, kde_scaled, color='darkblue', linewidth=2,
-               label='KDE', alpha=0.8)
+        _plot_kde(ax, df_filtrado, bins, kde_bandwidth, color='darkblue', label='KDE')
 
     # Mostrar leyenda si hay KDE
     if mostrar_kde:
@@ -31,39 +48,28 @@ def plot_histogram_simple(ax, df_filtrado, bins, mostrar_kde=False):
     ax.set_ylabel("Frecuencia")
 
 
-def plot_histogram_comparison(ax, ax_twin, df_filtrado, df_comp_filtrado, bins, mostrar_kde=False):
+def plot_histogram_comparison(ax, ax_twin, df_filtrado, df_comp_filtrado, bins, mostrar_kde=False,
+                              kde_bandwidth='scott'):
     """Crear histograma con comparación (doble eje Y)"""
     # Histograma grupo principal (eje Y izquierdo)
     if len(df_filtrado) > 0:
-        ax.hist(df_filtrado["TalkingTime"], bins=bins, edgecolor="black", alpha=0.7,
-                color='skyblue', label=f'Principal ({len(df_filtrado)} reg)')
+        summary = get_summary(df_filtrado)
+        _plot_talking_time_hist(ax, bins, summary, edgecolor="black", alpha=0.7,
+                                color='skyblue', label=f'Principal ({len(df_filtrado)} reg)')
 
         # Agregar curva KDE si está activada
         if mostrar_kde:
-            kde_data = df_filtrado["TalkingTime"]
-            kde = stats.gaussian_kde(kde_data)
-            x_range = np.linspace(kde_data.min(), kde_data.max(), 200)
-            kde_values = kde(x_range)
-            # Escalar KDE para que coincida con la escala del histograma
-            kde_scaled = kde_values * len(kde_data) * (bins[1] - bins[0])
-            ax.plot(x_range, kde_scaled, color='darkblue', linewidth=2,
-                   label='KDE Principal', alpha=0.8)
+            _plot_kde(ax, df_filtrado, bins, kde_bandwidth, color='darkblue', label='KDE Principal')
 
     # Histograma grupo comparación (eje Y derecho)
     if len(df_comp_filtrado) > 0:
-        ax_twin.hist(df_comp_filtrado["TalkingTime"], bins=bins, edgecolor="darkred", alpha=0.7,
-                    color='red', label=f'Comparación ({len(df_comp_filtrado)} reg)')
+        summary_comp = get_summary(df_comp_filtrado)
+        _plot_talking_time_hist(ax_twin, bins, summary_comp, edgecolor="darkred", alpha=0.7,
+                                color='red', label=f'Comparación ({len(df_comp_filtrado)} reg)')
 
         # Agregar curva KDE para comparación si está activada
         if mostrar_kde:
-            kde_data_comp = df_comp_filtrado["TalkingTime"]
-            kde_comp = stats.gaussian_kde(kde_data_comp)
-            x_range_comp = np.linspace(kde_data_comp.min(), kde_data_comp.max(), 200)
-            kde_values_comp = kde_comp(x_range_comp)
-            # Escalar KDE para que coincida con la escala del histograma
-            kde_scaled_comp = kde_values_comp * len(kde_data_comp) * (bins[1] - bins[0])
-            ax_twin.plot(x_range_comp, kde_scaled_comp, color='darkred', linewidth=2,
-                        label='KDE Comparación', alpha=0.8)
+            _plot_kde(ax_twin, df_comp_filtrado, bins, kde_bandwidth, color='darkred', label='KDE Comparación')
 
     # Configurar ejes
     ax.set_ylabel("Frecuencia (Principal)", color='blue')
@@ -88,4 +94,4 @@ def configure_histogram_axes(ax, bins):
     else:
         ax.set_xticks(bins)
     ax.tick_params(axis='x', rotation=45)
-    ax.grid(True, alpha=0.3)
\ No newline at end of file
+    ax.grid(True, alpha=0.3)
@@ -4,38 +4,63 @@ Módulo para gráficos de distribución de tipificaciones
 import numpy as np
 import pandas as pd
 
+from app.data.cube import select_cube
+from app.data.expressions import build_filter_expression
+from app.data.processor import filter_by_expression
 
-def plot_tipifications_distribution(ax, df, grupos_filtrados, turno_filtrado,
-                                   df_comp=None, grupos_comp_filtrados=None,
-                                   turno_comp_filtrado=None, comparar_activo=False):
-    """Crear gráfico de distribución de tipificaciones"""
 
-    # Filtrar datos del grupo principal
-    df_total_filtered = df[(df["grupo"].isin(grupos_filtrados)) & (df["Turno"] == turno_filtrado)]
+def _tipifications_filter(grupos, turno, date_filter):
+    expr = build_filter_expression(grupos, None, turno)
+    return expr if date_filter is None else date_filter & expr
 
-    # Obtener datos de comparación para tipificaciones
-    df_comp_total_filtered = pd.DataFrame()
-    if comparar_activo and df_comp is not None and grupos_comp_filtrados:
-        df_comp_total_filtered = df[(df["grupo"].isin(grupos_comp_filtrados)) &
-                                   (df["Turno"] == turno_comp_filtrado)]
 
-    if len(df_total_filtered) == 0:
+def _tipification_counts(df, expr):
+    """(conteo por tipificación, total de registros) de las filas que cumplen expr
+
+    Se responde sumando celdas del cubo de datos; solo si no hay cubo se
+    filtran las filas.
+    """
+    selection = select_cube(df, expr)
+    stats = selection.group_stats(['Tipificación']) if selection is not None else None
+    if stats is not None:
+        counts = stats.set_index('Tipificación')['count'].sort_values(ascending=False, kind='stable')
+        return counts, selection.count()
+
+    df_filtered = filter_by_expression(df, expr)
+    # Con columnas categóricas value_counts incluye tipificaciones sin registros
+    counts = df_filtered['Tipificación'].value_counts()
+    return counts[counts > 0], len(df_filtered)
+
+
+def tipification_data(df, grupos_filtrados, turno_filtrado, grupos_comp_filtrados=None,
+                      turno_comp_filtrado=None, comparar_activo=False, date_filter=None):
+    """Conteos por tipificación del grupo principal y del de comparación
+
+    Devuelve ((conteos, total), (conteos_comp, total_comp)) para
+    plot_tipifications_distribution; sin comparación el segundo par queda vacío.
+    """
+    principal = _tipification_counts(df, _tipifications_filter(grupos_filtrados, turno_filtrado, date_filter))
+    comparacion = (pd.Series(dtype=int), 0)
+    if comparar_activo and grupos_comp_filtrados:
+        comparacion = _tipification_counts(
+            df, _tipifications_filter(grupos_comp_filtrados, turno_comp_filtrado, date_filter))
+    return principal, comparacion
+
+
+def plot_tipifications_distribution(ax, tipifications, comparar_activo=False):
+    """Crear gráfico de distribución de tipificaciones (tipifications: resultado de tipification_data)"""
+    (tipificacion_counts, total_records), (tipificacion_counts_comp, total_records_comp) = tipifications
+
+    if total_records == 0:
         ax.text(0.5, 0.5, 'Sin datos\npara mostrar', ha='center', va='center',
                 transform=ax.transAxes, fontsize=10)
         ax.set_title("Distribución de\nTipificaciones", fontsize=10)
         return
 
-    # Obtener conteos y porcentajes
-    tipificacion_counts = df_total_filtered['Tipificación'].value_counts()
-    total_records = len(df_total_filtered)
+    # Obtener porcentajes
     percentages = (tipificacion_counts / total_records) * 100
-
-    # Obtener tipificaciones de comparación
-    tipificacion_counts_comp = pd.Series(dtype=int)
     percentages_comp = pd.Series(dtype=float)
-    if len(df_comp_total_filtered) > 0:
-        tipificacion_counts_comp = df_comp_total_filtered['Tipificación'].value_counts()
-        total_records_comp = len(df_comp_total_filtered)
+    if total_records_comp > 0:
         percentages_comp = (tipificacion_counts_comp / total_records_comp) * 100
 
     # Combinar todas las tipificaciones únicas
@@ -55,7 +80,7 @@ def plot_tipifications_distribution(ax, df, grupos_filtrados, turno_filtrado,
     pct_comparacion = [percentages_comp.get(tip, 0) for tip in all_tipificaciones]
 
     # Crear barras duales
-    if comparar_activo and len(df_comp_total_filtered) > 0:
+    if comparar_activo and total_records_comp > 0:
         bars1 = ax.barh(y_pos - bar_height/2, pct_principal, bar_height,
                        alpha=0.8, color='skyblue', edgecolor='black', label='Principal')
         bars2 = ax.barh(y_pos + bar_height/2, pct_comparacion, bar_height,
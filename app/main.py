@@ -1,6 +1,8 @@
 """
 Aplicación principal con sistema de pestañas y arquitectura modular
 """
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
@@ -14,19 +16,41 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.data.loader import load_data, get_available_groups, get_unique_values
-from app.data.processor import (filter_data, apply_extremes_filter, calculate_bins,
-                           get_descriptive_stats, calculate_comparison_stats)
-from app.utils.validators import validate_numeric_input, validate_groups_selection
+from app.data.config import DATA_BACKEND, GUI_COLUMNS, PROCESSED_CSV
+from app.data.loader import (load_data_with_state, get_available_groups, get_unique_values,
+                             reload_data_incremental)
+from app.data.filter_index import build_filter_index, get_filter_index
+from app.data.sorted_cells import build_sorted_cells, get_sorted_cells
+from app.data.cube import build_cubes, get_cubes
+from app.data.sqlite_backend import SQLiteStore
+from app.data.result_cache import dataset_version
+from app.data.chart_worker import ChartWorker
+from app.data.expressions import build_filter_expression
+from app.data.hypothesis import CORRECTIONS, compare_groups
+from app.data.timeseries import RESOLUTION_CHOICES
+from app.data.processor import (filter_by_expression, apply_extremes_filter, calculate_bins, get_summary,
+                           get_descriptive_stats, calculate_comparison_stats, summarize_expression)
+from app.data.kde import kde_curve
+from app.utils.outliers import build_outlier_flags, get_agent_outlier_rates
+from app.utils.validators import validate_numeric_input, validate_kde_bandwidth, validate_groups_selection
 from app.components.filters_panel import FiltersPanel
 from app.components.comparison_panel import ComparisonPanel
 from app.components.stats_panel import StatsPanel
 from app.graphics.histogram import plot_histogram_simple, plot_histogram_comparison, configure_histogram_axes
 from app.graphics.boxplot import plot_boxplot_simple, plot_boxplot_comparison, configure_boxplot_axes
-from app.graphics.tipifications import plot_tipifications_distribution
+from app.graphics.tipifications import tipification_data, plot_tipifications_distribution
+from app.graphics.comparisons import plot_pvalue_matrix
 from app.graphics.advanced_plots import (plot_activity_heatmap, plot_time_series, plot_agent_performance,
                                     plot_correlation_matrix, plot_hourly_heatmap)
 
+# Intervalo (ms) con el que el hilo principal revisa el avance de la carga
+LOAD_POLL_MS = 100
+# Intervalo (ms) con el que el hilo principal revisa si están los datos de los gráficos
+CHART_POLL_MS = 50
+
+# Posición de cada pestaña en el notebook
+BASIC_TAB, ADVANCED_TAB, TEMPORAL_TAB, COMPARISON_TAB = range(4)
+
 
 class AnalysisApp:
     def __init__(self, root):
@@ -37,22 +61,32 @@ class AnalysisApp:
         # Configurar protocolo de cierre
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-        # Cargar datos desde archivo CSV
-        self.df_total, file_loaded = load_data()
-
-        # Mostrar información de carga si es necesario
-        if not file_loaded:
-            messagebox.showwarning("Archivo no encontrado",
-                                 "No se encontró el archivo de datos.\n\nSe usarán datos de ejemplo.")
-
-        # Obtener valores únicos para filtros
+        # La ventana se muestra vacía y los datos se cargan en un hilo aparte
+        self.df_total = pd.DataFrame(columns=GUI_COLUMNS)
         self.grupos_disponibles = get_available_groups()
-        self.tipificaciones_unicas = get_unique_values(self.df_total, 'Tipificación')
-        self.turnos_unicos = get_unique_values(self.df_total, 'Turno')
+        self.tipificaciones_unicas = []
+        self.turnos_unicos = []
+        self.source_state = None  # Hasta dónde se leyó el CSV (para recargas incrementales)
+        self.appended_rows = None
+
+        # Los datos de los gráficos se calculan en un hilo aparte; Tk solo dibuja
+        self.chart_worker = ChartWorker()
+        self._charts_after_id = None
+
+        # Cada pestaña se dibuja cuando está visible y cambiaron sus entradas desde el último dibujo
+        self.chart_filters = None      # Filtros leídos al pedir la actualización
+        self._basic_data = None        # Último resultado de compute_basic_chart
+        self._basic_generation = 0
+        self._drawn_inputs = {}        # Pestaña -> entradas con las que se dibujó
+        self._hidden_after_id = None
+        self._loading = False          # El hilo de carga está modificando los índices del dataset
 
         # Crear interface con pestañas
         self.create_notebook_interface()
 
+        # Cargar datos y generar los gráficos iniciales en segundo plano
+        self.start_loading(self.load_initial_data, self.on_initial_data_loaded)
+
     def create_notebook_interface(self):
         """Crear la interfaz principal con pestañas"""
         # Frame principal que contendrá filtros + pestañas
@@ -81,18 +115,35 @@ class AnalysisApp:
         # Pestaña 4: Comparaciones Múltiples
         self.create_multiple_comparison_tab()
 
+        # Solo se dibuja la pestaña visible; al cambiar de pestaña se dibuja si quedó desactualizada
+        self.tab_renderers = {
+            BASIC_TAB: lambda: self.update_basic_chart(self._basic_data),
+            ADVANCED_TAB: self.update_advanced_charts,
+            TEMPORAL_TAB: self.update_temporal_charts,
+            COMPARISON_TAB: self.update_comparison_charts,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.render_visible_tab())
+
     def create_info_section(self, parent):
         """Crear sección de información del dataset"""
         info_frame = ttk.LabelFrame(parent, text="Información del Dataset", padding="5")
         info_frame.pack(fill=tk.X, pady=(0, 5))
 
-        # Mostrar info básica del dataset cargado
-        info_text = f"Registros: {len(self.df_total)} | Columnas: {', '.join(self.df_total.columns[:5])}{'...' if len(self.df_total.columns) > 5 else ''}"
-        ttk.Label(info_frame, text=info_text).pack(side=tk.LEFT)
+        # Info básica del dataset (muestra el avance mientras se carga)
+        self.info_label = ttk.Label(info_frame, text="⏳ Cargando datos...")
+        self.info_label.pack(side=tk.LEFT)
 
         # Botón para recargar datos
-        reload_btn = ttk.Button(info_frame, text="Recargar Datos", command=self.reload_data)
-        reload_btn.pack(side=tk.RIGHT)
+        self.reload_btn = ttk.Button(info_frame, text="Recargar Datos", command=self.reload_data)
+        self.reload_btn.pack(side=tk.RIGHT)
+
+        # Barra de progreso visible solo durante la carga
+        self.progress_bar = ttk.Progressbar(info_frame, mode='indeterminate', length=150)
+
+    def update_info_label(self):
+        """Mostrar información básica del dataset cargado"""
+        info_text = f"Registros: {len(self.df_total)} | Columnas: {', '.join(self.df_total.columns[:5])}{'...' if len(self.df_total.columns) > 5 else ''}"
+        self.info_label.configure(text=info_text)
 
     def create_shared_filters_section(self, parent):
         """Crear sección de filtros compartida"""
@@ -118,22 +169,22 @@ class AnalysisApp:
 
         # Botón comparar y variables de control
         self.comparar_activo = tk.BooleanVar()
-        compare_btn = ttk.Checkbutton(controls_frame, text="Comparar con otro grupo",
-                                     variable=self.comparar_activo, command=self.toggle_comparison)
-        compare_btn.grid(row=0, column=0, pady=(5, 0), sticky=tk.W)
+        self.compare_btn = ttk.Checkbutton(controls_frame, text="Comparar con otro grupo",
+                                          variable=self.comparar_activo, command=self.toggle_comparison)
+        self.compare_btn.grid(row=0, column=0, pady=(5, 0), sticky=tk.W)
 
         # Botones auxiliares (reposicionados)
-        select_all_btn = ttk.Button(controls_frame, text="Seleccionar Todos",
-                                   command=self.filters_panel.select_all_grupos)
-        select_all_btn.grid(row=0, column=1, pady=(5, 0), sticky=tk.W, padx=(20, 5))
+        self.select_all_btn = ttk.Button(controls_frame, text="Seleccionar Todos",
+                                        command=self.filters_panel.select_all_grupos)
+        self.select_all_btn.grid(row=0, column=1, pady=(5, 0), sticky=tk.W, padx=(20, 5))
 
         # Botón actualizar (en el centro)
-        update_btn = ttk.Button(controls_frame, text="Actualizar Todos los Gráficos", command=self.update_all_charts)
-        update_btn.grid(row=0, column=2, pady=(5, 0), padx=(5, 5))
+        self.update_btn = ttk.Button(controls_frame, text="Actualizar Todos los Gráficos", command=self.update_all_charts)
+        self.update_btn.grid(row=0, column=2, pady=(5, 0), padx=(5, 5))
 
-        clear_all_btn = ttk.Button(controls_frame, text="Deseleccionar Todos",
-                                  command=self.filters_panel.clear_all_grupos)
-        clear_all_btn.grid(row=0, column=3, pady=(5, 0), sticky=tk.E, padx=(5, 0))
+        self.clear_all_btn = ttk.Button(controls_frame, text="Deseleccionar Todos",
+                                       command=self.filters_panel.clear_all_grupos)
+        self.clear_all_btn.grid(row=0, column=3, pady=(5, 0), sticky=tk.E, padx=(5, 0))
 
     def create_basic_analysis_tab(self):
         """Crear pestaña de análisis básico"""
@@ -160,9 +211,6 @@ class AnalysisApp:
         self.stats_panel = StatsPanel(stats_container)
         self.stats_panel.frame.pack(fill=tk.BOTH, expand=True)
 
-        # Generar gráfico inicial
-        self.update_basic_chart()
-
     def create_advanced_analysis_tab(self):
         """Crear pestaña de análisis avanzado"""
         tab2 = ttk.Frame(self.notebook)
@@ -185,9 +233,6 @@ class AnalysisApp:
         self.canvas_advanced = FigureCanvasTkAgg(self.fig_advanced, master=charts_frame)
         self.canvas_advanced.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-        # Generar gráficos iniciales
-        self.update_advanced_charts()
-
     def create_temporal_analysis_tab(self):
         """Crear pestaña de análisis temporal"""
         tab3 = ttk.Frame(self.notebook)
@@ -201,6 +246,17 @@ class AnalysisApp:
         title_label = ttk.Label(main_frame, text="Análisis de Series Temporales", font=('TkDefaultFont', 16, 'bold'))
         title_label.pack(pady=(0, 10))
 
+        # Resolución de la serie (automática = según el rango de fechas)
+        controls_frame = ttk.Frame(main_frame)
+        controls_frame.pack(fill=tk.X)
+
+        ttk.Label(controls_frame, text="Resolución:").pack(side=tk.LEFT)
+        self.resolution_var = tk.StringVar(value=next(iter(RESOLUTION_CHOICES)))
+        self.resolution_combo = ttk.Combobox(controls_frame, textvariable=self.resolution_var,
+                                             values=list(RESOLUTION_CHOICES), state="readonly", width=12)
+        self.resolution_combo.pack(side=tk.LEFT, padx=(5, 10))
+        self.resolution_combo.bind("<<ComboboxSelected>>", lambda event: self.render_tab(TEMPORAL_TAB))
+
         # Frame para gráficos
         charts_frame = ttk.Frame(main_frame)
         charts_frame.pack(fill=tk.BOTH, expand=True)
@@ -210,9 +266,6 @@ class AnalysisApp:
         self.canvas_temporal = FigureCanvasTkAgg(self.fig_temporal, master=charts_frame)
         self.canvas_temporal.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-        # Generar gráficos iniciales
-        self.update_temporal_charts()
-
     def create_multiple_comparison_tab(self):
         """Crear pestaña de comparaciones múltiples"""
         tab4 = ttk.Frame(self.notebook)
@@ -226,19 +279,31 @@ class AnalysisApp:
         title_label = ttk.Label(main_frame, text="Comparaciones Múltiples", font=('TkDefaultFont', 16, 'bold'))
         title_label.pack(pady=(0, 10))
 
-        # Información de próximas funcionalidades
-        info_text = """🚧 Próximas funcionalidades:
+        # Controles: corrección de los p-valores de las pruebas por pares
+        controls_frame = ttk.Frame(main_frame)
+        controls_frame.pack(fill=tk.X)
 
-• Comparación simultánea de múltiples grupos
-• Análisis estadístico (t-test, ANOVA)
-• Gráficos de radar por grupo
-• Análisis de rendimiento relativo
-• Benchmarking automático
+        ttk.Label(controls_frame, text="Corrección por comparaciones múltiples:").pack(side=tk.LEFT)
+        self.correction_var = tk.StringVar(value=next(iter(CORRECTIONS)))
+        self.correction_combo = ttk.Combobox(controls_frame, textvariable=self.correction_var,
+                                             values=list(CORRECTIONS), state="readonly", width=20)
+        self.correction_combo.pack(side=tk.LEFT, padx=(5, 10))
+        self.correction_combo.bind("<<ComboboxSelected>>", lambda event: self.render_tab(COMPARISON_TAB))
 
-Esta pestaña se desarrollará en futuras versiones."""
+        ttk.Label(controls_frame, text="Compara cada grupo seleccionado con la tipificación, el turno "
+                                       "y las fechas de los filtros principales").pack(side=tk.LEFT)
 
-        info_label = ttk.Label(main_frame, text=info_text, justify=tk.LEFT, font=('TkDefaultFont', 11))
-        info_label.pack(pady=20)
+        # Resultado de las pruebas globales (ANOVA y Kruskal-Wallis)
+        self.global_tests_label = ttk.Label(main_frame, text="", justify=tk.LEFT, font=('TkDefaultFont', 10))
+        self.global_tests_label.pack(anchor=tk.W, pady=(10, 0))
+
+        # Matrices de p-valores por par de grupos
+        charts_frame = ttk.Frame(main_frame)
+        charts_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.fig_comparisons = Figure(figsize=(16, 8), dpi=100)
+        self.canvas_comparisons = FigureCanvasTkAgg(self.fig_comparisons, master=charts_frame)
+        self.canvas_comparisons.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
     def toggle_comparison(self):
         """Mostrar/ocultar los filtros de comparación"""
@@ -249,69 +314,391 @@ Esta pestaña se desarrollará en futuras versiones."""
             self.comparison_panel.frame.grid_remove()
 
     def update_all_charts(self):
-        """Actualizar todos los gráficos de todas las pestañas"""
+        """Actualizar los gráficos con los filtros actuales
+
+        Los datos del gráfico básico se calculan en el hilo de cálculo con una
+        foto de los filtros. Al llegar se dibuja solo la pestaña visible; las
+        demás se dibujan al seleccionarlas o cuando la ventana está ociosa, y
+        solo si cambiaron sus entradas. Un clic nuevo reemplaza al anterior.
+        """
+        # El rango de fechas se valida una vez (lo usan todas las pestañas)
+        if self.filters_panel.get_date_range() is None:
+            return
+
+        self.chart_filters = self.read_chart_filters()
+        request = self.read_basic_request()
+        self._cancel_hidden_tabs()
+        self.chart_worker.submit(self.compute_basic_chart, self.df_total, request)
+        self.info_label.configure(text="⏳ Calculando gráficos...")
+        if self._charts_after_id is None:
+            self._charts_after_id = self.root.after(CHART_POLL_MS, self._poll_charts)
+
+    def _poll_charts(self):
+        """Dibujar la pestaña visible cuando el hilo de cálculo entrega el pedido vigente (hilo principal)"""
+        self._charts_after_id = None
+        result = self.chart_worker.poll()
+        if result is None:
+            if self.chart_worker.running():
+                self._charts_after_id = self.root.after(CHART_POLL_MS, self._poll_charts)
+            return
+
+        kind, payload = result
+        self.update_info_label()
+        if kind == 'error':
+            messagebox.showerror("Error al actualizar", f"Error al actualizar gráficos: {str(payload)}")
+            return
+
+        self._basic_data = payload
+        self._basic_generation += 1
+        self.render_visible_tab()
+        self._schedule_hidden_tabs()
+
+    def tab_inputs(self, tab):
+        """Entradas de las que depende el dibujo de una pestaña (None si todavía no hay filtros)"""
+        if self.chart_filters is None:
+            return None
+        filters = self.chart_filters
+        version = dataset_version(self.df_total)
+        if tab == BASIC_TAB:
+            return version, self._basic_generation
+        if tab == ADVANCED_TAB:
+            expr_comp = filters['expr_comp'].key() if filters['expr_comp'] is not None else None
+            return version, filters['expr'].key(), expr_comp
+        if tab == TEMPORAL_TAB:
+            return version, filters['expr_temporal'].key(), self.resolution_var.get()
+        return (version, tuple((grupo, expr.key()) for grupo, expr in filters['exprs_grupos'].items()),
+                self.correction_var.get())
+
+    def render_tab(self, tab):
+        """Dibujar una pestaña si cambiaron sus entradas desde el último dibujo"""
+        # Con un cálculo en curso no se leen los datos: se dibuja al llegar el resultado.
+        # Durante una carga tampoco (el notebook sigue habilitado): se dibuja al terminar
+        if self._loading or self.chart_worker.running():
+            return
+        inputs = self.tab_inputs(tab)
+        if inputs is None or self._drawn_inputs.get(tab) == inputs:
+            return
+
+        # Se registra antes de dibujar: si falla, no se reintenta hasta que cambien las entradas
+        self._drawn_inputs[tab] = inputs
         try:
-            self.update_basic_chart()
-            self.update_advanced_charts()
-            self.update_temporal_charts()
+            self.tab_renderers[tab]()
         except Exception as e:
             messagebox.showerror("Error al actualizar", f"Error al actualizar gráficos: {str(e)}")
 
+    def render_visible_tab(self):
+        """Dibujar la pestaña seleccionada si está desactualizada"""
+        self.render_tab(self.notebook.index(self.notebook.select()))
+
+    def _schedule_hidden_tabs(self):
+        """Dibujar de a una las pestañas ocultas desactualizadas cuando Tk no tiene eventos pendientes"""
+        if self._hidden_after_id is None:
+            self._hidden_after_id = self.root.after_idle(self._render_hidden_tab)
+
+    def _render_hidden_tab(self):
+        self._hidden_after_id = None
+        pending = [tab for tab in self.tab_renderers
+                   if self._drawn_inputs.get(tab) != self.tab_inputs(tab)]
+        if pending and not self._loading and not self.chart_worker.running():
+            self.render_tab(pending[0])
+            # Una pestaña por vez: entre una y otra Tk atiende los clics
+            self._schedule_hidden_tabs()
+
+    def _cancel_hidden_tabs(self):
+        if self._hidden_after_id is not None:
+            self.root.after_cancel(self._hidden_after_id)
+            self._hidden_after_id = None
+
+    def set_controls_enabled(self, enabled):
+        """Habilitar/deshabilitar filtros y botones (deshabilitados durante la carga)"""
+        self.filters_panel.set_enabled(enabled)
+        self.comparison_panel.set_enabled(enabled)
+        for widget in (self.reload_btn, self.compare_btn, self.select_all_btn,
+                       self.update_btn, self.clear_all_btn, self.correction_combo, self.resolution_combo):
+            widget.state(['!disabled'] if enabled else ['disabled'])
+
+    def load_initial_data(self, progress):
+        """Carga completa del dataset (se ejecuta en el hilo de carga)"""
+        if DATA_BACKEND == 'sqlite' and os.path.exists(PROCESSED_CSV):
+            # Los filtros se resuelven en la base; no se mantiene el DataFrame completo
+            self.source_state = None
+            self.appended_rows = None
+            return SQLiteStore.open_or_build(PROCESSED_CSV, progress=progress), True
+
+        df, file_loaded, self.source_state = load_data_with_state(progress=progress)
+        self.appended_rows = None
+        progress("Construyendo índice de filtros...")
+        build_filter_index(df)
+        build_sorted_cells(df)
+        if get_cubes(df) is None:
+            # La carga por bloques ya deja los cubos construidos
+            progress("Construyendo cubo de datos...")
+            build_cubes(df)
+        progress("Marcando outliers por celda y agente...")
+        build_outlier_flags(df)
+        return df, file_loaded
+
+    def load_appended_data(self, progress):
+        """Recarga que solo lee las filas agregadas al CSV (se ejecuta en el hilo de carga)"""
+        if isinstance(self.df_total, SQLiteStore):
+            return self.load_initial_data(progress)
+
+        # Las marcas de outliers no vienen del CSV: llegan en cero en las filas
+        # nuevas y se recalculan abajo sobre el dataset completo
+        df, file_loaded, self.source_state, self.appended_rows = reload_data_incremental(
+            self.df_total, self.source_state, progress=progress)
+        if self.appended_rows == 0:
+            # Sin filas nuevas se conserva el mismo DataFrame (y sus resultados en caché)
+            return self.df_total, file_loaded
+
+        # Con una recarga incremental solo se indexan las filas nuevas, sobre
+        # copias de las estructuras de df_total: si algo falla, df se descarta
+        # y df_total conserva sus índices, celdas y cubos intactos
+        progress("Actualizando índice de filtros...")
+        build_filter_index(df, get_filter_index(self.df_total), self.appended_rows)
+        build_sorted_cells(df, get_sorted_cells(self.df_total), self.appended_rows)
+        progress("Actualizando cubo de datos...")
+        build_cubes(df, get_cubes(self.df_total), self.appended_rows)
+        progress("Marcando outliers por celda y agente...")
+        build_outlier_flags(df)
+        return df, file_loaded
+
+    def start_loading(self, load_func, on_loaded):
+        """Cargar los datos en un hilo de trabajo sin bloquear la ventana
+
+        El hilo solo ejecuta load_func(progress); los widgets se actualizan
+        desde el hilo principal, que revisa la cola de mensajes con root.after.
+        """
+        self.set_controls_enabled(False)
+        self._loading = True
+        self.info_label.configure(text="⏳ Cargando datos...")
+
+        # Los gráficos pendientes quedan obsoletos con los datos nuevos
+        self.chart_worker.cancel()
+        self._cancel_hidden_tabs()
+        if self._charts_after_id is not None:
+            self.root.after_cancel(self._charts_after_id)
+            self._charts_after_id = None
+        self.progress_bar.pack(side=tk.RIGHT, padx=(0, 10))
+        self.progress_bar.start(10)
+
+        load_queue = queue.Queue()
+
+        def worker():
+            try:
+                # El cálculo en curso lee df_total y sus índices: esperar a que termine
+                self.chart_worker.wait_idle()
+                result = load_func(lambda mensaje: load_queue.put(('progress', mensaje)))
+                load_queue.put(('done', result))
+            except Exception as e:
+                load_queue.put(('error', e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self._poll_loading, load_queue, on_loaded)
+
+    def _poll_loading(self, load_queue, on_loaded):
+        """Revisar los mensajes del hilo de carga (ejecuta en el hilo principal)"""
+        try:
+            while True:
+                kind, payload = load_queue.get_nowait()
+                if kind == 'progress':
+                    self.info_label.configure(text=f"⏳ {payload}")
+                elif kind == 'done':
+                    self._finish_loading(on_loaded, *payload)
+                    return
+                else:
+                    self._finish_loading(None, None, False)
+                    messagebox.showerror("Error al cargar datos", f"Error: {str(payload)}")
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(LOAD_POLL_MS, self._poll_loading, load_queue, on_loaded)
+
+    def _finish_loading(self, on_loaded, df, file_loaded):
+        """Aplicar los datos cargados, generar los gráficos y habilitar controles"""
+        # El hilo de carga terminó: ya se puede volver a leer el dataset
+        self._loading = False
+        if df is not None:
+            self.df_total = df
+            self.tipificaciones_unicas = get_unique_values(self.df_total, 'Tipificación')
+            self.turnos_unicos = get_unique_values(self.df_total, 'Turno')
+            self.filters_panel.update_options(self.tipificaciones_unicas, self.turnos_unicos)
+            self.comparison_panel.update_turnos(self.turnos_unicos)
+
+            self.info_label.configure(text="⏳ Generando gráficos...")
+            self.root.update_idletasks()
+            if on_loaded is not None:
+                on_loaded(file_loaded)
+
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
+        if not self.chart_worker.running():
+            self.update_info_label()
+        self.set_controls_enabled(True)
+        # Pestaña seleccionada durante la carga (si no hay un cálculo pendiente que la dibuje)
+        self.render_visible_tab()
+
+    def on_initial_data_loaded(self, file_loaded):
+        """Primer render una vez cargados los datos al iniciar"""
+        self.update_all_charts()
+
+        # Mostrar información de carga si es necesario
+        if not file_loaded:
+            messagebox.showwarning("Archivo no encontrado",
+                                 "No se encontró el archivo de datos.\n\nSe usarán datos de ejemplo.")
+
     def reload_data(self):
-        """Recargar datos desde archivo"""
-        self.df_total, file_loaded = load_data()
-        self.tipificaciones_unicas = get_unique_values(self.df_total, 'Tipificación')
-        self.turnos_unicos = get_unique_values(self.df_total, 'Turno')
+        """Recargar datos desde archivo (en segundo plano, solo filas nuevas si es posible)"""
+        self.start_loading(self.load_appended_data, self.on_data_reloaded)
 
-        # Actualizar información del dataset
-        messagebox.showinfo("Datos recargados",
-                          f"Datos recargados exitosamente\\n"
-                          f"Registros: {len(self.df_total)}\\n"
-                          f"Columnas: {len(self.df_total.columns)}")
+    def on_data_reloaded(self, file_loaded):
+        """Actualizar la interfaz con los datos recargados"""
+        if self.appended_rows == 0:
+            messagebox.showinfo("Datos recargados", "No hay registros nuevos en el archivo de datos.")
+            return
 
         # Actualizar todos los gráficos con los nuevos datos
         self.update_all_charts()
 
-    def update_basic_chart(self):
-        """Actualizar gráficos de análisis básico"""
-        # Limpiar figura anterior
-        self.fig_basic.clear()
+        detalle = (f"Registros nuevos: {self.appended_rows}\n" if self.appended_rows is not None
+                   else "Recarga completa del archivo\n")
+        messagebox.showinfo("Datos recargados",
+                          f"Datos recargados exitosamente\n"
+                          f"{detalle}"
+                          f"Registros: {len(self.df_total)}\n"
+                          f"Columnas: {len(self.df_total.columns)}")
+
+    def read_chart_filters(self):
+        """Expresiones de filtrado de las pestañas avanzada, temporal y de comparaciones
 
-        # Obtener y validar valores de los filtros
+        Se leen al pedir la actualización, así una pestaña que se dibuja más
+        tarde usa los mismos filtros que las demás.
+        """
+        grupos_filtrados = self.filters_panel.get_selected_grupos()
+        tipificacion_filtrada = self.filters_panel.tipificacion_var.get()
+        turno_filtrado = self.filters_panel.turno_var.get()
+
+        # Comparación: misma tipificación y fechas que el grupo principal
+        expr_comp = None
+        if self.comparar_activo.get() and self.comparison_panel.get_selected_grupos_comp():
+            expr_comp = self.filters_panel.apply_date_filter(
+                self.comparison_panel.get_filter_expression(tipificacion_filtrada))
+
+        # La serie temporal usa la primera tipificación y el primer turno
+        tipificacion_temporal = self.tipificaciones_unicas[0] if self.tipificaciones_unicas else "Cae Muda o Cortada"
+        turno_temporal = self.turnos_unicos[0] if self.turnos_unicos else "TT"
+
+        return {
+            'expr': self.filters_panel.get_filter_expression(),
+            'expr_comp': expr_comp,
+            'expr_temporal': self.filters_panel.apply_date_filter(
+                build_filter_expression(grupos_filtrados, tipificacion_temporal, turno_temporal)),
+            # Un filtro por grupo para las pruebas entre grupos
+            'exprs_grupos': {
+                grupo: self.filters_panel.apply_date_filter(
+                    build_filter_expression([grupo], tipificacion_filtrada, turno_filtrado))
+                for grupo in grupos_filtrados
+            },
+        }
+
+    def read_basic_request(self):
+        """Foto validada de los filtros del gráfico básico (None si algún valor no es válido)
+
+        Se lee en el hilo principal; compute_basic_chart solo usa esta foto.
+        """
         grupos_filtrados = self.filters_panel.get_selected_grupos()
         if not validate_groups_selection(grupos_filtrados):
-            return
+            return None
 
         tipificacion_filtrada = self.filters_panel.tipificacion_var.get()
-        turno_filtrado = self.filters_panel.turno_var.get()
 
         # Validar valores numéricos
         size_bin = validate_numeric_input(self.filters_panel.size_bin_var.get(), "ancho_intervalo")
         if size_bin is None:
-            return
+            return None
 
         quitar_x_porciento_extremo_sup = validate_numeric_input(self.filters_panel.quitar_extremo_var.get(), "porcentaje")
         if quitar_x_porciento_extremo_sup is None:
-            return
+            return None
+
+        kde_bandwidth = validate_kde_bandwidth(self.filters_panel.kde_bandwidth_var.get())
+        if kde_bandwidth is None:
+            return None
 
         # Validar % extremo sup para comparación si está activa
         quitar_x_porciento_extremo_sup_comp = 0.0
-        if self.comparar_activo.get():
+        comparar_activo = self.comparar_activo.get()
+        if comparar_activo:
             quitar_x_porciento_extremo_sup_comp = validate_numeric_input(self.comparison_panel.quitar_extremo_comp_var.get(), "porcentaje")
             if quitar_x_porciento_extremo_sup_comp is None:
-                return
+                return None
+
+        # Filtro del grupo de comparación (con la misma tipificación que el principal)
+        grupos_comp_filtrados = self.comparison_panel.get_selected_grupos_comp()
+        expr_comp = None
+        if comparar_activo and grupos_comp_filtrados:
+            expr_comp = self.filters_panel.apply_date_filter(
+                self.comparison_panel.get_filter_expression(tipificacion_filtrada))
+
+        return {
+            'grupos': grupos_filtrados,
+            'tipificacion': tipificacion_filtrada,
+            'turno': self.filters_panel.turno_var.get(),
+            'expr': self.filters_panel.get_filter_expression(),
+            'date_filter': self.filters_panel.get_date_filter(),
+            'size_bin': size_bin,
+            'quitar_extremo': quitar_x_porciento_extremo_sup,
+            'mostrar_kde': self.filters_panel.mostrar_kde.get(),
+            'kde_bandwidth': kde_bandwidth,
+            'comparar': comparar_activo,
+            'grupos_comp': grupos_comp_filtrados,
+            'turno_comp': self.comparison_panel.turno_comp_var.get(),
+            'expr_comp': expr_comp,
+            'quitar_extremo_comp': quitar_x_porciento_extremo_sup_comp,
+        }
+
+    def compute_basic_chart(self, df_total, request):
+        """Datos del gráfico básico para request (se ejecuta en el hilo de cálculo)
+
+        No toca widgets: filtra, quita extremos, calcula los intervalos y deja
+        guardados los resúmenes y curvas KDE que el dibujo vuelve a pedir.
+        """
+        if request is None:
+            return None
+
+        df_filtrado = filter_by_expression(df_total, request['expr'])
+        df_comp_filtrado = pd.DataFrame()
+        if request['expr_comp'] is not None:
+            df_comp_filtrado = filter_by_expression(df_total, request['expr_comp'])
 
-        # Filtrar datos del grupo principal
-        df_filtrado = filter_data(self.df_total, grupos_filtrados, tipificacion_filtrada, turno_filtrado)
+        data = dict(request, df_filtrado=df_filtrado, df_comp_filtrado=df_comp_filtrado)
+        if len(df_filtrado) == 0 and len(df_comp_filtrado) == 0:
+            return data
 
-        # Verificar si está activa la comparación y filtrar datos del grupo de comparación
-        df_comp_filtrado = pd.DataFrame()
-        if self.comparar_activo.get():
-            grupos_comp_filtrados = self.comparison_panel.get_selected_grupos_comp()
-            if grupos_comp_filtrados:
-                # Usar la misma tipificación que el grupo principal
-                turno_comp_filtrado = self.comparison_panel.turno_comp_var.get()
-                df_comp_filtrado = filter_data(self.df_total, grupos_comp_filtrados, tipificacion_filtrada, turno_comp_filtrado)
+        # Aplicar filtros de extremos
+        data['df_filtrado'] = apply_extremes_filter(df_filtrado, request['quitar_extremo'])
+        data['df_comp_filtrado'] = apply_extremes_filter(df_comp_filtrado, request['quitar_extremo_comp'])
+        data['bins'] = calculate_bins(data['df_filtrado'], data['df_comp_filtrado'], request['size_bin'])
+        data['tipifications'] = tipification_data(df_total, request['grupos'], request['turno'],
+                                                  request['grupos_comp'], request['turno_comp'],
+                                                  request['comparar'], request['date_filter'])
+        for frame in (data['df_filtrado'], data['df_comp_filtrado']):
+            if len(frame) > 0:
+                get_summary(frame)
+                if request['mostrar_kde']:
+                    kde_curve(frame, request['kde_bandwidth'])
+        return data
+
+    def update_basic_chart(self, data):
+        """Dibujar el gráfico básico con los datos de compute_basic_chart"""
+        # Limpiar figura anterior
+        self.fig_basic.clear()
+        if data is None:
+            return
+
+        df_filtrado, df_comp_filtrado = data['df_filtrado'], data['df_comp_filtrado']
+        grupos_filtrados = data['grupos']
+        comparar_activo = data['comparar']
 
         if len(df_filtrado) == 0 and len(df_comp_filtrado) == 0:
             # Si no hay datos, mostrar mensaje
@@ -324,12 +711,7 @@ Esta pestaña se desarrollará en futuras versiones."""
             self.stats_panel.update_stats(df_filtrado, df_comp_filtrado)
             return
 
-        # Aplicar filtros de extremos
-        df_filtrado = apply_extremes_filter(df_filtrado, quitar_x_porciento_extremo_sup)
-        df_comp_filtrado = apply_extremes_filter(df_comp_filtrado, quitar_x_porciento_extremo_sup_comp)
-
-        # Calcular bins
-        bins = calculate_bins(df_filtrado, df_comp_filtrado, size_bin)
+        bins = data['bins']
 
         # Crear subplots con proporciones 20-60-20
         gs = self.fig_basic.add_gridspec(1, 3, width_ratios=[1, 3, 1])
@@ -338,25 +720,24 @@ Esta pestaña se desarrollará en futuras versiones."""
         ax3 = self.fig_basic.add_subplot(gs[0, 2])  # Boxplot
 
         # Gráfico de distribución de tipificaciones
-        plot_tipifications_distribution(ax1, self.df_total, grupos_filtrados, turno_filtrado,
-                                      self.df_total, self.comparison_panel.get_selected_grupos_comp(),
-                                      self.comparison_panel.turno_comp_var.get(), self.comparar_activo.get())
+        plot_tipifications_distribution(ax1, data['tipifications'], comparar_activo)
 
         # Histograma con/sin comparación
-        if self.comparar_activo.get() and len(df_comp_filtrado) > 0:
+        if comparar_activo and len(df_comp_filtrado) > 0:
             # Crear segundo eje Y para comparación
             ax2_twin = ax2.twinx()
-            plot_histogram_comparison(ax2, ax2_twin, df_filtrado, df_comp_filtrado, bins, self.filters_panel.mostrar_kde.get())
-            title_text = f"Histograma - Comparación\\nAzul: {', '.join(grupos_filtrados)} | Rojo: {', '.join(self.comparison_panel.get_selected_grupos_comp())}"
+            plot_histogram_comparison(ax2, ax2_twin, df_filtrado, df_comp_filtrado, bins, data['mostrar_kde'],
+                                      data['kde_bandwidth'])
+            title_text = f"Histograma - Comparación\\nAzul: {', '.join(grupos_filtrados)} | Rojo: {', '.join(data['grupos_comp'])}"
         else:
-            plot_histogram_simple(ax2, df_filtrado, bins, self.filters_panel.mostrar_kde.get())
-            title_text = f"Histograma\\n{', '.join(grupos_filtrados)} | {turno_filtrado} | {tipificacion_filtrada}"
+            plot_histogram_simple(ax2, df_filtrado, bins, data['mostrar_kde'], data['kde_bandwidth'])
+            title_text = f"Histograma\\n{', '.join(grupos_filtrados)} | {data['turno']} | {data['tipificacion']}"
 
         ax2.set_title(title_text, fontsize=10)
         configure_histogram_axes(ax2, bins)
 
         # Boxplot con/sin comparación
-        if self.comparar_activo.get() and len(df_comp_filtrado) > 0:
+        if comparar_activo and len(df_comp_filtrado) > 0:
             # Crear segundo eje Y para boxplot de comparación
             ax3_twin = ax3.twinx()
             plot_boxplot_comparison(ax3, ax3_twin, df_filtrado, df_comp_filtrado)
@@ -372,33 +753,28 @@ Esta pestaña se desarrollará en futuras versiones."""
         self.canvas_basic.draw()
 
         # Actualizar estadísticas
-        self.stats_panel.update_stats(df_filtrado, df_comp_filtrado)
+        self.stats_panel.update_stats(df_filtrado, df_comp_filtrado, get_agent_outlier_rates(self.df_total))
 
     def update_advanced_charts(self):
         """Actualizar gráficos de análisis avanzado"""
         self.fig_advanced.clear()
 
-        # Obtener datos filtrados básicos para análisis avanzado
-        grupos_filtrados = self.filters_panel.get_selected_grupos() if hasattr(self, 'filters_panel') else self.grupos_disponibles[:3]
-        tipificacion_filtrada = self.filters_panel.tipificacion_var.get() if hasattr(self, 'filters_panel') else self.tipificaciones_unicas[0]
-        turno_filtrado = self.filters_panel.turno_var.get() if hasattr(self, 'filters_panel') else self.turnos_unicos[0]
-
-        df_filtrado = filter_data(self.df_total, grupos_filtrados, tipificacion_filtrada, turno_filtrado)
+        # Obtener datos filtrados básicos para análisis avanzado (filtros leídos al actualizar)
+        filters = self.chart_filters
+        df_filtrado = filter_by_expression(self.df_total, filters['expr'])
 
         # Obtener datos de comparación si está activa
+        comparar_activo = filters['expr_comp'] is not None
         df_comp_filtrado = pd.DataFrame()
-        if hasattr(self, 'comparar_activo') and self.comparar_activo.get():
-            grupos_comp_filtrados = self.comparison_panel.get_selected_grupos_comp()
-            if grupos_comp_filtrados:
-                turno_comp_filtrado = self.comparison_panel.turno_comp_var.get()
-                df_comp_filtrado = filter_data(self.df_total, grupos_comp_filtrados, tipificacion_filtrada, turno_comp_filtrado)
+        if comparar_activo:
+            df_comp_filtrado = filter_by_expression(self.df_total, filters['expr_comp'])
 
         # Crear subplots 1x2 (solo los dos de arriba)
         gs = self.fig_advanced.add_gridspec(1, 2, hspace=0.3, wspace=0.3)
 
         # Heatmap de actividad
         ax1 = self.fig_advanced.add_subplot(gs[0, 0])
-        plot_activity_heatmap(ax1, df_filtrado, df_comp_filtrado, self.comparar_activo.get() if hasattr(self, 'comparar_activo') else False)
+        plot_activity_heatmap(ax1, df_filtrado, df_comp_filtrado, comparar_activo)
 
         # Rendimiento por agente
         ax2 = self.fig_advanced.add_subplot(gs[0, 1])
@@ -410,19 +786,54 @@ Esta pestaña se desarrollará en futuras versiones."""
         """Actualizar gráficos de análisis temporal"""
         self.fig_temporal.clear()
 
-        # Obtener datos filtrados básicos para análisis temporal
-        grupos_filtrados = self.filters_panel.get_selected_grupos() if hasattr(self, 'filters_panel') else self.grupos_disponibles[:3]
-        tipificacion_filtrada = self.tipificaciones_unicas[0] if self.tipificaciones_unicas else "Cae Muda o Cortada"
-        turno_filtrado = self.turnos_unicos[0] if self.turnos_unicos else "TT"
-
-        df_filtrado = filter_data(self.df_total, grupos_filtrados, tipificacion_filtrada, turno_filtrado)
+        # Obtener datos filtrados básicos para análisis temporal (filtros leídos al actualizar)
+        df_filtrado = filter_by_expression(self.df_total, self.chart_filters['expr_temporal'])
 
         # Crear subplot para series de tiempo
         ax = self.fig_temporal.add_subplot(111)
-        plot_time_series(ax, df_filtrado)
+        plot_time_series(ax, df_filtrado, RESOLUTION_CHOICES[self.resolution_var.get()])
 
         self.canvas_temporal.draw()
 
+    def update_comparison_charts(self):
+        """Actualizar la pestaña de comparaciones múltiples (pruebas de hipótesis entre grupos)"""
+        self.fig_comparisons.clear()
+
+        exprs_grupos = self.chart_filters['exprs_grupos']
+        grupos_filtrados = list(exprs_grupos)
+
+        # Un resumen por grupo (desde el cubo de datos, sin filtrar filas)
+        summaries = {grupo: summarize_expression(self.df_total, expr) for grupo, expr in exprs_grupos.items()}
+        result = compare_groups(summaries, CORRECTIONS[self.correction_var.get()])
+
+        if result is None:
+            self.global_tests_label.configure(text="")
+            ax = self.fig_comparisons.add_subplot(111)
+            ax.text(0.5, 0.5, 'Se necesitan al menos dos grupos con datos\npara comparar',
+                    ha='center', va='center', transform=ax.transAxes, fontsize=14)
+            ax.set_axis_off()
+            self.canvas_comparisons.draw()
+            return
+
+        anova, kruskal = result['anova'], result['kruskal']
+        sin_datos = [grupo for grupo in grupos_filtrados if grupo not in result['groups']]
+        self.global_tests_label.configure(
+            text=f"ANOVA de un factor: F({anova['df'][0]}, {anova['df'][1]}) = {anova['statistic']:.2f}, "
+                 f"p = {anova['pvalue']:.4g}    |    "
+                 f"Kruskal-Wallis: H({kruskal['df']}) = {kruskal['statistic']:.2f}, p = {kruskal['pvalue']:.4g}"
+                 + (f"\nGrupos sin datos: {', '.join(sin_datos)}" if sin_datos else ""))
+
+        gs = self.fig_comparisons.add_gridspec(1, 2, wspace=0.3)
+        ax1 = self.fig_comparisons.add_subplot(gs[0, 0])
+        plot_pvalue_matrix(ax1, result['groups'], result['counts'], result['welch']['pvalue_adj'],
+                           f"t de Welch (medias) - p corregido ({self.correction_var.get()})")
+        ax2 = self.fig_comparisons.add_subplot(gs[0, 1])
+        plot_pvalue_matrix(ax2, result['groups'], result['counts'], result['mann_whitney']['pvalue_adj'],
+                           f"Mann-Whitney (distribuciones) - p corregido ({self.correction_var.get()})")
+
+        self.fig_comparisons.tight_layout()
+        self.canvas_comparisons.draw()
+
     def on_closing(self):
         """Manejo apropiado del cierre de la aplicación"""
         try:
@@ -433,6 +844,11 @@ Esta pestaña se desarrollará en futuras versiones."""
                 plt.close(self.fig_advanced)
             if hasattr(self, 'fig_temporal'):
                 plt.close(self.fig_temporal)
+            if hasattr(self, 'fig_comparisons'):
+                plt.close(self.fig_comparisons)
+            if hasattr(self, 'stats_panel'):
+                self.stats_panel.close()
+            self.chart_worker.shutdown()
         except:
             pass
         finally:
@@ -1,45 +1,176 @@
 """
 Módulo para detección y análisis de outliers
+
+Los límites se calculan una sola vez al cargar el dataset, por celda
+(grupo, Turno, Tipificación) y por agente, con una pasada agrupada sobre
+todas las filas (build_outlier_flags). Como los filtros son uniones de
+grupos dentro de un turno y una tipificación, cada llamada de una selección
+se compara con las de su grupo en ese mismo turno y tipificación. El
+resultado queda en dos columnas booleanas del DataFrame (OUTLIER_COLUMN y
+OUTLIER_AGENT_COLUMN) y en una tabla de tasas por agente, así que las tablas
+de outliers solo recortan lo ya calculado para la selección.
 """
+import numpy as np
 import pandas as pd
 
+from app.data.config import OUTLIER_IQR_FACTOR, OUTLIER_MAD_THRESHOLD, OUTLIER_METHOD, OUTLIER_PERCENTILES
+from app.data.registry import IdentityRegistry
+
+# Columnas con la marca de outlier de cada fila: respecto de su celda y respecto del propio agente
+OUTLIER_COLUMN = 'Outlier'
+OUTLIER_AGENT_COLUMN = 'Outlier Agente'
+OUTLIER_COLUMNS = [OUTLIER_COLUMN, OUTLIER_AGENT_COLUMN]
+
+OUTLIER_METHODS = ('iqr', 'mad', 'percentil')
+
+# Celda con la que se compara cada llamada para OUTLIER_COLUMN
+OUTLIER_CELL = ['grupo', 'Turno', 'Tipificación']
+
+# Constante que hace al MAD comparable con la desviación estándar (z robusto)
+MAD_SCALE = 0.6745
+
+# Tasas por agente del dataset completo: DataFrame -> tabla de tasas
+_RATES = IdentityRegistry()
+
+
+def _group_fences(values, codes, n_groups, method):
+    """Límites (inferior, superior) de cada código de grupo, en una pasada agrupada
+
+    Las filas con código -1 (grupo faltante) no participan. Un grupo sin
+    dispersión (MAD nulo) no tiene outliers.
+    """
+    valid = codes >= 0
+    grouped = pd.Series(values[valid]).groupby(codes[valid])
+
+    if method == 'iqr':
+        q = grouped.quantile([0.25, 0.75]).unstack().reindex(range(n_groups))
+        q1, q3 = q[0.25].to_numpy(), q[0.75].to_numpy()
+        lower, upper = q1 - OUTLIER_IQR_FACTOR * (q3 - q1), q3 + OUTLIER_IQR_FACTOR * (q3 - q1)
+    elif method == 'mad':
+        median = grouped.median().reindex(range(n_groups)).to_numpy()
+        deviation = np.abs(values[valid] - median[codes[valid]])
+        mad = pd.Series(deviation).groupby(codes[valid]).median().reindex(range(n_groups)).to_numpy()
+        width = np.where(mad > 0, OUTLIER_MAD_THRESHOLD * mad / MAD_SCALE, np.inf)
+        lower, upper = median - width, median + width
+    elif method == 'percentil':
+        q = grouped.quantile(list(OUTLIER_PERCENTILES)).unstack().reindex(range(n_groups))
+        lower, upper = q[OUTLIER_PERCENTILES[0]].to_numpy(), q[OUTLIER_PERCENTILES[1]].to_numpy()
+    else:
+        raise ValueError(f"Método de outliers desconocido: {method}")
+    return lower, upper
+
+
+def _flag(values, codes, lower, upper):
+    """Marca de outlier por fila según los límites de su grupo"""
+    valid = codes >= 0
+    safe = np.where(valid, codes, 0)
+    return valid & ((values < lower[safe]) | (values > upper[safe]))
+
+
+def _codes(df, columns):
+    """Código de grupo por fila (-1 si falta alguna clave) y el índice de los grupos"""
+    if isinstance(columns, str):
+        codes, uniques = pd.factorize(df[columns], sort=True)
+        return codes, pd.Index(uniques, name=columns)
+    grouped = df.groupby(columns, observed=True, sort=True)
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    return codes, grouped.size().index
+
+
+def compute_outlier_flags(df, columns, method=OUTLIER_METHOD):
+    """Marca de outlier por fila y límites por grupo de columns (una columna o una lista)
+
+    Returns:
+        tuple: (array booleano por fila, DataFrame con 'inferior' y 'superior'
+                indexado por los grupos)
+    """
+    codes, index = _codes(df, columns)
+    values = df['TalkingTime'].to_numpy(dtype=np.float64, na_value=np.nan)
+    lower, upper = _group_fences(values, codes, len(index), method)
+    fences = pd.DataFrame({'inferior': lower, 'superior': upper}, index=index)
+    return _flag(values, codes, lower, upper), fences
+
+
+def build_outlier_flags(df, method=OUTLIER_METHOD):
+    """Marcar los outliers de df por celda y por agente, y calcular las tasas por agente
+
+    Agrega (o reemplaza) las columnas OUTLIER_COLUMN y OUTLIER_AGENT_COLUMN.
+    Los límites dependen de todas las filas, así que tras una recarga se
+    vuelven a calcular completos. Devuelve la tabla de tasas por agente, o
+    None si faltan columnas.
+    """
+    if any(column not in df.columns for column in OUTLIER_CELL + ['Nombre Agente', 'TalkingTime']):
+        return None
+
+    flags, _ = compute_outlier_flags(df, OUTLIER_CELL, method)
+    agent_flags, _ = compute_outlier_flags(df, 'Nombre Agente', method)
+    df[OUTLIER_COLUMN] = flags
+    df[OUTLIER_AGENT_COLUMN] = agent_flags
+
+    # Llamadas y outliers por agente con bincount sobre los códigos
+    codes, agents = pd.factorize(df['Nombre Agente'], sort=True)
+    valid = codes >= 0
+    calls = np.bincount(codes[valid], minlength=len(agents))
+    outliers = np.bincount(codes[valid], weights=flags[valid], minlength=len(agents)).astype(np.int64)
+    own = np.bincount(codes[valid], weights=agent_flags[valid], minlength=len(agents)).astype(np.int64)
+    rates = pd.DataFrame({
+        'llamadas': calls,
+        'outliers': outliers,
+        'tasa': outliers / np.maximum(calls, 1),
+        'outliers_agente': own,
+        'tasa_agente': own / np.maximum(calls, 1),
+    }, index=pd.Index(agents, name='Nombre Agente'))
+
+    return _RATES.set(df, rates)
+
+
+def get_agent_outlier_rates(df):
+    """Tasas de outliers por agente calculadas para df, o None si no hay vigentes"""
+    return _RATES.get(df)
+
 
 def detect_outliers(df_filtrado):
-    """Detectar outliers usando el método IQR (Interquartile Range)"""
+    """Outliers de la selección, de mayor a menor TalkingTime
+
+    Recorta la marca precalculada (límites de la celda grupo, Turno,
+    Tipificación de cada llamada en todo el dataset). Si la selección no la
+    tiene (p. ej. backend SQLite), se calculan los límites por celda con las
+    filas de la selección.
+    """
     if len(df_filtrado) == 0:
         return pd.DataFrame()
 
-    Q1 = df_filtrado['TalkingTime'].quantile(0.25)
-    Q3 = df_filtrado['TalkingTime'].quantile(0.75)
-    IQR = Q3 - Q1
-
-    # Definir límites para outliers
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-
-    # Filtrar outliers
-    outliers = df_filtrado[(df_filtrado['TalkingTime'] < lower_bound) |
-                           (df_filtrado['TalkingTime'] > upper_bound)]
+    if OUTLIER_COLUMN in df_filtrado.columns:
+        flags = df_filtrado[OUTLIER_COLUMN].to_numpy(dtype=bool)
+    else:
+        cell = [column for column in OUTLIER_CELL if column in df_filtrado.columns]
+        if cell:
+            flags, _ = compute_outlier_flags(df_filtrado, cell)
+        else:
+            # Sin columnas de celda: un solo par de límites para toda la selección
+            flags, _ = compute_outlier_flags(df_filtrado.assign(celda=0), 'celda')
 
+    outliers = df_filtrado[flags]
     return outliers.sort_values('TalkingTime', ascending=False)
 
 
-def analyze_outliers_by_agent(outliers_df):
-    """Analizar outliers por agente"""
-    if len(outliers_df) == 0:
+def analyze_outliers_by_agent(outliers_df, agent_rates=None):
+    """Analizar outliers por agente
+
+    Devuelve tuplas (agente, outliers en la selección, % de los outliers de
+    la selección, tasa de outliers del agente en todo el dataset). Sin
+    agent_rates la tasa queda vacía.
+    """
+    if len(outliers_df) == 0 or 'Nombre Agente' not in outliers_df.columns:
         return []
 
-    if 'Nombre Agente' in outliers_df.columns:
-        agent_counts = outliers_df['Nombre Agente'].value_counts()
-        total_outliers = len(outliers_df)
-
-        agents_data = []
-        for agent, count in agent_counts.items():
-            percentage = (count / total_outliers) * 100
-            agents_data.append((
-                str(agent)[:15],
-                str(count),
-                f"{percentage:.1f}%"
-            ))
-        return agents_data
-    return []
\ No newline at end of file
+    agent_counts = outliers_df['Nombre Agente'].value_counts()
+    agent_counts = agent_counts[agent_counts > 0]  # Descartar categorías sin outliers
+    percentages = agent_counts / len(outliers_df) * 100
+    if agent_rates is not None:
+        rates = agent_rates['tasa'].reindex(agent_counts.index) * 100
+    else:
+        rates = pd.Series(np.nan, index=agent_counts.index)
+
+    return [(str(agent)[:15], str(count), f"{percentage:.1f}%", f"{rate:.1f}%" if pd.notna(rate) else '')
+            for agent, count, percentage, rate in zip(agent_counts.index, agent_counts, percentages, rates)]
@@ -3,6 +3,10 @@ Módulo de validaciones para la aplicación
 """
 from tkinter import messagebox
 
+import pandas as pd
+
+from app.data.kde import KDE_BANDWIDTHS
+
 
 def validate_numeric_input(value, field_name):
     """Validar entrada numérica y convertir a float"""
@@ -21,9 +25,52 @@ def validate_numeric_input(value, field_name):
         return None
 
 
+def validate_kde_bandwidth(value):
+    """Convertir el ancho de banda elegido en una regla de KDE_BANDWIDTHS o en segundos (> 0)"""
+    if value in KDE_BANDWIDTHS:
+        return KDE_BANDWIDTHS[value]
+    try:
+        num_value = float(value)
+    except ValueError:
+        messagebox.showerror("Error de entrada",
+                             f"'{value}' no es un ancho de banda válido (elegí una regla o escribí los segundos)")
+        return None
+    if num_value <= 0:
+        messagebox.showerror("Error de validación", "El ancho de banda debe ser mayor que 0")
+        return None
+    return num_value
+
+
 def validate_groups_selection(grupos_filtrados):
     """Validar que haya al menos un grupo seleccionado"""
     if not grupos_filtrados:
         messagebox.showwarning("Sin grupos seleccionados", "Debes seleccionar al menos un grupo")
         return False
-    return True
\ No newline at end of file
+    return True
+
+
+def parse_date_range(desde, hasta):
+    """Convertir los textos de fecha en (desde, hasta); vacío = sin límite
+
+    Una fecha sin hora en 'hasta' incluye el día completo.
+    """
+    desde, hasta = desde.strip(), hasta.strip()
+    try:
+        inicio = pd.Timestamp(desde) if desde else None
+        fin = pd.Timestamp(hasta) if hasta else None
+    except ValueError:
+        raise ValueError("Las fechas deben tener el formato AAAA-MM-DD (opcionalmente con HH:MM)")
+    if fin is not None and fin == fin.normalize() and ':' not in hasta:
+        fin = fin + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    if inicio is not None and fin is not None and inicio > fin:
+        raise ValueError("La fecha 'Desde' debe ser anterior a 'Hasta'")
+    return inicio, fin
+
+
+def validate_date_range(desde, hasta):
+    """Validar el rango de fechas; devuelve (desde, hasta) o None si es inválido"""
+    try:
+        return parse_date_range(desde, hasta)
+    except ValueError as e:
+        messagebox.showerror("Error de validación", str(e))
+        return None
@@ -0,0 +1,14 @@
+"""
+Utilidades para widgets de Tkinter
+"""
+
+
+def set_widgets_state(widget, enabled):
+    """Habilitar/deshabilitar recursivamente los controles dentro de un widget"""
+    for child in widget.winfo_children():
+        if hasattr(child, 'state') and child.winfo_class().startswith('T'):
+            try:
+                child.state(['!disabled'] if enabled else ['disabled'])
+            except Exception:
+                pass
+        set_widgets_state(child, enabled)
@@ -0,0 +1,20 @@
+"""
+Datos compartidos por las pruebas: llamadas sintéticas con sus estructuras de carga
+"""
+import pytest
+
+from app.data.benchmark import make_synthetic_calls
+from app.data.cube import build_cubes
+from app.data.filter_index import build_filter_index
+from app.data.loader import add_time_columns, sort_by_inicio
+from app.data.sorted_cells import build_sorted_cells
+
+
+@pytest.fixture(scope='session')
+def calls():
+    """Dataset sintético preparado como en la carga de la aplicación (ordenado, con índices y cubos)"""
+    df = add_time_columns(sort_by_inicio(make_synthetic_calls(20_000, n_days=30, seed=3)))
+    build_filter_index(df)
+    build_sorted_cells(df)
+    build_cubes(df)
+    return df
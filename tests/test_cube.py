@@ -0,0 +1,110 @@
+"""
+Pruebas del cubo de datos contra los cálculos sobre las filas del mismo DataFrame
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.cube import CUBE_DIMENSIONS, DataCube, cube_selection
+from app.data.expressions import In
+from app.data.processor import apply_extremes_filter, filter_by_expression, filter_data, get_summary
+from app.data.timeseries import series_stats
+from app.graphics.advanced_plots import DAY_ORDER, _activity_pivot, _correlation_from_cube, _correlation_from_rows
+
+
+def _random_results(df, n_results, seed=0):
+    """Resultados de filtro (con y sin recorte de extremos) registrados en el cubo"""
+    rng = np.random.default_rng(seed)
+    grupos = [str(g) for g in df['grupo'].cat.categories]
+    for _ in range(n_results):
+        seleccion = list(rng.choice(grupos, rng.integers(1, len(grupos) + 1), replace=False))
+        tipificacion = None if rng.random() < 0.3 else str(rng.choice(df['Tipificación'].cat.categories))
+        result = filter_data(df, seleccion, tipificacion, str(rng.choice(['TM', 'TT'])))
+        yield result
+        yield apply_extremes_filter(result, 0.05)
+
+
+def _rows(df):
+    """Copia de las filas sin estructuras asociadas: fuerza los cálculos fila a fila"""
+    return df.copy()
+
+
+def test_histograms_match_numpy(calls):
+    for result in _random_results(calls, 10):
+        selection = cube_selection(result)
+        assert selection is not None
+        values = result['TalkingTime'].to_numpy()
+        np.testing.assert_array_equal(selection.histogram(), np.bincount(values))
+
+        summary = get_summary(result)
+        for size_bin in (1, 5, 12):
+            bins = np.arange(0, summary.max + size_bin, size_bin)
+            np.testing.assert_array_equal(summary.histogram(bins), np.histogram(values, bins)[0])
+
+
+def test_histogram_with_uneven_bins_keeps_total(calls):
+    # Con bordes no enteros cada segundo se reparte en su intervalo: solo el total es exacto
+    summary = get_summary(filter_data(calls, list(calls['grupo'].cat.categories), None, 'TM'))
+    counts = summary.histogram(np.linspace(0, summary.max, 37))
+    assert counts.sum() == pytest.approx(summary.count)
+
+
+def test_activity_pivot_matches_groupby(calls):
+    for result in list(_random_results(calls, 5, seed=1)):
+        inicio = result['Inicio']
+        expected = (result.groupby([inicio.dt.dayofweek, inicio.dt.hour]).size().unstack(fill_value=0)
+                    .reindex(index=range(7), columns=range(24), fill_value=0))
+        expected.index = DAY_ORDER
+        assert cube_selection(result) is not None
+        pd.testing.assert_frame_equal(_activity_pivot(result), expected, check_names=False, check_dtype=False)
+        pd.testing.assert_frame_equal(_activity_pivot(_rows(result)), expected, check_names=False,
+                                      check_dtype=False)
+
+
+def test_correlation_from_cube_matches_rows(calls):
+    grupos = [str(g) for g in calls['grupo'].cat.categories]
+    results = [filter_data(calls, grupos, None, 'TM'), filter_data(calls, grupos, 'Venta', 'TT')]
+    results += list(_random_results(calls, 5, seed=2))
+    for result in results:
+        from_cube = _correlation_from_cube(result)
+        assert from_cube is not None
+        pd.testing.assert_frame_equal(from_cube, _correlation_from_rows(result), rtol=1e-9, atol=1e-12)
+
+
+def test_correlation_with_both_turnos(calls):
+    result = filter_by_expression(calls, In('grupo', list(calls['grupo'].cat.categories)))
+    from_cube = _correlation_from_cube(result)
+    assert from_cube is not None and not from_cube.isna().any().any()
+    pd.testing.assert_frame_equal(from_cube, _correlation_from_rows(result), rtol=1e-9, atol=1e-12)
+
+
+def test_group_stats_match_groupby(calls):
+    for result in _random_results(calls, 5, seed=3):
+        stats = cube_selection(result).group_stats(['grupo'], quantiles=[0.5, 0.9])
+        grouped = result.groupby('grupo', observed=True)['TalkingTime']
+        expected = grouped.agg(['count', 'sum', 'mean'])
+        expected[0.5] = grouped.quantile(0.5)
+        expected[0.9] = grouped.quantile(0.9)
+        expected = expected.reset_index()
+        expected['grupo'] = expected['grupo'].astype(str).astype(object)
+        pd.testing.assert_frame_equal(stats.sort_values('grupo').reset_index(drop=True),
+                                      expected.sort_values('grupo').reset_index(drop=True),
+                                      check_dtype=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize('resolution', ['hora', 'dia', 'semana', 'mes'])
+def test_series_stats_match_rows(calls, resolution):
+    result = filter_data(calls, [str(g) for g in calls['grupo'].cat.categories], None, 'TT')
+    pd.testing.assert_frame_equal(series_stats(result, resolution), series_stats(_rows(result), resolution),
+                                  check_dtype=False, rtol=1e-12)
+
+
+def test_extend_matches_full_build(calls):
+    extended = DataCube(CUBE_DIMENSIONS)
+    extended.extend(calls.iloc[:7000])
+    extended.extend(calls.iloc[7000:])
+    full = DataCube(CUBE_DIMENSIONS)
+    full.extend(calls)
+    assert extended.rows == full.rows == len(calls)
+    for name in ['periods', 'count', 'total', 'total_sq', 'hist_cell', 'hist_second', 'hist_count']:
+        np.testing.assert_array_equal(getattr(extended, name), getattr(full, name))
@@ -0,0 +1,114 @@
+"""
+Pruebas del motor de hipótesis (a partir de resúmenes) contra scipy.stats
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+from app.data.hypothesis import (adjust_pvalues, anova_oneway, compare_groups, kruskal_wallis, mann_whitney,
+                                 welch_t_test)
+from app.data.stats import StatsSummary
+
+
+def _integer_groups():
+    # Segundos enteros: muchos empates dentro y entre grupos
+    rng = np.random.default_rng(0)
+    return [rng.exponential(scale, size).round().astype(np.int64)
+            for scale, size in [(30, 400), (35, 250), (30, 600), (50, 80)]]
+
+
+def _float_groups():
+    rng = np.random.default_rng(1)
+    groups = [rng.normal(loc, 5, size).round(1) for loc, size in [(20, 300), (21, 200), (25, 150)]]
+    groups[0][:5] = -1.5  # Valores negativos: resumen sin histograma
+    return groups
+
+
+@pytest.fixture(params=[_integer_groups, _float_groups])
+def groups(request):
+    values = request.param()
+    return values, [StatsSummary.from_values(group) for group in values]
+
+
+def test_welch_matches_ttest_ind(groups):
+    values, summaries = groups
+    result = welch_t_test(summaries)
+    for i in range(len(values)):
+        for j in range(len(values)):
+            if i == j:
+                continue
+            expected = stats.ttest_ind(values[i], values[j], equal_var=False)
+            assert result['statistic'][i, j] == pytest.approx(expected.statistic, rel=1e-9)
+            assert result['pvalue'][i, j] == pytest.approx(expected.pvalue, rel=1e-7, abs=1e-300)
+
+
+def test_anova_matches_f_oneway(groups):
+    values, summaries = groups
+    result = anova_oneway(summaries)
+    expected = stats.f_oneway(*values)
+    assert result['statistic'] == pytest.approx(expected.statistic, rel=1e-9)
+    assert result['pvalue'] == pytest.approx(expected.pvalue, rel=1e-7, abs=1e-300)
+
+
+def test_kruskal_matches_scipy(groups):
+    values, summaries = groups
+    result = kruskal_wallis(summaries)
+    expected = stats.kruskal(*values)
+    assert result['statistic'] == pytest.approx(expected.statistic, rel=1e-9)
+    assert result['pvalue'] == pytest.approx(expected.pvalue, rel=1e-7, abs=1e-300)
+
+
+def test_mann_whitney_matches_mannwhitneyu(groups):
+    values, summaries = groups
+    result = mann_whitney(summaries)
+    for i in range(len(values)):
+        for j in range(len(values)):
+            if i == j:
+                continue
+            expected = stats.mannwhitneyu(values[i], values[j], alternative='two-sided',
+                                          use_continuity=True, method='asymptotic')
+            assert result['statistic'][i, j] == pytest.approx(expected.statistic, rel=1e-12)
+            assert result['pvalue'][i, j] == pytest.approx(expected.pvalue, rel=1e-7, abs=1e-300)
+
+
+def _reference_holm(p):
+    order = np.argsort(p)
+    adjusted = np.empty(len(p))
+    running = 0.0
+    for rank, index in enumerate(order):
+        running = max(running, (len(p) - rank) * p[index])
+        adjusted[index] = min(running, 1.0)
+    return adjusted
+
+
+@pytest.mark.parametrize('method', ['holm', 'bonferroni', 'fdr_bh'])
+def test_adjust_pvalues_matches_reference(method):
+    rng = np.random.default_rng(2)
+    k = 6
+    p = rng.uniform(0, 0.2, size=k * (k - 1) // 2)
+    p[3] = p[7]  # p-valores empatados
+    matrix = np.ones((k, k))
+    rows, cols = np.triu_indices(k, 1)
+    matrix[rows, cols] = p
+    matrix[cols, rows] = p
+
+    if method == 'holm':
+        expected = _reference_holm(p)
+    elif method == 'bonferroni':
+        expected = np.minimum(p * len(p), 1.0)
+    else:
+        expected = stats.false_discovery_control(p, method='bh')
+
+    adjusted = adjust_pvalues(matrix, method)
+    np.testing.assert_allclose(adjusted[rows, cols], expected, rtol=1e-12)
+    np.testing.assert_allclose(adjusted[cols, rows], expected, rtol=1e-12)
+    assert (np.diag(adjusted) == 1).all()
+
+
+def test_compare_groups_skips_empty_groups():
+    values = _integer_groups()
+    summaries = {'a': StatsSummary.from_values(values[0]), 'b': StatsSummary(), 'c': None,
+                 'd': StatsSummary.from_values(values[1])}
+    result = compare_groups(summaries, 'holm')
+    assert result['groups'] == ['a', 'd']
+    assert compare_groups({'a': StatsSummary.from_values(values[0]), 'b': StatsSummary()}) is None
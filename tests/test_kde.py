@@ -0,0 +1,46 @@
+"""
+Pruebas de la KDE por histograma (binned_kde) contra scipy.stats.gaussian_kde
+"""
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from app.data.kde import binned_kde
+from app.data.stats import StatsSummary
+
+# Error máximo admitido, relativo al máximo de la densidad
+TOLERANCE = 0.01
+
+
+def _reference(values, rule, x):
+    if isinstance(rule, str):
+        return gaussian_kde(values, bw_method=rule)(x)
+    # Ancho de banda fijo en segundos: gaussian_kde recibe el factor sobre el desvío
+    return gaussian_kde(values, bw_method=rule / np.std(values, ddof=1))(x)
+
+
+def _integer_values():
+    rng = np.random.default_rng(0)
+    return rng.exponential(scale=40, size=5000).round().astype(np.int64)
+
+
+def _float_values():
+    rng = np.random.default_rng(1)
+    return np.concatenate([rng.exponential(scale=40, size=3000), rng.uniform(0, 1000, size=200)])
+
+
+@pytest.mark.parametrize('rule', ['scott', 'silverman', 2.0, 0.3])
+@pytest.mark.parametrize('make_values', [_integer_values, _float_values])
+def test_binned_kde_matches_gaussian_kde(make_values, rule):
+    values = make_values()
+    summary = StatsSummary.from_values(values)
+    assert (summary.sketch is not None) == (values.dtype.kind == 'i')
+
+    x, density = binned_kde(summary, rule, n_points=500)
+    expected = _reference(values.astype(np.float64), rule, x)
+    assert np.abs(density - expected).max() <= TOLERANCE * expected.max()
+
+
+def test_binned_kde_without_spread():
+    assert binned_kde(StatsSummary.from_values(np.array([5, 5, 5]))) is None
+    assert binned_kde(StatsSummary.from_values(np.array([5]))) is None
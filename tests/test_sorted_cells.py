@@ -0,0 +1,78 @@
+"""
+Pruebas de los cuantiles desde celdas ordenadas contra pandas
+"""
+import numpy as np
+import pytest
+
+from app.data.processor import apply_extremes_filter, filter_data, talking_time_quantiles
+from app.data.sorted_cells import SortedCells, get_selection, get_sorted_cells, sorted_quantiles
+
+QS = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1]
+
+
+def _random_selections(df, n_selections, seed=0):
+    rng = np.random.default_rng(seed)
+    grupos = list(df['grupo'].cat.categories)
+    tipificaciones = list(df['Tipificación'].cat.categories)
+    for _ in range(n_selections):
+        seleccion = [str(g) for g in rng.choice(grupos, rng.integers(1, len(grupos) + 1), replace=False)]
+        tipificacion = None if rng.random() < 0.3 else str(rng.choice(tipificaciones))
+        yield seleccion, tipificacion, str(rng.choice(['TM', 'TT']))
+
+
+def _expected(df, grupos, tipificacion, turno, limite_sup=None):
+    mask = df['grupo'].isin(grupos) & (df['Turno'] == turno)
+    if tipificacion is not None:
+        mask &= df['Tipificación'] == tipificacion
+    values = df.loc[mask, 'TalkingTime']
+    if limite_sup is not None:
+        values = values[values <= limite_sup]
+    return values
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sorted_quantiles_match_pandas(calls, seed):
+    cells = get_sorted_cells(calls)
+    rng = np.random.default_rng(seed)
+    for grupos, tipificacion, turno in _random_selections(calls, 10, seed):
+        limite_sup = None if rng.random() < 0.5 else int(rng.integers(0, 200))
+        expected = _expected(calls, grupos, tipificacion, turno, limite_sup).quantile(QS).to_numpy()
+        keys = cells.select(grupos, tipificacion, turno)
+        np.testing.assert_array_equal(sorted_quantiles(cells.arrays(keys, limite_sup), QS), expected)
+
+
+def test_filtered_quantiles_match_pandas(calls):
+    for grupos, tipificacion, turno in _random_selections(calls, 20, seed=7):
+        result = filter_data(calls, grupos, tipificacion, turno)
+        assert get_selection(result) is not None
+        np.testing.assert_array_equal(talking_time_quantiles(result, QS),
+                                      result['TalkingTime'].quantile(QS).to_numpy())
+
+        trimmed = apply_extremes_filter(result, 0.05)
+        assert get_selection(trimmed) is not None
+        np.testing.assert_array_equal(talking_time_quantiles(trimmed, QS),
+                                      trimmed['TalkingTime'].quantile(QS).to_numpy())
+
+
+def test_empty_selection_gives_nan(calls):
+    result = filter_data(calls, ['nadie'], 'Venta', 'TM')
+    assert len(result) == 0
+    assert np.isnan(talking_time_quantiles(result, QS)).all()
+    assert np.isnan(sorted_quantiles([], QS)).all()
+
+
+def test_single_row_selection(calls):
+    row = calls.iloc[[123]]
+    cells = SortedCells(row)
+    keys = cells.select([str(row['grupo'].iloc[0])], str(row['Tipificación'].iloc[0]), str(row['Turno'].iloc[0]))
+    np.testing.assert_array_equal(sorted_quantiles(cells.arrays(keys), QS),
+                                  row['TalkingTime'].quantile(QS).to_numpy())
+
+
+def test_extend_keeps_cells_sorted(calls):
+    cells = SortedCells(calls.iloc[:12_000])
+    cells.extend(calls.iloc[12_000:])
+    full = SortedCells(calls)
+    assert cells.rows == full.rows
+    for key, values in full.cells.items():
+        np.testing.assert_array_equal(cells.cells[key], values)
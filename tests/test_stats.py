@@ -0,0 +1,73 @@
+"""
+Pruebas de StatsSummary (fórmula de Chan y cuantiles del sketch) contra pandas
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.processor import apply_extremes_filter, filter_data, get_descriptive_stats
+from app.data.stats import StatsSummary, combine_summaries
+
+QS = [0, 0.05, 0.25, 0.5, 0.75, 0.95, 1]
+
+
+def _integer_values(size, seed):
+    return np.random.default_rng(seed).exponential(40, size).round().astype(np.int64)
+
+
+def _float_values(size, seed):
+    return np.random.default_rng(seed).normal(30, 10, size).round(2)
+
+
+def _describe(values):
+    return pd.Series(values, name='TalkingTime', dtype=np.float64).describe()
+
+
+def _random_parts(values, rng):
+    cuts = np.sort(rng.integers(0, len(values) + 1, rng.integers(0, 6)))
+    return np.split(rng.permutation(values), cuts)
+
+
+@pytest.mark.parametrize('make_values', [_integer_values, _float_values])
+@pytest.mark.parametrize('seed', range(5))
+def test_merged_summary_matches_describe(make_values, seed):
+    rng = np.random.default_rng(seed)
+    values = make_values(int(rng.integers(1, 3000)), seed)
+    summary = combine_summaries(StatsSummary.from_values(part) for part in _random_parts(values, rng))
+
+    assert (summary.sketch is not None) == (make_values is _integer_values)
+    pd.testing.assert_series_equal(summary.describe(), _describe(values), rtol=1e-12)
+    np.testing.assert_array_equal(summary.quantile(QS), np.quantile(values.astype(np.float64), QS))
+
+
+@pytest.mark.parametrize('make_values', [_integer_values, _float_values])
+def test_truncate_matches_filtered_describe(make_values):
+    values = make_values(2000, 11)
+    summary = StatsSummary.from_values(values)
+    for limite_sup in [-1, 0, 12.5, 40, np.quantile(values, 0.9), values.max()]:
+        expected = values[values <= limite_sup]
+        pd.testing.assert_series_equal(summary.truncate(limite_sup).describe(), _describe(expected), rtol=1e-12)
+
+
+@pytest.mark.parametrize('values', [[], [17], [2.5]])
+def test_empty_and_single_value(values):
+    values = np.asarray(values)
+    summary = StatsSummary.from_values(values)
+    pd.testing.assert_series_equal(summary.describe(), _describe(values))
+    pd.testing.assert_series_equal(StatsSummary().merge(summary).describe(), _describe(values))
+
+
+def test_filtered_describe_matches_pandas(calls):
+    rng = np.random.default_rng(5)
+    grupos = [str(g) for g in calls['grupo'].cat.categories]
+    for _ in range(20):
+        seleccion = list(rng.choice(grupos, rng.integers(1, len(grupos) + 1), replace=False))
+        tipificacion = None if rng.random() < 0.3 else str(rng.choice(calls['Tipificación'].cat.categories))
+        result = filter_data(calls, seleccion, tipificacion, str(rng.choice(['TM', 'TT'])))
+        for df in (result, apply_extremes_filter(result, 0.1)):
+            pd.testing.assert_series_equal(get_descriptive_stats(df), _describe(df['TalkingTime']), rtol=1e-12)
+
+    single = filter_data(calls.iloc[[42]], [str(calls['grupo'].iloc[42])], None, str(calls['Turno'].iloc[42]))
+    assert len(single) == 1
+    pd.testing.assert_series_equal(get_descriptive_stats(single), _describe(single['TalkingTime']))
+    assert get_descriptive_stats(filter_data(calls, ['nadie'], None, 'TM')) is None